@@ -3,14 +3,44 @@ Dr. Martens AI Customer Support - Backend API with Anthropic Claude
 Agentic AI powered by Claude for intelligent customer support
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 from datetime import datetime
-import pandas as pd
+from collections import Counter
+from array import array
+from typing import TYPE_CHECKING
+import numpy as np
 import os
 import json
+import time
+import logging
+import queue
+import asyncio
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from anthropic import Anthropic
+from customer_store import (
+    CATEGORICAL_FIELDS, TEXT_FIELDS, CategoricalColumn, CustomerStore, TextColumn, file_fingerprint,
+)
+from sqlite_store import SQLiteCustomerStore
+from session_store import SessionStore, content_to_dicts
+from response_cache import ResponseCache, fingerprint
+from fast_path import FastPathRouter
+from context_budget import compact_messages, estimate_tokens, project_tool_result
+from retrieval import BM25Index, source_key
+from customer_index import FILTER_FIELDS, CustomerIndex
+from order_index import OrderNumberIndex, extract_order_number
+from data_reloader import DatasetReloader
+from structured_log import RawJSON, log_event, sampled, setup_logging
+from tracing import MetricsRegistry, Trace
+from usage import UsageLedger, turn_usage
+
+# pandas and the Anthropic SDK are imported where first needed - together they
+# are most of the import time, and neither is needed to serve a snapshot
+if TYPE_CHECKING:
+    import pandas as pd
+    from anthropic import AsyncAnthropic
 
 load_dotenv()
 
@@ -20,13 +50,121 @@ CORS(app)
 # =============================================================================
 # ANTHROPIC CLIENT SETUP
 # =============================================================================
-client = Anthropic(api_key=os.getenv('ANTHROPIC_API_KEY'))
+# The async client's connection pool is bound to the event loop it first runs
+# on, so there is one client per loop (the agent loop thread, or uvicorn's)
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_client() -> 'AsyncAnthropic':
+    """AsyncAnthropic client for the running event loop"""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        from anthropic import AsyncAnthropic
+        # ANTHROPIC_BASE_URL points the agent at another endpoint (e.g. benchmarks/mock_llm_server.py)
+        client = _async_clients[loop] = AsyncAnthropic(api_key=os.getenv('ANTHROPIC_API_KEY'),
+                                                       base_url=os.getenv('ANTHROPIC_BASE_URL') or None)
+    return client
+
+
+# Sync callers (Flask views) run agent coroutines on one shared background loop
+_agent_loop = None
+_agent_loop_lock = threading.Lock()
+
+
+def get_agent_loop() -> asyncio.AbstractEventLoop:
+    """Start (once) and return the event loop thread used by the sync wrappers"""
+    global _agent_loop
+    with _agent_loop_lock:
+        if _agent_loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name='agent-loop', daemon=True).start()
+            _agent_loop = loop
+    return _agent_loop
+
+# =============================================================================
+# LOGGING
+# =============================================================================
+# Agent events go through a bounded queue to a listener thread, so a slow
+# console never holds up a chat request; routine records are kept for a
+# LOG_SAMPLE_RATE share of requests, warnings and errors always
+LOG_SAMPLE_RATE = float(os.getenv('LOG_SAMPLE_RATE', 1.0))
+agent_log, log_listener = setup_logging(
+    'drmartens.agent',
+    level=os.getenv('LOG_LEVEL', 'INFO'),
+    fmt=os.getenv('LOG_FORMAT', 'json').lower(),
+    queue_size=int(os.getenv('LOG_QUEUE_SIZE', 10000)),
+)
+
+# =============================================================================
+# TRACING & METRICS
+# =============================================================================
+# Every chat request is a Trace of timed spans (order extraction, customer
+# lookup, each LLM iteration, each tool call, ...); /api/metrics renders the
+# resulting latency summaries and counters for Prometheus
+metrics = MetricsRegistry('drmartens')
+span_seconds = metrics.summary('span_duration_seconds', 'Time spent in each phase of a chat request', ['span'])
+tool_seconds = metrics.summary('tool_duration_seconds', 'Agent tool call latency', ['tool'])
+tool_calls = metrics.counter('tool_calls_total', 'Agent tool calls by outcome', ['tool', 'outcome'])
+llm_stop_reasons = metrics.counter('llm_stop_reason_total', 'Claude responses by stop_reason', ['stop_reason'])
+agent_turns = metrics.counter('agent_turns_total', 'Chat turns by how they were answered', ['path'])
+errors = metrics.counter('errors_total', 'Failures by phase', ['phase'])
+llm_tokens = metrics.counter('llm_tokens_total', 'Claude tokens by type, issue category and priority',
+                             ['type', 'issue_category', 'priority_level'])
+llm_cost = metrics.counter('llm_cost_usd_total', 'Claude cost (list price) by issue category and priority',
+                           ['issue_category', 'priority_level'])
+tool_turn_cost = metrics.counter('tool_turn_cost_usd_total',
+                                 'Claude cost of the turns that used each tool (a turn counts for each tool)', ['tool'])
+
+
+def start_trace(trace_id: str = None) -> Trace:
+    """New trace for one chat request (reusing a well-formed client-supplied id)"""
+    return Trace(span_seconds, trace_id)
+
+# =============================================================================
+# CONVERSATION SESSIONS
+# =============================================================================
+session_store = SessionStore(
+    max_sessions=int(os.getenv('SESSION_MAX_SESSIONS', 10000)),
+    ttl_seconds=float(os.getenv('SESSION_TTL_SECONDS', 1800)),
+    max_bytes=int(os.getenv('SESSION_MAX_BYTES', 64 * 1024 * 1024)),
+    max_messages=int(os.getenv('SESSION_MAX_MESSAGES', 40)),
+)
 
 # =============================================================================
 # LOAD REAL CUSTOMER DATA FROM CSV
 # =============================================================================
-def load_customer_data(csv_path=None):
-    """Load customer reviews from CSV file"""
+CUSTOMER_SNAPSHOT_ENABLED = os.getenv('CUSTOMER_SNAPSHOT_ENABLED', 'true').lower() == 'true'
+# memory: columnar store in each process; sqlite: one database file shared by all workers
+CUSTOMER_STORE = os.getenv('CUSTOMER_STORE', 'memory').lower()
+DATA_RELOAD_SECONDS = float(os.getenv('DATA_RELOAD_SECONDS', 10))
+
+
+def read_customer_frame(path: str):
+    import pandas as pd
+    return pd.read_csv(path, usecols=lambda column: column in CSV_COLUMNS)
+
+
+def snapshot_path(csv_path: str) -> str:
+    return os.getenv('CUSTOMER_SNAPSHOT_PATH') or f"{csv_path}.snapshot"
+
+
+def customer_db_path(csv_path: str) -> str:
+    return os.getenv('CUSTOMER_DB_PATH') or f"{csv_path}.sqlite3"
+
+
+def open_customer_data(csv_path=None, use_snapshot=CUSTOMER_SNAPSHOT_ENABLED, with_row_hashes=False):
+    """Load customer reviews, through the binary snapshot next to the CSV when it is current.
+
+    Returns (store, path, row_hashes, fingerprint). The snapshot is reused
+    while the CSV's sha256 matches the one recorded in it (the hash is only
+    recomputed when size or mtime changed); otherwise the CSV is parsed and
+    a new snapshot written. row_hashes (for hot reload) is a uint64 array in
+    the store's iteration order, or None unless asked for.
+    
+    With CUSTOMER_STORE=sqlite the store is the SQLite database instead,
+    rebuilt from the CSV under the same sha256 rule.
+    """
     
     possible_paths = [
         csv_path,
@@ -37,49 +175,439 @@ def load_customer_data(csv_path=None):
         os.path.expanduser('~/dr-martens-project/drmartens-fullstack/backend/dr_martens_training_dataset_50.csv'),
     ]
     
-    df = None
-    loaded_path = None
-    
     for path in possible_paths:
-        if path and os.path.exists(path):
+        if not (path and os.path.exists(path)):
+            continue
+        if CUSTOMER_STORE == 'sqlite':
             try:
-                df = pd.read_csv(path)
-                loaded_path = path
-                print(f"✅ Loaded {len(df)} customer records from: {path}")
-                break
+                return open_sqlite_customer_data(path, with_row_hashes)
             except Exception as e:
-                print(f"❌ Failed to load {path}: {e}")
-    
-    if df is None:
-        print("⚠️  No CSV found.")
-        return {}, None
-    
-    # Convert DataFrame to dictionary keyed by order_number
-    customer_db = {}
-    for _, row in df.iterrows():
-        order_num = str(row['order_number']).upper()
-        customer_db[order_num] = {
-            'order_number': order_num,
-            'star_rating': int(row['star_rating']) if pd.notna(row['star_rating']) else 1,
-            'customer_name': str(row['customer_name']) if pd.notna(row['customer_name']) else 'Customer',
-            'review_title': str(row['review_title']) if pd.notna(row['review_title']) else '',
-            'review_text': str(row['review_text_full']) if pd.notna(row.get('review_text_full')) else str(row['review_text']) if pd.notna(row['review_text']) else '',
-            'review_date': str(row['review_date']) if pd.notna(row['review_date']) else '',
-            'product_name': str(row['product_name']) if pd.notna(row['product_name']) else 'Dr. Martens Product',
-            'product_url': str(row['product_url']) if pd.notna(row.get('product_url')) else '',
-            'issue_category': str(row['issue_category']) if pd.notna(row['issue_category']) else 'general',
-            'action_required': str(row['action_required']) if pd.notna(row['action_required']) else 'knowledge_base',
-            'priority_level': str(row['priority_level']) if pd.notna(row['priority_level']) else 'low',
-            'suggested_resolution': str(row['suggested_resolution']) if pd.notna(row['suggested_resolution']) else 'Provide assistance',
-            'integration_system': str(row['integration_system']) if pd.notna(row['integration_system']) else 'rag_knowledge',
-            'escalation_needed': row['escalation_needed'] if pd.notna(row.get('escalation_needed')) else False,
-            'sentiment': str(row['sentiment']) if pd.notna(row['sentiment']) else 'neutral',
-        }
+                print(f"❌ Failed to load {path} into SQLite: {e}")
+                continue
+        fingerprint = None
+        if use_snapshot:
+            opened = CustomerStore.open_snapshot(snapshot_path(path))
+            if opened is not None:
+                store, meta, extras = opened
+                source = meta.get('source') or {}
+                fingerprint = file_fingerprint(path, known=source)
+                if fingerprint['sha256'] == source.get('sha256'):
+                    print(f"⚡ Loaded {len(store)} customer records from snapshot: {snapshot_path(path)}")
+                    hashes = None
+                    if with_row_hashes and 'row_hashes' in extras:
+                        hashes = np.frombuffer(extras['row_hashes'], dtype=np.uint64)
+                    return store, path, hashes, fingerprint
+        try:
+            if use_snapshot and fingerprint is None:
+                fingerprint = file_fingerprint(path)
+            df = read_customer_frame(path)
+            print(f"✅ Loaded {len(df)} customer records from: {path}")
+        except Exception as e:
+            print(f"❌ Failed to load {path}: {e}")
+            continue
+        store = frame_to_customer_db(df)
+        hashes = None
+        if use_snapshot or with_row_hashes:
+            hashes = row_fingerprints(df).reindex(list(store)).to_numpy(np.uint64)
+        if use_snapshot:
+            save_customer_snapshot(store, path, fingerprint, hashes)
+        return store, path, hashes if with_row_hashes else None, fingerprint
+    
+    print("⚠️  No CSV found.")
+    return CustomerStore(), None, None, None
+
+
+def open_sqlite_customer_data(path: str, with_row_hashes=False):
+    """SQLite store for the CSV at path, reloaded from the CSV when it changed since the last build"""
+    store = SQLiteCustomerStore(customer_db_path(path))
+    source = store.meta.get('source') or {}
+    fingerprint = file_fingerprint(path, known=source)
+    if fingerprint['sha256'] == source.get('sha256'):
+        print(f"⚡ Opened {len(store)} customer records from SQLite: {store.path}")
+    else:
+        def build():
+            df = read_customer_frame(path)
+            rows = frame_to_customer_db(df)
+            hashes = row_fingerprints(df).reindex(list(rows)).to_numpy(np.uint64)
+            return rows, hashes.tolist(), {'source': fingerprint}
+
+        # Re-checked under the write lock: of several workers starting on a changed CSV, only the first rebuilds
+        if store.rebuild_if_stale(fingerprint['sha256'], build):
+            print(f"✅ Loaded {len(store)} customer records from {path} into SQLite: {store.path}")
+        else:
+            print(f"⚡ Opened {len(store)} customer records from SQLite (rebuilt by another worker): {store.path}")
+    hashes = np.frombuffer(store.row_hashes(), dtype=np.uint64) if with_row_hashes else None
+    return store, path, hashes, fingerprint
+
+
+def load_customer_data(csv_path=None, use_snapshot=CUSTOMER_SNAPSHOT_ENABLED):
+    """Load customer reviews from CSV file"""
+    store, path, _, _ = open_customer_data(csv_path, use_snapshot)
+    return store, path
+
+
+def save_customer_snapshot(store: CustomerStore, csv_path: str, fingerprint: dict, row_hashes=None):
+    """Write the store's snapshot next to the CSV (failures only cost the next cold start)"""
+    extras = {}
+    if row_hashes is not None:
+        extras['row_hashes'] = array('Q')
+        extras['row_hashes'].frombytes(np.ascontiguousarray(row_hashes, dtype=np.uint64).tobytes())
+    try:
+        store.save_snapshot(snapshot_path(csv_path), meta={'source': fingerprint}, extras=extras)
+    except (OSError, TypeError, ValueError) as e:
+        print(f"⚠️  Could not write customer snapshot for {csv_path}: {e}")
+
+
+# Text columns: (output key, CSV column, default when missing/NaN, required)
+TEXT_COLUMNS = [
+    ('customer_name', 'customer_name', 'Customer', True),
+    ('review_title', 'review_title', '', True),
+    ('review_date', 'review_date', '', True),
+    ('product_name', 'product_name', 'Dr. Martens Product', True),
+    ('product_url', 'product_url', '', False),
+    ('issue_category', 'issue_category', 'general', True),
+    ('action_required', 'action_required', 'knowledge_base', True),
+    ('priority_level', 'priority_level', 'low', True),
+    ('suggested_resolution', 'suggested_resolution', 'Provide assistance', True),
+    ('integration_system', 'integration_system', 'rag_knowledge', True),
+    ('sentiment', 'sentiment', 'neutral', True),
+]
+
+
+# Only these CSV columns are parsed; the scraper's extra columns are skipped
+CSV_COLUMNS = {'order_number', 'star_rating', 'review_text', 'review_text_full', 'escalation_needed'}
+CSV_COLUMNS.update(column for _, column, _, _ in TEXT_COLUMNS)
+
+
+def _text_column(df, column, default, required=True):
+    """Column as str, NaN replaced by default (missing optional column -> all default)"""
+    import pandas as pd
+    if column not in df.columns:
+        if required:
+            raise KeyError(column)
+        return pd.Series(default, index=df.index, dtype=object)
+    values = df[column]
+    return values.astype(str).where(values.notna(), default)
+
+
+def frame_to_customer_db(df) -> CustomerStore:
+    """Convert a reviews DataFrame to the customer store keyed by order_number.
+
+    Defaults are filled column-wise; enum-like columns are factorized into
+    categorical codes and free text is packed into per-column buffers, so
+    no per-row Python objects are created.
+    """
+    import pandas as pd
+    columns = {
+        'star_rating': df['star_rating'].fillna(1).astype(int),
+    }
+    for key, column, default, required in TEXT_COLUMNS:
+        columns[key] = _text_column(df, column, default, required)
+
+    # review_text_full wins over review_text when present
+    review_text = _text_column(df, 'review_text', '')
+    if 'review_text_full' in df.columns:
+        full = df['review_text_full']
+        review_text = full.astype(str).where(full.notna(), review_text)
+    columns['review_text'] = review_text
+
+    if 'escalation_needed' in df.columns:
+        columns['escalation_needed'] = df['escalation_needed'].astype(object).where(
+            df['escalation_needed'].notna(), False)
+    else:
+        columns['escalation_needed'] = pd.Series(False, index=df.index, dtype=object)
+
+    store_columns = {field: TextColumn.from_strings(columns[field].tolist()) for field in TEXT_FIELDS}
+    for field in CATEGORICAL_FIELDS:
+        codes, categories = pd.factorize(columns[field])
+        store_columns[field] = CategoricalColumn.from_codes(codes.tolist(), categories.tolist())
+
+    order_numbers = df['order_number'].astype(str).str.upper().tolist()
+    return CustomerStore(order_numbers, store_columns)
+
+
+def row_fingerprints(df) -> 'pd.Series':
+    """order_number -> 64-bit hash of the rest of the row (later duplicates win, as in the store)"""
+    import pandas as pd
+    values = df[sorted(column for column in df.columns if column != 'order_number')]
+    hashes = pd.util.hash_pandas_object(values, index=False)
+    hashes.index = df['order_number'].astype(str).str.upper()
+    return hashes[~hashes.index.duplicated(keep='last')]
+
+
+# =============================================================================
+# SIMILAR-CASE RETRIEVAL
+# =============================================================================
+RETRIEVAL_MAX_POSTINGS = int(os.getenv('RETRIEVAL_MAX_POSTINGS', 1000))
+
+
+def build_similar_cases_index(store: CustomerStore, source_path: str = None, digest: str = None) -> BM25Index:
+    """BM25 index over review titles + texts; reuses the copy saved next to the CSV while it is current"""
+    index_path = key = None
+    if source_path:
+        index_path = os.getenv('RETRIEVAL_INDEX_PATH') or f"{source_path}.bm25.npz"
+        key = source_key(source_path, digest=digest, max_postings=RETRIEVAL_MAX_POSTINGS)
+        index = BM25Index.load(index_path, key)
+        if index is not None:
+            print(f"✅ Loaded similar-case index ({len(index)} reviews) from: {index_path}")
+            return index
+    
+    start = time.perf_counter()
+    texts = map('{} {}'.format, store.field_values('review_title'), store.field_values('review_text'))
+    index = BM25Index.build(list(store), texts, max_postings=RETRIEVAL_MAX_POSTINGS)
+    print(f"✅ Built similar-case index over {len(index)} reviews in {time.perf_counter() - start:.2f}s")
+    if index_path:
+        try:
+            index.save(index_path, key)
+        except OSError as e:
+            print(f"⚠️  Could not save similar-case index to {index_path}: {e}")
+    return index
+
+
+def find_similar_cases(query: str, k: int = 5, exclude_order: str = None) -> list:
+    """Top-k past cases for a free-text query, with how each was resolved"""
+    cases = []
+    store = customer_reviews_db
+    for order, score in similar_cases_index.search(query, k + 1):
+        customer = store.get(order) if order != exclude_order else None
+        if customer is None:
+            continue
+        cases.append({
+            'order_number': order,
+            'score': round(score, 3),
+            'review_title': customer['review_title'],
+            'product_name': customer['product_name'],
+            'star_rating': customer['star_rating'],
+            'issue_category': customer['issue_category'],
+            'suggested_resolution': customer['suggested_resolution'],
+        })
+        if len(cases) == k:
+            break
+    return cases
+
+
+# =============================================================================
+# CUSTOMER LISTING INDEX
+# =============================================================================
+CUSTOMERS_PAGE_SIZE = int(os.getenv('CUSTOMERS_PAGE_SIZE', 100))
+CUSTOMERS_MAX_PAGE_SIZE = 1000
+
+
+def build_customer_index(store: CustomerStore) -> CustomerIndex:
+    """Posting lists behind /api/customers filters and name/product prefix search"""
+    start = time.perf_counter()
+    index = CustomerIndex.build(store)
+    print(f"✅ Indexed {len(index)} customers for listing in {time.perf_counter() - start:.2f}s "
+          f"({index.nbytes() / 2**20:.1f} MB)")
+    return index
+
+
+# =============================================================================
+# ORDER NUMBER RESOLUTION
+# =============================================================================
+def build_order_index(store: CustomerStore) -> OrderNumberIndex:
+    """Fuzzy index over order numbers, for suggestions when a lookup misses"""
+    start = time.perf_counter()
+    index = OrderNumberIndex.build(list(store))
+    print(f"✅ Indexed {len(index)} order numbers for typo matching in {time.perf_counter() - start:.2f}s")
+    return index
+
+
+def order_suggestions(order_number: str, k: int = 3) -> list:
+    """Real orders closest to a mistyped order number, with the product to confirm it by"""
+    store = customer_reviews_db
+    suggestions = []
+    for order, distance in order_index.suggest(order_number, k):
+        customer = store.get(order)
+        if customer is not None:
+            suggestions.append({
+                'order_number': order,
+                'edit_distance': distance,
+                'product_name': customer['product_name'],
+                'review_date': customer['review_date'],
+            })
+    return suggestions
+
+
+# =============================================================================
+# HOT RELOAD
+# =============================================================================
+# Above this share of changed rows, building a fresh store is cheaper than patching a copy
+RELOAD_FULL_REBUILD_FRACTION = float(os.getenv('DATA_RELOAD_FULL_REBUILD_FRACTION', 0.3))
+
+
+def reload_customer_data(path: str) -> dict:
+    """Apply a new export of the CSV: patch only added, changed and removed orders.
+
+    The live store is never modified - the delta is applied to a copy (or a
+    fresh store when most rows changed) and the globals are rebound once it
+    is complete, so readers always see a whole version, old or new. A SQLite
+    store is updated in place instead, in a single transaction.
+    """
+    global customer_reviews_db, similar_cases_index, customer_index, order_index, customer_row_hashes
+    global csv_source, csv_fingerprint
+    import pandas as pd
+    
+    fingerprint = file_fingerprint(path)
+    df = read_customer_frame(path)
+    hashes = row_fingerprints(df)
+    current = customer_reviews_db
+    
+    fresh = None
+    if customer_row_hashes is None:
+        # Opened without row hashes (snapshot or database written without them): compare the records once
+        fresh = frame_to_customer_db(df)
+        old_orders = pd.Index(list(current))
+        added = hashes.index.difference(old_orders)
+        removed = old_orders.difference(hashes.index)
+        common = hashes.index.intersection(old_orders)
+        changed = pd.Index([order for order in common if fresh[order] != current[order]])
+    else:
+        old_hashes = pd.Series(customer_row_hashes, index=list(current))
+        added = hashes.index.difference(old_hashes.index)
+        removed = old_hashes.index.difference(hashes.index)
+        common = hashes.index.intersection(old_hashes.index)
+        changed = common[hashes[common].to_numpy() != old_hashes[common].to_numpy()]
+    delta = {'added': len(added), 'changed': len(changed), 'removed': len(removed), 'rows': len(hashes)}
     
-    return customer_db, loaded_path
+    rebuild = len(added) + len(changed) + len(removed) > RELOAD_FULL_REBUILD_FRACTION * max(len(current), 1)
+    delta['mode'] = 'rebuild' if rebuild else 'patch'
+    if rebuild:
+        store = fresh if fresh is not None else frame_to_customer_db(df)
+    else:
+        upserts = added.append(changed)
+        orders = df['order_number'].astype(str).str.upper()
+        patch = frame_to_customer_db(df[orders.isin(upserts)]) if len(upserts) else CustomerStore()
+    
+    if isinstance(current, SQLiteCustomerStore):
+        if rebuild:
+            current.replace_all(store, hashes.reindex(list(store)).to_numpy(np.uint64).tolist(), source=fingerprint)
+        else:
+            patch_orders = list(patch)
+            patch_hashes = dict(zip(patch_orders, hashes.reindex(patch_orders).to_numpy(np.uint64).tolist()))
+            current.apply(patch.values(), removed, patch_hashes, source=fingerprint)
+        store = current
+    elif not rebuild:
+        store = current.copy()
+        for order in removed:
+            store.pop(order, None)
+        for order, record in patch.items():
+            store[order] = record
+    
+    # Search results and listings come from the indexes, so they are rebuilt before the swap whenever
+    # rows changed (a SQLite store is already updated; results for removed orders are skipped until then)
+    index, listing, orders = similar_cases_index, customer_index, order_index
+    if delta['added'] or delta['changed'] or delta['removed']:
+        index = build_similar_cases_index(store, path, fingerprint['sha256'])
+        listing = build_customer_index(store)
+    if delta['added'] or delta['removed']:
+        orders = build_order_index(store)
+    
+    row_hashes = hashes.reindex(list(store)).to_numpy(np.uint64)
+    similar_cases_index, customer_index, order_index = index, listing, orders
+    customer_reviews_db = store
+    customer_row_hashes = row_hashes
+    csv_source, csv_fingerprint = path, fingerprint
+    
+    # So the next cold start maps this version instead of re-parsing the CSV
+    if CUSTOMER_SNAPSHOT_ENABLED and not isinstance(store, SQLiteCustomerStore):
+        save_customer_snapshot(store, path, fingerprint, row_hashes)
+    return delta
+
+
+# =============================================================================
+# STARTUP & WARM-UP
+# =============================================================================
+# eager: load everything at import (default)
+# background: import returns at once; a warm-up thread loads the data and client
+# lazy: nothing is loaded until a request needs it
+STARTUP_MODE = os.getenv('STARTUP_MODE', 'eager').lower()
+
+# Set by ensure_data(); None until the dataset is loaded
+customer_reviews_db = None
+similar_cases_index = None
+customer_index = None
+order_index = None
+customer_row_hashes = None
+csv_source = None
+csv_fingerprint = None
+data_reloader = None
+
+_data_lock = threading.Lock()
+_data_ready = threading.Event()
+startup_status = {'mode': STARTUP_MODE, 'data': 'not_loaded', 'data_ms': None,
+                  'client': 'not_loaded', 'client_ms': None, 'error': None}
+
+
+def data_ready() -> bool:
+    return _data_ready.is_set()
+
+
+def ensure_data():
+    """Load the dataset and its indexes once; later calls return immediately"""
+    global customer_reviews_db, similar_cases_index, customer_index, order_index, customer_row_hashes
+    global csv_source, csv_fingerprint, data_reloader
+    if _data_ready.is_set():
+        return
+    with _data_lock:
+        if _data_ready.is_set():
+            return
+        startup_status['data'] = 'loading'
+        start = time.perf_counter()
+        try:
+            store, path, row_hashes, fingerprint = open_customer_data(with_row_hashes=DATA_RELOAD_SECONDS > 0)
+            index = build_similar_cases_index(store, path, fingerprint['sha256'] if fingerprint else None)
+            listing = build_customer_index(store)
+            orders = build_order_index(store)
+        except Exception as e:
+            startup_status.update(data='failed', error=str(e))
+            raise
+        customer_reviews_db, similar_cases_index, customer_index, order_index = store, index, listing, orders
+        customer_row_hashes = row_hashes
+        csv_source, csv_fingerprint = path, fingerprint
+        data_reloader = DatasetReloader(
+            reload_customer_data,
+            path=csv_source,
+            drop_dir=os.getenv('DATA_DROP_DIR'),
+            interval=DATA_RELOAD_SECONDS,
+        )
+        data_reloader.start()
+        startup_status.update(data='ready', data_ms=round((time.perf_counter() - start) * 1000, 1))
+        _data_ready.set()
+
+
+def ensure_client():
+    """Import the Anthropic SDK and create the agent loop's client ahead of the first chat"""
+    if startup_status['client'] == 'ready':
+        return
+    start = time.perf_counter()
+    
+    async def create():
+        get_async_client()
+    
+    asyncio.run_coroutine_threadsafe(create(), get_agent_loop()).result()
+    startup_status.update(client='ready', client_ms=round((time.perf_counter() - start) * 1000, 1))
+
+
+def warm_up():
+    try:
+        ensure_data()
+        ensure_client()
+    except Exception as e:
+        print(f"❌ Warm-up failed: {e}")
+
 
-# Load customer data on startup
-customer_reviews_db, csv_source = load_customer_data()
+if STARTUP_MODE == 'eager':
+    warm_up()
+elif STARTUP_MODE == 'background':
+    threading.Thread(target=warm_up, name='warm-up', daemon=True).start()
+
+
+@app.before_request
+def _load_data_on_first_use():
+    # Health checks report readiness instead of waiting for it
+    if request.path != '/api/health':
+        ensure_data()
 
 
 # =============================================================================
@@ -88,7 +616,7 @@ customer_reviews_db, csv_source = load_customer_data()
 AGENT_TOOLS = [
     {
         "name": "lookup_order",
-        "description": "Look up customer information by order number. Use this when a customer provides their order number (format: DM followed by 8 digits, e.g., DM24382608).",
+        "description": "Look up customer information by order number. Use this when a customer provides their order number (format: DM followed by 8 digits, e.g., DM24382608). If the order is not found, the result suggests the closest valid order numbers with their products.",
         "input_schema": {
             "type": "object",
             "properties": {
@@ -202,6 +730,28 @@ AGENT_TOOLS = [
             },
             "required": ["customer_name"]
         }
+    },
+    {
+        "name": "find_similar_cases",
+        "description": "Search past customer reviews for cases similar to the current issue and see how they were resolved. Use this for unusual problems or when unsure which resolution fits.",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "query": {
+                    "type": "string",
+                    "description": "Description of the customer's problem"
+                },
+                "order_number": {
+                    "type": "string",
+                    "description": "The current customer's order number, excluded from the results"
+                },
+                "k": {
+                    "type": "integer",
+                    "description": "Number of cases to return (default 5, max 20)"
+                }
+            },
+            "required": ["query"]
+        }
     }
 ]
 
@@ -209,22 +759,42 @@ AGENT_TOOLS = [
 # =============================================================================
 # TOOL EXECUTION FUNCTIONS
 # =============================================================================
+# Completed actions by type (refund_processed, escalated, ...) for the KPI dashboard
+action_counts = Counter()
+action_counts_lock = threading.Lock()
+
+
 def execute_tool(tool_name: str, tool_input: dict) -> dict:
     """Execute an agent tool and return the result"""
+    ensure_data()
+    result = _run_tool(tool_name, tool_input)
+    if result.get('success') and result.get('action'):
+        with action_counts_lock:
+            action_counts[result['action']] += 1
+    return result
+
+
+def _run_tool(tool_name: str, tool_input: dict) -> dict:
+    """Dispatch a tool call to its (mock) backend"""
     
     if tool_name == "lookup_order":
         order_number = tool_input.get("order_number", "").upper()
-        if order_number in customer_reviews_db:
-            customer = customer_reviews_db[order_number]
+        customer = customer_reviews_db.get(order_number)
+        if customer is not None:
             return {
                 "success": True,
                 "customer": customer,
                 "message": f"Found customer {customer['customer_name']} with order {order_number}"
             }
+        suggestions = order_suggestions(order_number)
+        message = f"Order {order_number} not found in system"
+        if suggestions:
+            message += (". Closest valid order numbers are listed in suggestions - likely a typo; "
+                        "confirm with the customer (e.g. by product) before using one")
         return {
             "success": False,
-            "message": f"Order {order_number} not found in system",
-            "available_sample": list(customer_reviews_db.keys())[:5]
+            "message": message,
+            "suggestions": suggestions
         }
     
     elif tool_name == "process_refund":
@@ -307,6 +877,21 @@ def execute_tool(tool_name: str, tool_input: dict) -> dict:
             "message": f"Appointment request received for {customer_name} at {store}"
         }
     
+    elif tool_name == "find_similar_cases":
+        query = tool_input.get("query", "")
+        try:
+            k = int(tool_input.get("k") or 5)
+        except (TypeError, ValueError):
+            # The model sometimes sends "five" or "5 cases"; fall back like ?k= does on /api/similar
+            k = 5
+        k = max(1, min(k, 20))
+        cases = find_similar_cases(query, k, tool_input.get("order_number", "").upper() or None)
+        return {
+            "success": True,
+            "cases": cases,
+            "message": f"Found {len(cases)} similar past cases"
+        }
+    
     return {"success": False, "message": f"Unknown tool: {tool_name}"}
 
 
@@ -328,6 +913,7 @@ YOUR CAPABILITIES (use tools when appropriate):
 4. **create_exchange** - Handle size exchanges
 5. **escalate_to_human** - Escalate complex issues to human agents
 6. **book_appointment** - Book in-store fitting appointments
+7. **find_similar_cases** - Find similar past cases and how they were resolved
 
 WORKFLOW:
 1. If customer provides an order number, ALWAYS use lookup_order first
@@ -353,16 +939,101 @@ IMPORTANT:
 Remember: You represent Dr. Martens' commitment to quality and customer satisfaction. Every interaction is an opportunity to turn a frustrated customer into a loyal fan."""
 
 
-def run_agent(user_message: str, conversation_history: list = None, current_customer: dict = None) -> dict:
-    """Run the Claude agent with tools"""
-    
-    if conversation_history is None:
-        conversation_history = []
-    
-    # Build context about current customer if available
-    context = ""
-    if current_customer:
-        context = f"""
+AGENT_MODEL = "claude-sonnet-4-20250514"
+
+# Mark the static prefix (tools + SYSTEM_PROMPT) and the growing conversation
+# for prompt caching, so repeat requests only pay for the new suffix
+PROMPT_CACHE_ENABLED = os.getenv('PROMPT_CACHE_ENABLED', 'true').lower() != 'false'
+CACHE_CONTROL = {"type": "ephemeral"}
+
+
+def build_system_blocks(context: str) -> list:
+    """System prompt as content blocks: identical cacheable prefix, then per-customer context"""
+    static = {"type": "text", "text": SYSTEM_PROMPT}
+    if PROMPT_CACHE_ENABLED:
+        static["cache_control"] = CACHE_CONTROL
+    blocks = [static]
+    if context:
+        blocks.append({"type": "text", "text": context})
+    return blocks
+
+
+def with_cache_breakpoint(messages: list) -> list:
+    """Copy of messages with the last block marked, so the next iteration
+    (or turn) reads everything up to here from the cache. The stored
+    history itself is left unmarked."""
+    if not PROMPT_CACHE_ENABLED or not messages:
+        return messages
+    last = messages[-1]
+    content = last["content"]
+    if isinstance(content, str):
+        blocks = [{"type": "text", "text": content}]
+    else:
+        blocks = list(content)
+    if not blocks:
+        return messages
+    blocks[-1] = {**blocks[-1], "cache_control": CACHE_CONTROL}
+    return messages[:-1] + [{**last, "content": blocks}]
+
+
+# Token budget for the messages sent on each call (tools + system prompt come
+# on top and are cached); past it, older turns are compacted
+CONTEXT_TOKEN_BUDGET = int(os.getenv('CONTEXT_TOKEN_BUDGET', 6000))
+CONTEXT_KEEP_TURNS = int(os.getenv('CONTEXT_KEEP_TURNS', 2))
+
+
+def usage_to_dict(usage) -> dict:
+    """Token counts from response.usage, including prompt-cache reads/writes"""
+    return {
+        "input_tokens": usage.input_tokens,
+        "output_tokens": usage.output_tokens,
+        "cache_read_input_tokens": getattr(usage, "cache_read_input_tokens", None) or 0,
+        "cache_creation_input_tokens": getattr(usage, "cache_creation_input_tokens", None) or 0,
+    }
+
+
+# Opt-in cache of first-turn answers; the version changes whenever the prompt,
+# tools or model do, so stale answers are never served after a deploy
+PROMPT_VERSION = fingerprint(AGENT_MODEL, SYSTEM_PROMPT, AGENT_TOOLS)
+
+# Estimated size of what every call resends before the conversation
+STATIC_PREFIX_TOKENS = estimate_tokens(SYSTEM_PROMPT) + estimate_tokens(AGENT_TOOLS)
+
+# Token usage and cost of every turn, rolled up for /api/kpis and /api/metrics
+usage_ledger = UsageLedger()
+
+
+def record_usage(usage: dict, customer: dict, tool_results: list):
+    """Add a finished turn's usage to the rollups, attributed to the customer's category and priority"""
+    if customer is None:
+        # No context customer: use the first order the agent looked up
+        customer = next((r["result"]["customer"] for r in tool_results
+                         if r["tool"] == "lookup_order" and r["result"].get("success")), None)
+    issue_category = (customer or {}).get("issue_category") or "unknown"
+    priority_level = (customer or {}).get("priority_level") or "unknown"
+    tools = [r["tool"] for r in tool_results]
+    usage_ledger.record(usage, issue_category, priority_level, tools)
+    for kind in ("input_tokens", "output_tokens", "cache_creation_input_tokens", "cache_read_input_tokens"):
+        if usage[kind]:
+            llm_tokens.inc(usage[kind], type=kind, issue_category=issue_category, priority_level=priority_level)
+    if usage["cost_usd"]:
+        llm_cost.inc(usage["cost_usd"], issue_category=issue_category, priority_level=priority_level)
+        for tool in set(tools):
+            tool_turn_cost.inc(usage["cost_usd"], tool=tool)
+
+
+response_cache = ResponseCache(
+    enabled=os.getenv('RESPONSE_CACHE_ENABLED', 'false').lower() == 'true',
+    max_entries=int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', 5000)),
+    ttl_seconds=float(os.getenv('RESPONSE_CACHE_TTL_SECONDS', 3600)),
+)
+
+
+def build_customer_context(current_customer: dict = None) -> str:
+    """Per-customer block appended to the system prompt"""
+    if not current_customer:
+        return ""
+    return f"""
 CURRENT CUSTOMER CONTEXT:
 - Name: {current_customer.get('customer_name')}
 - Order: {current_customer.get('order_number')}
@@ -377,6 +1048,118 @@ CURRENT CUSTOMER CONTEXT:
 
 Use this context to provide personalized support.
 """
+
+
+AGENT_ERROR_RESPONSE = "I apologize, but I'm experiencing technical difficulties. Please try again or contact our support team directly."
+
+
+# Tools run on a bounded pool, each with its own timeout (TOOL_TIMEOUT_<TOOL_NAME>)
+TOOL_MAX_WORKERS = int(os.getenv('TOOL_MAX_WORKERS', 16))
+DEFAULT_TOOL_TIMEOUT = float(os.getenv('TOOL_TIMEOUT_SECONDS', 10))
+TOOL_TIMEOUTS = {
+    tool['name']: float(os.getenv(f"TOOL_TIMEOUT_{tool['name'].upper()}", DEFAULT_TOOL_TIMEOUT))
+    for tool in AGENT_TOOLS
+}
+tool_executor = ThreadPoolExecutor(max_workers=TOOL_MAX_WORKERS, thread_name_prefix='agent-tool')
+
+
+async def execute_tool_async(tool_name: str, tool_input: dict) -> dict:
+    """execute_tool on the tool pool, so slow tool backends don't block the event loop.
+
+    A tool that exceeds its timeout yields an error result; its thread is
+    left to finish in the background.
+    """
+    timeout = TOOL_TIMEOUTS.get(tool_name, DEFAULT_TOOL_TIMEOUT)
+    loop = asyncio.get_running_loop()
+    try:
+        return await asyncio.wait_for(
+            loop.run_in_executor(tool_executor, execute_tool, tool_name, tool_input), timeout
+        )
+    except asyncio.TimeoutError:
+        return {"success": False, "error": "timeout", "message": f"{tool_name} timed out after {timeout:g}s"}
+
+
+async def _timed_tool(tool_use, trace: Trace) -> tuple:
+    start = time.perf_counter()
+    result = await execute_tool_async(tool_use.name, tool_use.input)
+    seconds = time.perf_counter() - start
+    if result.get("error") == "timeout":
+        outcome = "timeout"
+        errors.inc(phase="tool_timeout")
+    else:
+        outcome = "success" if result.get("success") else "failure"
+    tool_calls.inc(tool=tool_use.name, outcome=outcome)
+    tool_seconds.observe(seconds, tool=tool_use.name)
+    trace.record("tool", seconds, start=start, tool=tool_use.name, tool_use_id=tool_use.id, outcome=outcome)
+    return tool_use, result, seconds * 1000
+
+
+# Clear-cut turns (greetings, confirmed actions for a known order) skip the LLM
+fast_path = FastPathRouter(
+    execute_tool_async,
+    threshold=float(os.getenv('FAST_PATH_THRESHOLD', 0.8)),
+    enabled=os.getenv('FAST_PATH_ENABLED', 'true').lower() == 'true',
+)
+
+
+async def agent_events(user_message: str, conversation_history: list = None, current_customer: dict = None,
+                       trace: Trace = None):
+    """Run the Claude agent with tools, yielding events as they happen.
+
+    Yields dicts with a 'type' of:
+    - text_delta: a chunk of Claude's text as it is generated
+    - tool_started / tool_finished: around each execute_tool call; all
+      tool_use blocks of one response run concurrently and finish in any order
+    - error: the agent loop failed (a fallback response follows in 'done')
+    - done: the final response, tool results, per-iteration timings (with
+      token usage, prompt-cache reads/writes and the estimated message
+      tokens before/after compaction), the turn's summed 'usage' and
+      updated message list; 'failed' is True when the fallback response
+      was used, 'cached' is True when it came from the response cache, 'fast_path'
+      names the intent when the local router answered without Claude
+    """
+    
+    if conversation_history is None:
+        conversation_history = []
+    trace = trace or start_trace()
+    
+    # High-confidence turns are answered from templates and direct tool calls
+    with trace.span("fast_path"):
+        local_events = await fast_path.route(user_message, current_customer, conversation_history)
+    if local_events is not None:
+        agent_turns.inc(path="fast_path")
+        for event in local_events:
+            if event["type"] == "done":
+                event = {**event, "usage": turn_usage([], AGENT_MODEL), "failed": False}
+                record_usage(event["usage"], current_customer, event["tool_results"])
+            yield event
+        return
+    
+    # Opening messages may be answered from the response cache
+    cache_key = None
+    if response_cache.enabled and not conversation_history:
+        cache_key = response_cache.key(current_customer, user_message, PROMPT_VERSION)
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            agent_turns.inc(path="cached")
+            usage = turn_usage([], AGENT_MODEL)
+            record_usage(usage, current_customer, cached["tool_results"])
+            yield {"type": "text_delta", "iteration": 0, "text": cached["response"]}
+            yield {
+                "type": "done",
+                "response": cached["response"],
+                "tool_results": cached["tool_results"],
+                "timings": [],
+                "usage": usage,
+                "failed": False,
+                "cached": True,
+                "fast_path": None,
+                "conversation_history": [{"role": "user", "content": user_message}] + cached["messages"]
+            }
+            return
+    
+    # Static prompt first (cacheable), then context about the current customer
+    system = build_system_blocks(build_customer_context(current_customer))
     
     # Add user message to history
     messages = conversation_history.copy()
@@ -384,19 +1167,49 @@ Use this context to provide personalized support.
     
     # Track tool uses and results
     tool_results = []
+    timings = []
     final_response = ""
+    failed = False
     
     # Agent loop - keep running until we get a final response
+    turn_start = time.perf_counter()
+    sample = sampled(LOG_SAMPLE_RATE)
     max_iterations = 5
     for i in range(max_iterations):
         try:
-            response = client.messages.create(
-                model="claude-sonnet-4-20250514",
+            with trace.span("compaction", iteration=i):
+                request_messages, context = compact_messages(messages, CONTEXT_TOKEN_BUDGET, CONTEXT_KEEP_TURNS)
+            if request_messages is not messages:
+                log_event(agent_log, logging.INFO, "context_compacted", sample, trace_id=trace.trace_id,
+                          iteration=i, **context)
+            llm_start = time.perf_counter()
+            first_token_ms = None
+            async with get_async_client().messages.stream(
+                model=AGENT_MODEL,
                 max_tokens=1024,
-                system=SYSTEM_PROMPT + context,
+                system=system,
                 tools=AGENT_TOOLS,
-                messages=messages
-            )
+                messages=with_cache_breakpoint(request_messages)
+            ) as stream:
+                async for event in stream:
+                    if first_token_ms is None and event.type != "message_start":
+                        first_token_ms = (time.perf_counter() - llm_start) * 1000
+                    if event.type == "text":
+                        yield {"type": "text_delta", "iteration": i, "text": event.text}
+                response = await stream.get_final_message()
+            llm_seconds = time.perf_counter() - llm_start
+            trace.record("llm", llm_seconds, start=llm_start, iteration=i, stop_reason=response.stop_reason)
+            if first_token_ms is not None:
+                trace.record("llm_first_token", first_token_ms / 1000, start=llm_start, iteration=i)
+            llm_stop_reasons.inc(stop_reason=response.stop_reason)
+            timing = {
+                "iteration": i,
+                "llm_ms": round(llm_seconds * 1000, 1),
+                "ttft_ms": round(first_token_ms, 1) if first_token_ms is not None else None,
+                "usage": usage_to_dict(response.usage),
+                "context": context,
+            }
+            timings.append(timing)
             
             # Check if Claude wants to use tools
             if response.stop_reason == "tool_use":
@@ -405,30 +1218,63 @@ Use this context to provide personalized support.
                 tool_results_for_message = []
                 
                 for tool_use in tool_use_blocks:
-                    tool_name = tool_use.name
-                    tool_input = tool_use.input
-                    
-                    print(f"🔧 Agent using tool: {tool_name}")
-                    print(f"   Input: {json.dumps(tool_input, indent=2)}")
-                    
-                    # Execute the tool
-                    result = execute_tool(tool_name, tool_input)
+                    log_event(agent_log, logging.DEBUG, "tool_started", sample, trace_id=trace.trace_id,
+                              iteration=i, tool=tool_use.name, tool_use_id=tool_use.id, input=tool_use.input)
+                    yield {"type": "tool_started", "iteration": i, "tool_use_id": tool_use.id,
+                           "tool": tool_use.name, "input": tool_use.input}
+                
+                # Execute the tools concurrently, reporting each as it finishes
+                tools_start = time.perf_counter()
+                tasks = [asyncio.ensure_future(_timed_tool(tool_use, trace)) for tool_use in tool_use_blocks]
+                finished = {}
+                try:
+                    for next_done in asyncio.as_completed(tasks):
+                        tool_use, result, duration_ms = await next_done
+                        # Serialized once: the same string goes to Claude and to the log
+                        projected = project_tool_result(tool_use.name, result)
+                        content = json.dumps(projected)
+                        finished[tool_use.id] = (result, duration_ms, content, projected is result)
+                        log_event(agent_log, logging.INFO, "tool_finished", sample, trace_id=trace.trace_id,
+                                  iteration=i, tool=tool_use.name, tool_use_id=tool_use.id, ms=round(duration_ms, 1),
+                                  success=result.get("success"))
+                        log_event(agent_log, logging.DEBUG, "tool_result", sample, trace_id=trace.trace_id,
+                                  tool_use_id=tool_use.id, result=RawJSON(content))
+                        yield {"type": "tool_finished", "iteration": i, "tool_use_id": tool_use.id,
+                               "tool": tool_use.name, "result": result, "duration_ms": round(duration_ms, 1)}
+                finally:
+                    for task in tasks:
+                        task.cancel()
+                
+                # Reassemble in the order Claude asked for them; Claude gets a compact
+                # projection of each result, the client the full one
+                result_tokens = {"full": 0, "sent": 0}
+                for tool_use in tool_use_blocks:
+                    result, duration_ms, content, unchanged = finished[tool_use.id]
+                    result_tokens["sent"] += estimate_tokens(content)
+                    # Only a result that was projected (e.g. lookup_order) needs serializing again to size it
+                    result_tokens["full"] += estimate_tokens(content if unchanged else json.dumps(result))
                     tool_results.append({
-                        "tool": tool_name,
-                        "input": tool_input,
+                        "tool": tool_use.name,
+                        "input": tool_use.input,
                         "result": result
                     })
-                    
                     tool_results_for_message.append({
                         "type": "tool_result",
                         "tool_use_id": tool_use.id,
-                        "content": json.dumps(result)
+                        "content": content,
+                        **({"is_error": True} if result.get("error") == "timeout" else {})
                     })
-                    
-                    print(f"   Result: {json.dumps(result, indent=2)}")
+                tools_seconds = time.perf_counter() - tools_start
+                trace.record("tools", tools_seconds, start=tools_start, iteration=i)
+                timing["tools_ms"] = round(tools_seconds * 1000, 1)
+                timing["tools_sequential_ms"] = round(sum(entry[1] for entry in finished.values()), 1)
+                timing["tool_result_tokens"] = result_tokens
+                timing["tools"] = [
+                    {"tool": tool_use.name, "ms": round(finished[tool_use.id][1], 1)} for tool_use in tool_use_blocks
+                ]
                 
                 # Add assistant's response and tool results to messages
-                messages.append({"role": "assistant", "content": response.content})
+                messages.append({"role": "assistant", "content": content_to_dicts(response.content)})
                 messages.append({"role": "user", "content": tool_results_for_message})
                 
             else:
@@ -437,44 +1283,141 @@ Use this context to provide personalized support.
                     if hasattr(block, 'text'):
                         final_response = block.text
                         break
+                messages.append({"role": "assistant", "content": content_to_dicts(response.content)})
                 break
                 
         except Exception as e:
-            print(f"❌ Error in agent loop: {e}")
-            final_response = "I apologize, but I'm experiencing technical difficulties. Please try again or contact our support team directly."
+            errors.inc(phase="agent_loop")
+            log_event(agent_log, logging.ERROR, "agent_loop_failed", trace_id=trace.trace_id, iteration=i,
+                      error=str(e), exc_info=e)
+            final_response = AGENT_ERROR_RESPONSE
+            failed = True
+            yield {"type": "error", "iteration": i, "message": final_response}
             break
     
-    return {
+    if cache_key is not None and final_response and not failed:
+        response_cache.store(cache_key, final_response, tool_results, messages[1:], llm_calls=len(timings))
+    turn_ms = (time.perf_counter() - turn_start) * 1000
+    fast_path.record_llm_turn(turn_ms)
+    agent_turns.inc(path="llm")
+    trace.record("agent", turn_ms / 1000, start=turn_start)
+    usage = turn_usage([t["usage"] for t in timings], AGENT_MODEL, STATIC_PREFIX_TOKENS)
+    record_usage(usage, current_customer, tool_results)
+    log_event(agent_log, logging.INFO, "agent_turn", sample, trace_id=trace.trace_id, ms=round(turn_ms, 1),
+              spans=trace.totals(), tools=[result["tool"] for result in tool_results], failed=failed, **usage)
+    
+    yield {
+        "type": "done",
         "response": final_response,
         "tool_results": tool_results,
+        "timings": timings,
+        "usage": usage,
+        "failed": failed,
+        "cached": False,
+        "fast_path": None,
         "conversation_history": messages
     }
 
 
+async def run_agent_async(user_message: str, conversation_history: list = None, current_customer: dict = None,
+                          trace: Trace = None) -> dict:
+    """Run the Claude agent with tools and return the final result"""
+    async for event in agent_events(user_message, conversation_history, current_customer, trace):
+        if event["type"] == "done":
+            return {
+                "response": event["response"],
+                "tool_results": event["tool_results"],
+                "timings": event["timings"],
+                "usage": event["usage"],
+                "failed": event["failed"],
+                "cached": event["cached"],
+                "fast_path": event["fast_path"],
+                "conversation_history": event["conversation_history"]
+            }
+
+
+def run_agent(user_message: str, conversation_history: list = None, current_customer: dict = None,
+              trace: Trace = None) -> dict:
+    """Blocking wrapper around run_agent_async for sync callers"""
+    future = asyncio.run_coroutine_threadsafe(
+        run_agent_async(user_message, conversation_history, current_customer, trace),
+        get_agent_loop()
+    )
+    return future.result()
+
+
+def iter_agent_events(user_message: str, conversation_history: list = None, current_customer: dict = None,
+                      trace: Trace = None):
+    """Blocking iterator over agent_events for sync callers (e.g. Flask SSE)"""
+    events = queue.Queue()
+    
+    async def pump():
+        try:
+            async for event in agent_events(user_message, conversation_history, current_customer, trace):
+                events.put(event)
+        finally:
+            events.put(None)
+    
+    future = asyncio.run_coroutine_threadsafe(pump(), get_agent_loop())
+    try:
+        while (event := events.get()) is not None:
+            yield event
+        future.result()
+    finally:
+        # Stops the agent if the consumer goes away (e.g. client disconnected)
+        future.cancel()
+
+
 # =============================================================================
 # API ROUTES
 # =============================================================================
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
-    """Health check endpoint"""
+    """Health check endpoint (never waits for startup - 'ready' says whether data is loaded)"""
     api_key_set = bool(os.getenv('ANTHROPIC_API_KEY'))
+    ready = data_ready()
     return jsonify({
         'status': 'healthy',
+        'ready': ready,
+        'startup': startup_status,
         'service': 'Dr. Martens AI Support API (Claude Powered)',
         'anthropic_api': 'configured' if api_key_set else 'NOT CONFIGURED - Set ANTHROPIC_API_KEY',
-        'data_source': csv_source or 'sample_data',
-        'customers_loaded': len(customer_reviews_db)
+        'data_source': (csv_source or 'sample_data') if ready else None,
+        'customers_loaded': len(customer_reviews_db) if ready else 0,
+        'similar_cases_indexed': len(similar_cases_index) if ready else 0,
+        'data_reload': data_reloader.stats() if ready else None,
+        'sessions': session_store.stats(),
+        'response_cache': response_cache.stats(),
+        'fast_path': fast_path.stats()
     })
 
 
+@app.route('/api/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Latency summaries (p50/p95/p99 per span and tool) and counters, in Prometheus text format"""
+    return Response(metrics.render(), mimetype=None, content_type=metrics.CONTENT_TYPE)
+
+
 @app.route('/api/customers', methods=['GET'])
 def list_customers():
-    """List all customer order numbers"""
+    """Order numbers matching the filters, one page at a time.
+
+    Filters: any of FILTER_FIELDS (repeat a parameter to match several
+    values), plus ?q= for name/product word prefixes. Pass the returned
+    next_cursor as ?cursor= for the following page.
+    """
+    limit = request.args.get('limit', CUSTOMERS_PAGE_SIZE, type=int)
+    if limit < 1:
+        return jsonify({'error': 'limit must be a positive integer'}), 400
+    filters = {field: request.args.getlist(field) for field in FILTER_FIELDS if field in request.args}
+    index = customer_index
+    page = index.search(filters, query=request.args.get('q'), cursor=request.args.get('cursor'),
+                        limit=min(limit, CUSTOMERS_MAX_PAGE_SIZE))
     return jsonify({
         'success': True,
-        'count': len(customer_reviews_db),
-        'order_numbers': list(customer_reviews_db.keys())
+        'total': len(index),
+        **page
     })
 
 
@@ -482,61 +1425,155 @@ def list_customers():
 def get_customer(order_number):
     """Lookup customer by order number"""
     order_number = order_number.upper()
+    customer = customer_reviews_db.get(order_number)
     
-    if order_number in customer_reviews_db:
+    if customer is not None:
         return jsonify({
             'success': True,
-            'customer': customer_reviews_db[order_number]
+            'customer': customer
         })
     
     return jsonify({
         'success': False,
         'error': 'Order not found',
-        'message': f'No customer found with order number {order_number}'
+        'message': f'No customer found with order number {order_number}',
+        'suggestions': [suggestion['order_number'] for suggestion in order_suggestions(order_number)]
     }), 404
 
 
-@app.route('/api/chat', methods=['POST'])
-def chat():
-    """Main chat endpoint - Claude-powered agentic AI"""
-    data = request.json
+@app.route('/api/similar', methods=['GET'])
+def similar_cases():
+    """Past cases most similar to ?q=..., with their suggested resolutions"""
+    query = request.args.get('q', '')
+    if not query:
+        return jsonify({'error': 'No query provided'}), 400
+    k = max(1, min(request.args.get('k', 5, type=int), 50))
+    exclude = request.args.get('exclude', '').upper() or None
+    return jsonify({
+        'success': True,
+        'query': query,
+        'cases': find_similar_cases(query, k, exclude)
+    })
+
+
+def prepare_chat(data: dict, trace: Trace = None):
+    """Shared request handling for the chat endpoints (Flask and asgi.py).
+
+    Returns (message, session_id, conversation_history, customer).
+    """
+    trace = trace or start_trace()
     message = data.get('message', '')
     order_number = data.get('order_number')
-    conversation_history = data.get('conversation_history', [])
+    session_id = data.get('session_id')
+    if not isinstance(session_id, str) or not 0 < len(session_id) <= 64:
+        session_id = session_store.new_session_id()
     
-    if not message:
-        return jsonify({'error': 'No message provided'}), 400
+    # Clients may still send the full history; otherwise continue the stored session
+    with trace.span('session_load'):
+        conversation_history = data.get('conversation_history') or session_store.get_history(session_id)
     
     # Extract order number from message if not provided
     if not order_number:
-        import re
-        match = re.search(r'DM\d{7,10}', message, re.IGNORECASE)
-        if match:
-            order_number = match.group().upper()
+        with trace.span('extract_order'):
+            order_number = extract_order_number(message)
     
     # Lookup customer for context
     customer = None
     if order_number:
-        customer = customer_reviews_db.get(order_number.upper())
+        with trace.span('customer_lookup'):
+            customer = customer_reviews_db.get(order_number.upper())
     
-    # Run the Claude agent
-    agent_result = run_agent(
-        user_message=message,
-        conversation_history=conversation_history,
-        current_customer=customer
-    )
+    return message, session_id, conversation_history, customer
+
+
+def build_chat_response(session_id: str, customer: dict, agent_result: dict, trace: Trace = None) -> dict:
+    """Body of the /api/chat response (also the final event of /api/chat/stream)"""
+    trace = trace or start_trace()
+    with trace.span('session_save'):
+        session_store.save_history(session_id, agent_result['conversation_history'])
     
     # Generate suggestions based on context
     suggestions = generate_suggestions(customer)
     
-    return jsonify({
+    return {
         'success': True,
+        'session_id': session_id,
+        'trace_id': trace.trace_id,
         'response': agent_result['response'],
         'customer': customer,
         'tool_results': agent_result['tool_results'],
+        'timings': agent_result['timings'],
+        'failed': agent_result['failed'],
+        'usage': {**agent_result['usage'], 'conversation': session_store.add_usage(session_id, agent_result['usage'])},
+        'cached': agent_result['cached'],
+        'fast_path': agent_result['fast_path'],
         'suggestions': suggestions,
         'requires_escalation': customer.get('escalation_needed', False) if customer else False
-    })
+    }
+
+
+@app.route('/api/chat', methods=['POST'])
+def chat():
+    """Main chat endpoint - Claude-powered agentic AI"""
+    data = request.json
+    if not data.get('message'):
+        return jsonify({'error': 'No message provided'}), 400
+    
+    trace = start_trace(request.headers.get('X-Trace-Id'))
+    with trace.span('chat'):
+        message, session_id, conversation_history, customer = prepare_chat(data, trace)
+        
+        # Run the Claude agent
+        agent_result = run_agent(
+            user_message=message,
+            conversation_history=conversation_history,
+            current_customer=customer,
+            trace=trace
+        )
+        body = build_chat_response(session_id, customer, agent_result, trace)
+    
+    response = jsonify(body)
+    response.headers['X-Trace-Id'] = trace.trace_id
+    return response
+
+
+def format_sse(event: str, payload: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+
+@app.route('/api/chat/stream', methods=['POST'])
+def chat_stream():
+    """Streaming chat endpoint - Server-Sent Events as the agent works.
+
+    Emits text_delta, tool_started, tool_finished and error events, then a
+    final 'done' event carrying the same body /api/chat returns.
+    """
+    data = request.json
+    if not data.get('message'):
+        return jsonify({'error': 'No message provided'}), 400
+    
+    trace = start_trace(request.headers.get('X-Trace-Id'))
+    message, session_id, conversation_history, customer = prepare_chat(data, trace)
+    
+    def generate():
+        with trace.span('chat'):
+            yield format_sse('session', {'session_id': session_id, 'customer': customer,
+                                         'trace_id': trace.trace_id})
+            for event in iter_agent_events(message, conversation_history, customer, trace):
+                if event['type'] == 'done':
+                    yield format_sse('done', build_chat_response(session_id, customer, event, trace))
+                else:
+                    yield format_sse(event['type'], event)
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no',
+                             'X-Trace-Id': trace.trace_id})
+
+
+@app.route('/api/session/<session_id>', methods=['DELETE'])
+def end_session(session_id):
+    """Drop a stored conversation"""
+    return jsonify({'success': session_store.end(session_id)})
 
 
 @app.route('/api/action/<action_type>', methods=['POST'])
@@ -574,19 +1611,21 @@ def execute_action(action_type):
 @app.route('/api/kpis', methods=['GET'])
 def get_kpis():
     """Get dashboard KPIs"""
-    total = len(customer_reviews_db)
+    db = customer_reviews_db  # one version throughout, even if a reload swaps it meanwhile
+    total = len(db)
     
     if total > 0:
-        escalation_count = sum(1 for c in customer_reviews_db.values() if c.get('escalation_needed'))
-        critical_count = sum(1 for c in customer_reviews_db.values() if c.get('priority_level') == 'critical')
-        high_count = sum(1 for c in customer_reviews_db.values() if c.get('priority_level') == 'high')
+        # Maintained incrementally by the store - no scan over the orders
+        escalation_count = sum(
+            count for value, count in db.value_counts('escalation_needed').items() if value
+        )
+        priorities = db.value_counts('priority_level')
+        critical_count = priorities.get('critical', 0)
+        high_count = priorities.get('high', 0)
         auto_resolved = total - escalation_count
-        
-        # Category breakdown
-        categories = {}
-        for customer in customer_reviews_db.values():
-            cat = customer.get('issue_category', 'general')
-            categories[cat] = categories.get(cat, 0) + 1
+        categories = db.value_counts('issue_category')
+        with action_counts_lock:
+            actions = dict(action_counts)
         
         return jsonify({
             'success': True,
@@ -604,7 +1643,9 @@ def get_kpis():
                     'critical': critical_count,
                     'high_priority': high_count
                 },
-                'by_category': categories
+                'by_category': categories,
+                'actions_executed': actions,
+                'token_usage': usage_ledger.rollup()
             }
         })
     
@@ -636,9 +1677,13 @@ if __name__ == '__main__':
     print("🥾 DR. MARTENS AI CUSTOMER SUPPORT API")
     print("   Powered by Anthropic Claude")
     print("="*60)
-    print(f"📊 Loaded {len(customer_reviews_db)} customer records")
-    if csv_source:
-        print(f"📁 Data source: {csv_source}")
+    if data_ready():
+        print(f"📊 Loaded {len(customer_reviews_db)} customer records")
+        if csv_source:
+            print(f"📁 Data source: {csv_source}")
+    else:
+        print(f"⏳ Startup mode '{STARTUP_MODE}': customer data loads "
+              f"{'in the background' if STARTUP_MODE == 'background' else 'on first request'}")
     
     api_key = os.getenv('ANTHROPIC_API_KEY')
     if api_key:
@@ -8,6 +8,7 @@ from flask_cors import CORS
 from datetime import datetime
 import os
 from dotenv import load_dotenv
+from issue_classifier import IssueClassifier
 
 load_dotenv()
 
@@ -100,92 +101,6 @@ customer_reviews_db = {
     }
 }
 
-# =============================================================================
-# ISSUE CLASSIFICATION ENGINE
-# =============================================================================
-class IssueClassifier:
-    """Hybrid classification system - keyword triage + RAG for complex cases"""
-    
-    ISSUE_PATTERNS = {
-        'refund': {
-            'keywords': ['refund', 'money back', 'return', 'returning', 'reimburse'],
-            'action': 'refund',
-            'system': 'shopify_returns',
-            'priority': 'high'
-        },
-        'repair': {
-            'keywords': ['repair', 'broke', 'broken', 'sole', 'damaged', 'defect', 'separated', 'detached', 'ripped', 'torn'],
-            'action': 'repair',
-            'system': 'repair_flow',
-            'priority': 'high'
-        },
-        'sizing': {
-            'keywords': ['size', 'fit', 'tight', 'loose', 'small', 'large', 'uncomfortable', 'exchange'],
-            'action': 'exchange',
-            'system': 'pos_inventory',
-            'priority': 'medium'
-        },
-        'quality': {
-            'keywords': ['quality', 'cheap', 'poor', 'disappointing', 'color', 'faded'],
-            'action': 'escalate',
-            'system': 'zendesk_escalation',
-            'priority': 'high'
-        },
-        'customer_service': {
-            'keywords': ['customer service', 'support', 'no response', 'unhelpful', 'rude', 'manager', 'ignored'],
-            'action': 'escalate',
-            'system': 'zendesk_escalation',
-            'priority': 'critical'
-        },
-        'shipping': {
-            'keywords': ['shipping', 'delivery', 'late', 'delayed', 'lost', 'tracking', 'arrived damaged'],
-            'action': 'investigate',
-            'system': 'shipping_tracker',
-            'priority': 'medium'
-        },
-        'appointment': {
-            'keywords': ['appointment', 'store', 'try on', 'visit', 'fitting'],
-            'action': 'appointment',
-            'system': 'pos_booking',
-            'priority': 'low'
-        }
-    }
-    
-    RESOLUTION_MAP = {
-        'refund': 'Process full refund + 10% discount code for inconvenience',
-        'repair': 'Initiate For Life repair service with prepaid shipping label',
-        'exchange': 'Free size exchange with expedited shipping',
-        'escalate': 'Escalate to senior support specialist for immediate attention',
-        'investigate': 'Open shipping investigation + provide tracking update',
-        'appointment': 'Book in-store fitting appointment with product specialist',
-        'knowledge_base': 'Provide relevant information from knowledge base'
-    }
-    
-    @classmethod
-    def classify(cls, text: str) -> dict:
-        """Classify customer issue from text"""
-        text_lower = text.lower()
-        
-        for issue_type, pattern in cls.ISSUE_PATTERNS.items():
-            if any(keyword in text_lower for keyword in pattern['keywords']):
-                return {
-                    'issue_type': issue_type,
-                    'action': pattern['action'],
-                    'system': pattern['system'],
-                    'priority': pattern['priority'],
-                    'suggested_resolution': cls.RESOLUTION_MAP.get(pattern['action'], 'Provide assistance')
-                }
-        
-        # Default classification for general inquiries
-        return {
-            'issue_type': 'general',
-            'action': 'knowledge_base',
-            'system': 'rag_knowledge',
-            'priority': 'low',
-            'suggested_resolution': cls.RESOLUTION_MAP['knowledge_base']
-        }
-
-
 # =============================================================================
 # AGENT ACTIONS (Mock implementations - connect to real systems in production)
 # =============================================================================
@@ -321,6 +236,29 @@ def classify_issue():
     })
 
 
+MAX_BATCH_SIZE = int(os.environ.get('CLASSIFY_MAX_BATCH', 1000))
+
+
+@app.route('/api/classify/batch', methods=['POST'])
+def classify_batch():
+    """Classify many message texts in one request (results in input order)"""
+    data = request.json
+    texts = data.get('texts')
+    
+    if not isinstance(texts, list) or not texts:
+        return jsonify({'error': 'No texts provided'}), 400
+    if len(texts) > MAX_BATCH_SIZE:
+        return jsonify({'error': f'Too many texts (max {MAX_BATCH_SIZE} per request)'}), 400
+    if not all(isinstance(text, str) for text in texts):
+        return jsonify({'error': 'Every text must be a string'}), 400
+    
+    return jsonify({
+        'success': True,
+        'count': len(texts),
+        'classifications': [IssueClassifier.classify(text) for text in texts]
+    })
+
+
 @app.route('/api/chat', methods=['POST'])
 def chat():
     """Main chat endpoint - processes customer messages and returns AI response"""
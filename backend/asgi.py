@@ -0,0 +1,101 @@
+"""
+Dr. Martens AI Customer Support - ASGI entry point
+The chat endpoints run natively on the event loop, so a conversation waiting
+on Claude holds no worker thread; every other route is served by the Flask app.
+
+Run with:
+    uvicorn asgi:application --host 0.0.0.0 --port 5000
+"""
+
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from app import (
+    agent_events, app as flask_app, build_chat_response, data_ready, ensure_data, format_sse,
+    prepare_chat, run_agent_async, start_trace,
+)
+
+
+# =============================================================================
+# ASYNC CHAT ROUTES
+# =============================================================================
+async def wait_for_data():
+    # With STARTUP_MODE=lazy/background the first chats wait here, off the event loop
+    if not data_ready():
+        await run_in_threadpool(ensure_data)
+
+
+async def read_chat_request(request) -> tuple:
+    """(body, None), or (None, a 400 response) for a malformed body or a missing message"""
+    try:
+        data = await request.json()
+    except ValueError:
+        return None, JSONResponse({'error': 'Request body must be valid JSON'}, status_code=400)
+    if not isinstance(data, dict) or not data.get('message'):
+        return None, JSONResponse({'error': 'No message provided'}, status_code=400)
+    return data, None
+
+
+async def chat(request):
+    """Main chat endpoint - same contract as the Flask /api/chat"""
+    data, error = await read_chat_request(request)
+    if error:
+        return error
+
+    trace = start_trace(request.headers.get('X-Trace-Id'))
+    with trace.span('chat'):
+        await wait_for_data()
+        # Session and customer-store reads/writes block (SQLite), so they run off the event loop
+        message, session_id, conversation_history, customer = await run_in_threadpool(prepare_chat, data, trace)
+        agent_result = await run_agent_async(message, conversation_history, customer, trace)
+        body = await run_in_threadpool(build_chat_response, session_id, customer, agent_result, trace)
+    return JSONResponse(body, headers={'X-Trace-Id': trace.trace_id})
+
+
+async def chat_stream(request):
+    """Streaming chat endpoint - same events as the Flask /api/chat/stream"""
+    data, error = await read_chat_request(request)
+    if error:
+        return error
+
+    trace = start_trace(request.headers.get('X-Trace-Id'))
+    await wait_for_data()
+    message, session_id, conversation_history, customer = await run_in_threadpool(prepare_chat, data, trace)
+
+    async def generate():
+        with trace.span('chat'):
+            yield format_sse('session', {'session_id': session_id, 'customer': customer, 'trace_id': trace.trace_id})
+            async for event in agent_events(message, conversation_history, customer, trace):
+                if event['type'] == 'done':
+                    body = await run_in_threadpool(build_chat_response, session_id, customer, event, trace)
+                    yield format_sse('done', body)
+                else:
+                    yield format_sse(event['type'], event)
+
+    return StreamingResponse(generate(), media_type='text/event-stream',
+                             headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no',
+                                      'X-Trace-Id': trace.trace_id})
+
+
+async_app = CORSMiddleware(
+    Starlette(routes=[
+        Route('/api/chat', chat, methods=['POST']),
+        Route('/api/chat/stream', chat_stream, methods=['POST']),
+    ]),
+    allow_origins=['*'], allow_methods=['*'], allow_headers=['*'],
+)
+ASYNC_PATHS = {'/api/chat', '/api/chat/stream'}
+
+wsgi_app = WSGIMiddleware(flask_app)
+
+
+async def application(scope, receive, send):
+    """Route the async chat paths to Starlette and everything else to Flask"""
+    if scope['type'] != 'http' or scope['path'] in ASYNC_PATHS:
+        await async_app(scope, receive, send)
+    else:
+        await wsgi_app(scope, receive, send)
@@ -0,0 +1,67 @@
+"""
+Benchmark: IssueClassifier keyword matching as the keyword lists grow
+Old approach (`keyword in text` for every keyword of every category) vs the
+compiled KeywordMatcher, at growing keyword counts and review lengths.
+
+Usage (from backend/):
+    python benchmarks/bench_classifier.py
+"""
+
+import os
+import random
+import string
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from issue_classifier import IssueClassifier  # noqa: E402
+from keyword_matcher import KeywordMatcher  # noqa: E402
+
+
+def substring_scan(keywords_by_category: dict, text: str):
+    """The original classify loop: first category with any substring hit"""
+    text_lower = text.lower()
+    for category, keywords in keywords_by_category.items():
+        if any(keyword in text_lower for keyword in keywords):
+            return category
+    return None
+
+
+def synthetic_keywords(per_category: int, rng: random.Random) -> dict:
+    keywords = {category: list(pattern['keywords']) for category, pattern in IssueClassifier.ISSUE_PATTERNS.items()}
+    for category in keywords:
+        while len(keywords[category]) < per_category:
+            keywords[category].append(''.join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 10))))
+    return keywords
+
+
+def synthetic_text(words: int, rng: random.Random) -> str:
+    # Filler words only, so the old scan has to try every keyword (its worst case)
+    return ' '.join(''.join(rng.choices('xyz', k=rng.randint(2, 8))) for _ in range(words))
+
+
+def time_per_call(fn, *args, repeats: int = 20) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn(*args)
+    return (time.perf_counter() - start) * 1000 / repeats
+
+
+def main():
+    rng = random.Random(7)
+    print(f"{'keywords':>9} {'words':>6} {'substring (ms)':>15} {'matcher (ms)':>13}")
+    for per_category in (10, 100, 1000):
+        keywords = synthetic_keywords(per_category, rng)
+        matcher = KeywordMatcher(keywords)
+        total = sum(len(k) for k in keywords.values())
+        for words in (50, 500, 5000):
+            text = synthetic_text(words, rng)
+            old_ms = time_per_call(substring_scan, keywords, text)
+            new_ms = time_per_call(matcher.scores, text)
+            print(f"{total:>9} {words:>6} {old_ms:>15.3f} {new_ms:>13.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark: classify_reviews.py throughput and parent memory by worker count
+Labels a tiled copy of the dataset with classify_csv, each run in a fresh
+process so its peak RSS is its own. The parent's peak RSS should stay flat
+as the file grows (only 2 chunks per worker are read ahead); workers add
+throughput only when there are cores to run them on.
+
+Usage (from backend/):
+    python benchmarks/bench_classify_csv.py
+    python benchmarks/bench_classify_csv.py --rows 500000 --workers 1 2 4 8
+"""
+
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def peak_rss_mb() -> float:
+    """This process's own peak RSS.
+
+    ru_maxrss survives exec, so a child started by a large parent reports the
+    parent's peak; VmHWM belongs to the current address space only.
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_child(csv_path: str, workers: int, chunk_size: int):
+    """Label once in this process and print 'rows seconds parent_peak_mb'"""
+    from classify_reviews import classify_csv
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        rows = classify_csv(csv_path, os.path.join(tmp, 'labelled.csv'), workers, chunk_size)
+        seconds = time.perf_counter() - start
+    peak_mb = peak_rss_mb()
+    print(f"{rows} {seconds:.3f} {peak_mb:.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[101_000])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    parser.add_argument('--child', nargs=3, metavar=('CSV', 'WORKERS', 'CHUNK'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child[0], int(args.child[1]), int(args.child[2]))
+        return
+
+    from bench_load_customer_data import make_dataset
+
+    print(f"{os.cpu_count()} CPU(s), chunks of {args.chunk_size} rows")
+    print(f"{'rows':>9} {'workers':>8} {'seconds':>8} {'rows/sec':>9} {'parent peak MB':>15}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            csv_path = os.path.join(tmp, f'reviews_{rows}.csv')
+            make_dataset(rows, csv_path)
+            for workers in args.workers:
+                out = subprocess.run(
+                    [sys.executable, __file__, '--child', csv_path, str(workers), str(args.chunk_size)],
+                    cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+                )
+                labelled, seconds, peak_mb = out.stdout.split()
+                print(f"{int(labelled):>9} {workers:>8} {float(seconds):>8.2f} "
+                      f"{int(labelled) / float(seconds):>9,.0f} {float(peak_mb):>15.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark: cold start of the customer store, CSV parse vs binary snapshot
+Each load runs in a fresh process: parsing the CSV (the path without a
+snapshot), the first start that parses and writes the snapshot, and a
+later start that maps the snapshot. Also times lookups right after start.
+
+Usage (from backend/):
+    python benchmarks/bench_cold_start.py
+    python benchmarks/bench_cold_start.py --sizes 100000
+"""
+
+import argparse
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_load_customer_data import make_dataset  # noqa: E402
+
+MODES = ['csv', 'csv+write', 'snapshot']
+
+
+def run_child(csv_path: str, mode: str):
+    """Load once in this process and print 'load_s lookups_ms peak_rss_mb rows'"""
+    import app
+
+    start = time.perf_counter()
+    store, _, _, _ = app.open_customer_data(csv_path, use_snapshot=mode != 'csv')
+    load_s = time.perf_counter() - start
+
+    orders = random.Random(1).sample(list(store), min(1000, len(store)))
+    start = time.perf_counter()
+    for order in orders:
+        store[order]
+    lookups_ms = (time.perf_counter() - start) * 1000
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{load_s:.3f} {lookups_ms:.1f} {peak_mb:.1f} {len(store)}")
+
+
+def measure(csv_path: str, mode: str) -> list:
+    out = subprocess.run(
+        [sys.executable, __file__, '--child', csv_path, mode],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+        env={**os.environ, 'DATA_RELOAD_SECONDS': '0', 'ANTHROPIC_API_KEY': os.getenv('ANTHROPIC_API_KEY', 'benchmark')},
+    )
+    return out.stdout.strip().splitlines()[-1].split()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--child', nargs=2, metavar=('CSV', 'MODE'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(*args.child)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'rows':>10} {'mode':>10} {'load (s)':>9} {'1k lookups (ms)':>16} {'peak RSS (MB)':>14}")
+        for rows in args.sizes:
+            path = os.path.join(tmp, f'reviews_{rows}.csv')
+            make_dataset(rows, path)
+            # In order: no snapshot involved, first start writes it, next start maps it
+            for mode in MODES:
+                load_s, lookups_ms, peak_mb, loaded = measure(path, mode)
+                assert int(loaded) == rows, f"{mode} loaded {loaded} of {rows} rows"
+                print(f"{rows:>10} {mode:>10} {float(load_s):>9.2f} {float(lookups_ms):>16.1f} {float(peak_mb):>14.1f}")
+            print(f"{'':>10} {'snapshot':>10} {os.path.getsize(path + '.snapshot') / 2**20:>9.1f} MB on disk "
+                  f"(CSV {os.path.getsize(path) / 2**20:.1f} MB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""
+Benchmark: message tokens sent to Claude per turn, as a conversation grows
+Replays scripted multi-turn conversations over the real dataset (each turn:
+lookup_order + find_similar_cases + one action, then a reply - two LLM
+calls) without calling the API, and estimates the message tokens each turn
+sends three ways: full tool results with no budget (the old behaviour),
+compact tool-result projections only, and projections plus the token
+budget. Also times compact_messages itself.
+
+Usage (from backend/):
+    python benchmarks/bench_context_budget.py
+    python benchmarks/bench_context_budget.py --turns 20 --budget 4000 --keep-turns 1
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import app  # noqa: E402
+from context_budget import compact_messages, project_tool_result  # noqa: E402
+
+ACTIONS = [
+    ('initiate_repair', lambda order: {'order_number': order, 'issue_description': 'Strap broke'}),
+    ('create_exchange', lambda order: {'order_number': order, 'new_size': '8', 'reason': 'Too small'}),
+    ('process_refund', lambda order: {'order_number': order, 'reason': 'Quality issue'}),
+    ('escalate_to_human', lambda order: {'order_number': order, 'reason': 'Repeat failure', 'priority': 'high'}),
+]
+REPLY = ("I'm so sorry to hear about this - that's not the experience we want for you. I've looked up your "
+         "order and checked how similar cases were resolved, and I've gone ahead and sorted it out for you. "
+         "You'll get an email with the details and next steps shortly. As an apology, here's SORRY15 for "
+         "15% off your next order. Is there anything else I can help you with today?")
+
+
+def script(turns: int, rng: random.Random) -> list:
+    """[(message, [(tool name, input)])] - one customer message and its tool calls per turn"""
+    orders = list(app.customer_reviews_db.keys())
+    steps = []
+    for turn in range(turns):
+        order = rng.choice(orders)
+        customer = app.customer_reviews_db[order]
+        action, make_input = rng.choice(ACTIONS)
+        calls = [
+            ('lookup_order', {'order_number': order}),
+            ('find_similar_cases', {'query': customer['review_title'] or 'broken', 'k': 5}),
+            (action, make_input(order)),
+        ]
+        steps.append((f"Hi, it's about order {order} - {customer['review_title']}. Can you help?", calls))
+    return steps
+
+
+def replay(steps: list, project: bool, budget: int, keep_turns: int) -> tuple:
+    """(message tokens sent per turn, compact_messages seconds per call)"""
+    messages = []
+    per_turn, compact_seconds = [], []
+
+    def send() -> int:
+        start = time.perf_counter()
+        sent, report = compact_messages(messages, budget, keep_turns)
+        compact_seconds.append(time.perf_counter() - start)
+        return report['tokens_after']
+
+    for turn, (message, calls) in enumerate(steps):
+        messages.append({'role': 'user', 'content': message})
+        tokens = send()
+        uses, results = [], []
+        for i, (tool_name, tool_input) in enumerate(calls):
+            result = app.execute_tool(tool_name, tool_input)
+            sent = project_tool_result(tool_name, result) if project else result
+            uses.append({'type': 'tool_use', 'id': f't{turn}_{i}', 'name': tool_name, 'input': tool_input})
+            results.append({'type': 'tool_result', 'tool_use_id': f't{turn}_{i}', 'content': json.dumps(sent)})
+        messages.append({'role': 'assistant', 'content': [{'type': 'text', 'text': 'Let me check that.'}] + uses})
+        messages.append({'role': 'user', 'content': results})
+        tokens += send()
+        messages.append({'role': 'assistant', 'content': [{'type': 'text', 'text': REPLY}]})
+        per_turn.append(tokens)
+    return per_turn, compact_seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--turns', type=int, default=12)
+    parser.add_argument('--budget', type=int, default=app.CONTEXT_TOKEN_BUDGET)
+    parser.add_argument('--keep-turns', type=int, default=app.CONTEXT_KEEP_TURNS)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    app.ensure_data()
+    steps = script(args.turns, random.Random(args.seed))
+    full, _ = replay(steps, project=False, budget=0, keep_turns=args.keep_turns)
+    projected, _ = replay(steps, project=True, budget=0, keep_turns=args.keep_turns)
+    budgeted, seconds = replay(steps, project=True, budget=args.budget, keep_turns=args.keep_turns)
+
+    print(f"message tokens sent per turn (2 LLM calls each), budget {args.budget}, keep {args.keep_turns} turns")
+    print(f"{'turn':>5} {'full':>8} {'projected':>10} {'budgeted':>9}")
+    for turn, row in enumerate(zip(full, projected, budgeted), 1):
+        print(f"{turn:>5} {row[0]:>8} {row[1]:>10} {row[2]:>9}")
+    print(f"{'total':>5} {sum(full):>8} {sum(projected):>10} {sum(budgeted):>9}"
+          f"  ({1 - sum(budgeted) / sum(full):.0%} fewer)")
+    seconds.sort()
+    print(f"compact_messages: p50 {seconds[len(seconds) // 2] * 1e6:.0f} us, max {seconds[-1] * 1e6:.0f} us")
+
+
+if __name__ == '__main__':
+    main()
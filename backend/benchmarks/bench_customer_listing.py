@@ -0,0 +1,105 @@
+"""
+Benchmark: /api/customers filters, posting-list index vs linear scan
+Index build time and size, then p50 / p99 latency of filtered first pages
+(and a full cursor walk) against scanning every record, at 100k / 1M rows.
+
+Usage (from backend/):
+    python benchmarks/bench_customer_listing.py
+    python benchmarks/bench_customer_listing.py --sizes 100000 --repeat 50
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault('STARTUP_MODE', 'lazy')
+
+import app  # noqa: E402
+from bench_load_customer_data import make_dataset  # noqa: E402
+from customer_index import CustomerIndex  # noqa: E402
+
+QUERIES = [
+    ('critical + escalation', {'priority_level': ['critical'], 'escalation_needed': ['true']}, None),
+    ('repair, 1-2 stars', {'issue_category': ['repair'], 'star_rating': ['1', '2']}, None),
+    ('negative + prefix', {'sentiment': ['negative']}, 'boo'),
+    ('name prefix', {}, 'kim'),
+]
+
+
+def scan(records: list, filters: dict, query: str, limit: int) -> list:
+    """The linear-scan equivalent: every record checked, sorted by order number"""
+    prefixes = query.lower().split() if query else []
+    matches = []
+    for record in records:
+        if not all(str(record[field]).lower() in {v.lower() for v in values} for field, values in filters.items()):
+            continue
+        words = f"{record['customer_name']} {record['product_name']}".lower().split()
+        if all(any(word.startswith(p) for word in words) for p in prefixes):
+            matches.append(record['order_number'])
+    return sorted(matches)[:limit]
+
+
+def percentiles_ms(samples: list) -> tuple:
+    return float(np.percentile(samples, 50)) * 1000, float(np.percentile(samples, 99)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--scan-repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.sizes:
+            path = os.path.join(tmp, f'reviews_{rows}.csv')
+            make_dataset(rows, path)
+            store, _ = app.load_customer_data(path, use_snapshot=False)
+
+            start = time.perf_counter()
+            index = CustomerIndex.build(store)
+            print(f"\n{rows} rows: index built in {time.perf_counter() - start:.2f}s, {index.nbytes() / 2**20:.1f} MB")
+            records = list(store.values())
+
+            print(f"{'query':>22} {'matches':>8} {'index p50':>10} {'index p99':>10} {'walk (ms)':>10} {'scan (ms)':>10}")
+            for name, filters, query in QUERIES:
+                latencies = []
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    page = index.search(filters, query, limit=100)
+                    latencies.append(time.perf_counter() - start)
+                p50, p99 = percentiles_ms(latencies)
+
+                # Every page of the result, following next_cursor
+                start = time.perf_counter()
+                cursor, walked = None, []
+                while True:
+                    result = index.search(filters, query, cursor, limit=1000)
+                    walked += result['order_numbers']
+                    cursor = result['next_cursor']
+                    if not cursor:
+                        break
+                walk_ms = (time.perf_counter() - start) * 1000
+                assert len(walked) == page['count']
+
+                scans = []
+                for _ in range(args.scan_repeat):
+                    start = time.perf_counter()
+                    expected = scan(records, filters, query, 100)
+                    scans.append(time.perf_counter() - start)
+                assert expected == page['order_numbers'], name
+                print(f"{name:>22} {page['count']:>8} {p50:>10.3f} {p99:>10.3f} {walk_ms:>10.1f} "
+                      f"{float(np.median(scans)) * 1000:>10.1f}")
+            del records, store, index
+
+
+if __name__ == '__main__':
+    main()
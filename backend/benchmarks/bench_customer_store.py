@@ -0,0 +1,142 @@
+"""
+Benchmark: customer store engines at 100k / 1M rows
+Lookup latency (p50 / p99 over random orders), KPI value counts and
+per-worker memory for a plain dict of records, the in-memory columnar
+CustomerStore and the SQLite store. Each engine is opened in a fresh
+process; for SQLite the database is built first (build time reported) and
+the worker only opens it, as every worker after the first would.
+
+Heap memory (anonymous pages, from /proc/self/smaps_rollup) is what each
+extra worker process costs; RSS also counts file pages that the OS shares
+between workers mapping the same database and can reclaim under pressure.
+
+Usage (from backend/):
+    python benchmarks/bench_customer_store.py
+    python benchmarks/bench_customer_store.py --sizes 100000 --lookups 20000
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_load_customer_data import make_dataset  # noqa: E402
+
+ENGINES = ['dict', 'memory', 'sqlite']
+
+
+def memory_mb() -> dict:
+    """Current RSS and heap (anonymous) memory of this process, in MB"""
+    usage = {'peak_rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            fields = dict(line.split(':', 1) for line in f if ':' in line)
+    except OSError:
+        return usage
+    kb = lambda name: int(fields.get(name, '0 kB').split()[0])  # noqa: E731
+    usage['rss'] = kb('Rss') / 1024
+    usage['heap'] = kb('Anonymous') / 1024
+    return usage
+
+
+def run_child(csv_path: str, engine: str, lookups: int):
+    """Open one engine and print one JSON line of measurements"""
+    import app
+
+    baseline = memory_mb()
+    start = time.perf_counter()
+    if engine == 'sqlite':
+        store, _, _, _ = app.open_sqlite_customer_data(csv_path)
+    else:
+        store, _ = app.load_customer_data(csv_path, use_snapshot=False)
+        if engine == 'dict':
+            store = dict(store.items())
+    open_s = time.perf_counter() - start
+
+    rng = random.Random(1)
+    orders = [f"DM{30000000 + rng.randrange(len(store))}" for _ in range(lookups)]
+    latencies = []
+    for order in orders:
+        start = time.perf_counter()
+        store.get(order)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+
+    start = time.perf_counter()
+    if engine == 'dict':
+        counts = {}
+        for record in store.values():
+            counts[record['priority_level']] = counts.get(record['priority_level'], 0) + 1
+    else:
+        store.value_counts('priority_level')
+    counts_ms = (time.perf_counter() - start) * 1000
+
+    after = memory_mb()
+    print(json.dumps({
+        'open_s': open_s,
+        'p50_us': latencies[len(latencies) // 2] * 1e6,
+        'p99_us': latencies[int(len(latencies) * 0.99)] * 1e6,
+        'counts_ms': counts_ms,
+        'rss_mb': after.get('rss', after['peak_rss']) - baseline.get('rss', 0),
+        'heap_mb': after.get('heap', after['peak_rss']) - baseline.get('heap', 0),
+    }))
+
+
+def measure(csv_path: str, engine: str, lookups: int) -> dict:
+    out = subprocess.run(
+        [sys.executable, __file__, '--child', csv_path, engine, str(lookups)],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+        env={**os.environ, 'STARTUP_MODE': 'lazy', 'DATA_RELOAD_SECONDS': '0',
+             'CUSTOMER_DB_PATH': f"{csv_path}.sqlite3",
+             'ANTHROPIC_API_KEY': os.getenv('ANTHROPIC_API_KEY', 'benchmark')},
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--lookups', type=int, default=10_000)
+    parser.add_argument('--child', nargs=3, metavar=('CSV', 'ENGINE', 'LOOKUPS'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        csv_path, engine, lookups = args.child
+        run_child(csv_path, engine, int(lookups))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'rows':>9} {'engine':>7} {'open (s)':>9} {'p50 (us)':>9} {'p99 (us)':>9} "
+              f"{'counts (ms)':>12} {'RSS (MB)':>9} {'heap (MB)':>10}")
+        for rows in args.sizes:
+            path = os.path.join(tmp, f'reviews_{rows}.csv')
+            make_dataset(rows, path)
+
+            # Build the database once, as the first worker (or a deploy step) would
+            start = time.perf_counter()
+            subprocess.run(
+                [sys.executable, '-c', f"import app; app.open_sqlite_customer_data({path!r})"],
+                cwd=BACKEND_DIR, check=True, capture_output=True,
+                env={**os.environ, 'STARTUP_MODE': 'lazy', 'CUSTOMER_DB_PATH': f"{path}.sqlite3"},
+            )
+            build_s = time.perf_counter() - start
+
+            for engine in ENGINES:
+                r = measure(path, engine, args.lookups)
+                print(f"{rows:>9} {engine:>7} {r['open_s']:>9.2f} {r['p50_us']:>9.1f} {r['p99_us']:>9.1f} "
+                      f"{r['counts_ms']:>12.2f} {r['rss_mb']:>9.1f} {r['heap_mb']:>10.1f}")
+            print(f"{'':>9} {'sqlite':>7} built in {build_s:.1f}s, "
+                  f"{os.path.getsize(path + '.sqlite3') / 2**20:.0f} MB on disk")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+Benchmark: /api/kpis aggregates - full scan vs incrementally maintained counts
+Also applies random inserts, updates and deletes to the store and checks the
+maintained counts against a full recompute after each batch.
+
+Usage (from backend/):
+    python benchmarks/bench_kpis.py
+    python benchmarks/bench_kpis.py --rows 1000000 --mutations 20000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+from bench_load_customer_data import make_dataset
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import app  # noqa: E402
+
+
+def scan_kpis(db) -> tuple:
+    """The five passes get_kpis used to make over every order"""
+    escalation_count = sum(1 for c in db.values() if c.get('escalation_needed'))
+    critical_count = sum(1 for c in db.values() if c.get('priority_level') == 'critical')
+    high_count = sum(1 for c in db.values() if c.get('priority_level') == 'high')
+    categories = {}
+    for customer in db.values():
+        cat = customer.get('issue_category', 'general')
+        categories[cat] = categories.get(cat, 0) + 1
+    return escalation_count, critical_count, high_count, categories
+
+
+def counted_kpis(db) -> tuple:
+    escalation_count = sum(n for value, n in db.value_counts('escalation_needed').items() if value)
+    priorities = db.value_counts('priority_level')
+    return (escalation_count, priorities.get('critical', 0), priorities.get('high', 0),
+            db.value_counts('issue_category'))
+
+
+def mutate(db, count: int, rng: random.Random):
+    """Random mix of updates, inserts and deletes"""
+    orders = list(db.keys())
+    priorities = ['low', 'medium', 'high', 'critical']
+    categories = ['repair', 'sizing', 'refund', 'quality', 'customer_service', 'general', 'shipping']
+    template = db[orders[0]]
+    for i in range(count):
+        op = rng.random()
+        order = rng.choice(orders)
+        if op < 0.6:
+            record = db.get(order, template)
+            record['priority_level'] = rng.choice(priorities)
+            record['issue_category'] = rng.choice(categories)
+            record['escalation_needed'] = rng.random() < 0.5
+            db[order] = record
+        elif op < 0.8:
+            new_order = f"DMNEW{len(db)}-{i}"
+            db[new_order] = dict(template, order_number=new_order)
+        else:
+            db.pop(order, None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--mutations', type=int, default=5_000)
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'reviews.csv')
+        make_dataset(args.rows, path)
+        db, _ = app.load_customer_data(path, use_snapshot=False)
+
+    rng = random.Random(42)
+    for round_number in range(args.rounds):
+        mutate(db, args.mutations, rng)
+        mismatches = db.check_counts()
+        assert not mismatches, f"maintained counts drifted: {mismatches}"
+        assert scan_kpis(db) == counted_kpis(db)
+        print(f"✅ Round {round_number + 1}: counts match a full recompute ({len(db)} orders)")
+
+    start = time.perf_counter()
+    scan_kpis(db)
+    scan_ms = (time.perf_counter() - start) * 1000
+
+    repeats = 1000
+    start = time.perf_counter()
+    for _ in range(repeats):
+        counted_kpis(db)
+    counted_ms = (time.perf_counter() - start) * 1000 / repeats
+
+    print(f"Full scan:         {scan_ms:10.3f} ms")
+    print(f"Maintained counts: {counted_ms:10.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+"""
+Benchmark: load_customer_data at 10k / 100k / 1M rows
+Compares the vectorized loader against the old iterrows() loader
+(load time, peak RSS and the size of the resulting object graph, each run
+in a fresh process)
+
+Usage (from backend/):
+    python benchmarks/bench_load_customer_data.py
+    python benchmarks/bench_load_customer_data.py --sizes 10000 100000 --legacy-max 100000
+"""
+
+import argparse
+import gc
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SEED_CSV = os.path.join(BACKEND_DIR, 'dr_martens_training_dataset_50.csv')
+sys.path.insert(0, BACKEND_DIR)
+
+
+# =============================================================================
+# REFERENCE IMPLEMENTATION (the pre-vectorization loader)
+# =============================================================================
+def legacy_frame_to_customer_db(df) -> dict:
+    """Row-by-row conversion, kept verbatim for timing and equivalence checks"""
+    customer_db = {}
+    for _, row in df.iterrows():
+        order_num = str(row['order_number']).upper()
+        customer_db[order_num] = {
+            'order_number': order_num,
+            'star_rating': int(row['star_rating']) if pd.notna(row['star_rating']) else 1,
+            'customer_name': str(row['customer_name']) if pd.notna(row['customer_name']) else 'Customer',
+            'review_title': str(row['review_title']) if pd.notna(row['review_title']) else '',
+            'review_text': str(row['review_text_full']) if pd.notna(row.get('review_text_full')) else str(row['review_text']) if pd.notna(row['review_text']) else '',
+            'review_date': str(row['review_date']) if pd.notna(row['review_date']) else '',
+            'product_name': str(row['product_name']) if pd.notna(row['product_name']) else 'Dr. Martens Product',
+            'product_url': str(row['product_url']) if pd.notna(row.get('product_url')) else '',
+            'issue_category': str(row['issue_category']) if pd.notna(row['issue_category']) else 'general',
+            'action_required': str(row['action_required']) if pd.notna(row['action_required']) else 'knowledge_base',
+            'priority_level': str(row['priority_level']) if pd.notna(row['priority_level']) else 'low',
+            'suggested_resolution': str(row['suggested_resolution']) if pd.notna(row['suggested_resolution']) else 'Provide assistance',
+            'integration_system': str(row['integration_system']) if pd.notna(row['integration_system']) else 'rag_knowledge',
+            'escalation_needed': row['escalation_needed'] if pd.notna(row.get('escalation_needed')) else False,
+            'sentiment': str(row['sentiment']) if pd.notna(row['sentiment']) else 'neutral',
+        }
+    return customer_db
+
+
+# =============================================================================
+# SYNTHETIC DATA
+# =============================================================================
+def make_dataset(rows: int, path: str):
+    """Tile the 50-row seed file up to `rows`, with unique order numbers and some gaps"""
+    seed = pd.read_csv(SEED_CSV)
+    reps = -(-rows // len(seed))
+    df = pd.concat([seed] * reps, ignore_index=True).iloc[:rows].copy()
+    df['order_number'] = [f"DM{30000000 + i}" for i in range(rows)]
+    # Sprinkle missing values so the default-filling paths are exercised
+    df.loc[df.index % 7 == 0, 'review_text_full'] = None
+    df.loc[df.index % 11 == 0, 'product_url'] = None
+    df.loc[df.index % 13 == 0, 'sentiment'] = None
+    df.to_csv(path, index=False)
+
+
+# =============================================================================
+# MEASUREMENT
+# =============================================================================
+def deep_sizeof(root) -> int:
+    """Bytes held by every object reachable from root (shared objects counted once)"""
+    seen = set()
+    stack = [root]
+    total = 0
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, type):
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        stack.extend(gc.get_referents(obj))
+    return total
+
+
+def run_child(csv_path: str, impl: str):
+    """Load once in this process and print 'seconds peak_rss_mb retained_mb rows'"""
+    import app
+
+    start = time.perf_counter()
+    if impl == 'legacy':
+        db = legacy_frame_to_customer_db(pd.read_csv(csv_path))
+    else:
+        db, _ = app.load_customer_data(csv_path, use_snapshot=False)
+    elapsed = time.perf_counter() - start
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    retained_mb = deep_sizeof(db) / 2**20
+    print(f"{elapsed:.3f} {peak_mb:.1f} {retained_mb:.1f} {len(db)}")
+
+
+def measure(csv_path: str, impl: str) -> tuple:
+    out = subprocess.run(
+        [sys.executable, __file__, '--child', csv_path, impl],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+        env={**os.environ, 'ANTHROPIC_API_KEY': os.getenv('ANTHROPIC_API_KEY', 'benchmark')},
+    )
+    seconds, peak_mb, retained_mb, rows = out.stdout.strip().splitlines()[-1].split()
+    return float(seconds), float(peak_mb), float(retained_mb), int(rows)
+
+
+def check_equivalence(csv_path: str):
+    import app
+
+    df = pd.read_csv(csv_path)
+    assert dict(app.frame_to_customer_db(df).items()) == legacy_frame_to_customer_db(df), 'loaders disagree'
+    print(f"✅ Customer store matches iterrows() output ({len(df)} rows)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--legacy-max', type=int, default=100_000,
+                        help='skip the iterrows() loader above this many rows')
+    parser.add_argument('--child', nargs=2, metavar=('CSV', 'IMPL'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(*args.child)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'rows':>10} {'impl':>10} {'load (s)':>10} {'peak RSS (MB)':>14} {'store (MB)':>14}")
+        for rows in args.sizes:
+            path = os.path.join(tmp, f'reviews_{rows}.csv')
+            make_dataset(rows, path)
+            if rows == min(args.sizes):
+                check_equivalence(path)
+            impls = ['vectorized'] + (['legacy'] if rows <= args.legacy_max else [])
+            for impl in impls:
+                seconds, peak_mb, retained_mb, _ = measure(path, impl)
+                print(f"{rows:>10} {impl:>10} {seconds:>10.3f} {peak_mb:>14.1f} {retained_mb:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""
+Benchmark: logging cost per chat request on the request thread
+Replays the tool results of a typical agent turn (lookup_order,
+find_similar_cases and an action) and times what run_agent does with them
+on the calling thread: before, a pretty-printed json.dumps of every input
+and result printed to stdout plus a second json.dumps for the tool_result;
+after, one serialization shared by the tool_result and a structured log
+record handed to the background queue.
+
+Sinks: `null` (/dev/null), `pipe` (a reader process draining as fast as it
+can) and `slow-pipe` (a reader at ~4 MB/s, like a busy terminal or log
+shipper).
+
+Usage (from backend/):
+    python benchmarks/bench_logging.py
+    python benchmarks/bench_logging.py --requests 5000 --sinks slow-pipe --interval-ms 1
+"""
+
+import argparse
+import contextlib
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import app  # noqa: E402
+from context_budget import project_tool_result  # noqa: E402
+from structured_log import RawJSON, log_event, sampled, setup_logging  # noqa: E402
+
+READERS = {
+    'pipe': 'import sys\nwhile sys.stdin.buffer.read1(65536): pass',
+    'slow-pipe': 'import sys, time\nwhile sys.stdin.buffer.read1(4096): time.sleep(0.001)',
+}
+
+
+@contextlib.contextmanager
+def open_sink(name: str):
+    if name == 'null':
+        with open(os.devnull, 'w') as stream:
+            yield stream
+        return
+    reader = subprocess.Popen([sys.executable, '-c', READERS[name]], stdin=subprocess.PIPE, text=True)
+    try:
+        yield reader.stdin
+    finally:
+        reader.stdin.close()
+        reader.wait()
+
+
+def turn_tools() -> list:
+    order = next(iter(app.customer_reviews_db))
+    calls = [
+        ('lookup_order', {'order_number': order}),
+        ('find_similar_cases', {'query': 'strap broke after a few weeks', 'k': 5}),
+        ('initiate_repair', {'order_number': order, 'issue_description': 'Strap broke'}),
+    ]
+    return [(name, tool_input, app.execute_tool(name, tool_input)) for name, tool_input in calls]
+
+
+def before(tools: list):
+    """What the agent loop used to do per turn"""
+    for name, tool_input, result in tools:
+        print(f"🔧 Agent using tool: {name}")
+        print(f"   Input: {json.dumps(tool_input, indent=2)}")
+    for name, tool_input, result in tools:
+        print(f"   Result: {json.dumps(result, indent=2)}")
+        json.dumps(result)
+
+
+def after(tools: list, logger: logging.Logger, sample_rate: float):
+    sample = sampled(sample_rate)
+    for i, (name, tool_input, result) in enumerate(tools):
+        log_event(logger, logging.DEBUG, 'tool_started', sample, iteration=0, tool=name, tool_use_id=f't{i}',
+                  input=tool_input)
+    for i, (name, tool_input, result) in enumerate(tools):
+        content = json.dumps(project_tool_result(name, result))
+        log_event(logger, logging.INFO, 'tool_finished', sample, iteration=0, tool=name, tool_use_id=f't{i}',
+                  ms=1.0, success=result.get('success'))
+        log_event(logger, logging.DEBUG, 'tool_result', sample, tool_use_id=f't{i}', result=RawJSON(content))
+    log_event(logger, logging.INFO, 'agent_turn', sample, ms=1.0, llm_calls=2, tools=[t[0] for t in tools],
+              failed=False, input_tokens=0, output_tokens=0)
+
+
+def measure(run, requests: int, interval: float) -> tuple:
+    """(p50 us, p99 us, busy s) of `run` called once per request, `interval` seconds apart"""
+    seconds = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        run()
+        seconds.append(time.perf_counter() - start)
+        if interval:
+            # Idle time between requests, as while waiting on Claude
+            time.sleep(interval)
+    total = sum(seconds)
+    seconds.sort()
+    return seconds[len(seconds) // 2] * 1e6, seconds[int(len(seconds) * 0.99)] * 1e6, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--interval-ms', type=float, default=0.0,
+                        help='pause between requests, as while waiting on Claude (default: back to back)')
+    parser.add_argument('--sinks', nargs='+', default=['null', 'pipe', 'slow-pipe'], choices=['null', *READERS])
+    args = parser.parse_args()
+
+    app.ensure_data()
+    tools = turn_tools()
+    modes = [
+        ('print (before)', None, None, 1.0),
+        ('queue INFO', 'INFO', 'json', 1.0),
+        ('queue DEBUG', 'DEBUG', 'json', 1.0),
+        ('queue DEBUG 10%', 'DEBUG', 'json', 0.1),
+    ]
+    print(f"{args.requests} requests, 3 tool calls each, {args.interval_ms:g} ms apart; time on the request thread")
+    print(f"{'sink':>10} {'mode':>16} {'p50 (us)':>9} {'p99 (us)':>9} {'busy (s)':>9} {'dropped':>8}")
+    for sink in args.sinks:
+        for mode, level, fmt, rate in modes:
+            with open_sink(sink) as stream:
+                if level is None:
+                    stdout, sys.stdout = sys.stdout, stream
+                    try:
+                        p50, p99, total = measure(lambda: before(tools), args.requests, args.interval_ms / 1000)
+                    finally:
+                        sys.stdout = stdout
+                    dropped = 0
+                else:
+                    logger, listener = setup_logging('bench.logging', level=level, fmt=fmt, stream=stream)
+                    p50, p99, total = measure(lambda: after(tools, logger, rate), args.requests, args.interval_ms / 1000)
+                    listener.stop()
+                    dropped = logger.handlers[0].dropped
+            print(f"{sink:>10} {mode:>16} {p50:>9.1f} {p99:>9.1f} {total:>9.2f} {dropped:>8}")
+
+
+if __name__ == '__main__':
+    main()
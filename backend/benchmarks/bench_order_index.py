@@ -0,0 +1,70 @@
+"""
+Benchmark: typo-tolerant order-number suggestions at 100k / 1M / 5M orders
+Build time, index size and suggest() latency (p50 / p99) for order numbers
+with one and two typos (substituted or swapped digits), plus the hit rate
+of the intended order among the suggestions.
+
+Usage (from backend/):
+    python benchmarks/bench_order_index.py
+    python benchmarks/bench_order_index.py --sizes 1000000 --queries 5000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from order_index import OrderNumberIndex  # noqa: E402
+
+
+def mistype(order: str, edits: int, rng: random.Random) -> str:
+    digits = list(order[2:])
+    for _ in range(edits):
+        i = rng.randrange(len(digits) - 1)
+        if rng.random() < 0.5:
+            digits[i] = rng.choice('0123456789'.replace(digits[i], ''))
+        else:
+            digits[i], digits[i + 1] = digits[i + 1], digits[i]
+    return 'DM' + ''.join(digits)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000, 5_000_000])
+    parser.add_argument('--queries', type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'orders':>9} {'build (s)':>10} {'size (MB)':>10} {'typos':>6} {'p50 (us)':>9} {'p99 (us)':>9} {'hit rate':>9}")
+    for size in args.sizes:
+        # Random 8-digit order numbers, like the scraped dataset's DM24382608
+        values = np.random.default_rng(7).choice(90_000_000, size, replace=False) + 10_000_000
+        orders = [f"DM{value}" for value in values.tolist()]
+
+        start = time.perf_counter()
+        index = OrderNumberIndex.build(orders)
+        build_s = time.perf_counter() - start
+
+        rng = random.Random(3)
+        for edits in (1, 2):
+            intended = [rng.choice(orders) for _ in range(args.queries)]
+            queries = [mistype(order, edits, rng) for order in intended]
+            latencies, hits = [], 0
+            for order, query in zip(intended, queries):
+                start = time.perf_counter()
+                suggestions = index.suggest(query)
+                latencies.append(time.perf_counter() - start)
+                hits += order in {suggested for suggested, _ in suggestions}
+            print(f"{size:>9} {build_s:>10.2f} {index.nbytes() / 2**20:>10.1f} {edits:>6} "
+                  f"{np.percentile(latencies, 50) * 1e6:>9.0f} {np.percentile(latencies, 99) * 1e6:>9.0f} "
+                  f"{hits / len(queries):>9.3f}")
+        del index, orders
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark: similar-case BM25 index at 10k / 100k / 1M reviews
+Build time, saved size, load time and query latency (p50 / p99), plus
+recall@5 of the capped postings against an uncapped index.
+
+Usage (from backend/):
+    python benchmarks/bench_retrieval.py
+    python benchmarks/bench_retrieval.py --sizes 10000 100000 --max-postings 500
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SEED_CSV = os.path.join(BACKEND_DIR, 'dr_martens_training_dataset_50.csv')
+sys.path.insert(0, BACKEND_DIR)
+
+from retrieval import BM25Index, tokenize  # noqa: E402
+
+
+def seed_vocabulary() -> list:
+    seed = pd.read_csv(SEED_CSV)
+    text = ' '.join(seed['review_title'].fillna('').astype(str) + ' ' + seed['review_text'].fillna('').astype(str))
+    return sorted(set(tokenize(text)))
+
+
+def synthetic_reviews(rows: int, vocabulary: list, rng: np.random.Generator) -> list:
+    """Reviews of 10-80 words drawn Zipf-like from the seed vocabulary (plus some rare words)"""
+    words = np.array(vocabulary + [f"w{i}" for i in range(20000)])
+    ranks = np.arange(1, len(words) + 1)
+    weights = 1.0 / ranks
+    weights /= weights.sum()
+    lengths = rng.integers(10, 80, size=rows)
+    picks = words[rng.choice(len(words), size=int(lengths.sum()), p=weights)]
+    bounds = np.concatenate(([0], np.cumsum(lengths)))
+    return [' '.join(picks[bounds[i]:bounds[i + 1]]) for i in range(rows)]
+
+
+def percentile_ms(samples: list, q: float) -> float:
+    return float(np.percentile(samples, q)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--max-postings', type=int, default=1000)
+    parser.add_argument('--queries', type=int, default=1000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(7)
+    vocabulary = seed_vocabulary()
+    print(f"{'reviews':>9} {'build (s)':>10} {'saved (MB)':>11} {'load (s)':>9} "
+          f"{'p50 (ms)':>9} {'p99 (ms)':>9} {'recall@5':>9}")
+    for rows in args.sizes:
+        texts = synthetic_reviews(rows, vocabulary, rng)
+        doc_ids = [f"DM{30000000 + i}" for i in range(rows)]
+        queries = [' '.join(rng.choice(texts[int(rng.integers(rows))].split(), size=int(rng.integers(2, 7))))
+                   for _ in range(args.queries)]
+
+        start = time.perf_counter()
+        index = BM25Index.build(doc_ids, texts, max_postings=args.max_postings)
+        build_s = time.perf_counter() - start
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'index.npz')
+            index.save(path, 'bench')
+            saved_mb = os.path.getsize(path) / 1e6
+            start = time.perf_counter()
+            index = BM25Index.load(path, 'bench')
+            load_s = time.perf_counter() - start
+
+        latencies = []
+        for query in queries:
+            start = time.perf_counter()
+            index.search(query, 5)
+            latencies.append(time.perf_counter() - start)
+
+        # Exact top-5 from an uncapped index, on a sample of the queries
+        exact = BM25Index.build(doc_ids, texts, max_postings=rows)
+        sample = queries[:200]
+        hits = sum(len({d for d, _ in index.search(q, 5)} & {d for d, _ in exact.search(q, 5)}) for q in sample)
+        recall = hits / max(sum(len(exact.search(q, 5)) for q in sample), 1)
+        del exact
+
+        print(f"{rows:>9} {build_s:>10.2f} {saved_mb:>11.1f} {load_s:>9.3f} "
+              f"{percentile_ms(latencies, 50):>9.3f} {percentile_ms(latencies, 99):>9.3f} {recall:>9.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+Benchmark: process startup of app.py under each STARTUP_MODE
+Each mode runs in a fresh process and reports the `import app` time, the
+first /api/health response and the time until the dataset is ready, plus
+which heavy modules got imported. Exits non-zero when a lazy import is
+over budget or pulls in pandas/anthropic, so it can gate CI.
+
+Usage (from backend/):
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --runs 5 --budget-ms 1000
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+MODES = ['lazy', 'background', 'eager']
+HEAVY_MODULES = ['pandas', 'anthropic']
+
+
+def run_child():
+    """Import the app once and print one JSON line of timings"""
+    start = time.perf_counter()
+    import app
+    import_ms = (time.perf_counter() - start) * 1000
+    heavy_after_import = [m for m in HEAVY_MODULES if m in sys.modules]
+
+    client = app.app.test_client()
+    start = time.perf_counter()
+    health = client.get('/api/health')
+    health_ms = (time.perf_counter() - start) * 1000
+
+    # Time from `import app` until customer data is usable
+    start = time.perf_counter()
+    if not app.data_ready():
+        if app.STARTUP_MODE == 'background':
+            app._data_ready.wait()
+        else:
+            client.get('/api/customer/DM00000000')
+    ready_ms = import_ms + (time.perf_counter() - start) * 1000
+    print(json.dumps({
+        'import_ms': import_ms,
+        'health_ms': health_ms,
+        'health_ready': health.get_json()['ready'],
+        'ready_ms': ready_ms,
+        'heavy_after_import': heavy_after_import,
+    }))
+
+
+def measure(mode: str) -> dict:
+    out = subprocess.run(
+        [sys.executable, __file__, '--child'],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+        env={**os.environ, 'STARTUP_MODE': mode, 'DATA_RELOAD_SECONDS': '0',
+             'ANTHROPIC_API_KEY': os.getenv('ANTHROPIC_API_KEY', 'benchmark')},
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--budget-ms', type=float, default=1000.0,
+                        help='Fail if the median lazy `import app` takes longer than this')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child()
+        return
+
+    print(f"{'mode':>11} {'import (ms)':>12} {'health (ms)':>12} {'ready (ms)':>11}  heavy modules after import")
+    failures = []
+    for mode in MODES:
+        results = [measure(mode) for _ in range(args.runs)]
+        import_ms = statistics.median(r['import_ms'] for r in results)
+        health_ms = statistics.median(r['health_ms'] for r in results)
+        ready_ms = statistics.median(r['ready_ms'] for r in results)
+        heavy = sorted({m for r in results for m in r['heavy_after_import']})
+        print(f"{mode:>11} {import_ms:>12.0f} {health_ms:>12.1f} {ready_ms:>11.0f}  {', '.join(heavy) or '-'}")
+
+        if mode == 'lazy':
+            if import_ms > args.budget_ms:
+                failures.append(f"lazy import took {import_ms:.0f} ms (budget {args.budget_ms:.0f} ms)")
+            if heavy:
+                failures.append(f"lazy import pulled in {', '.join(heavy)}")
+
+    for failure in failures:
+        print(f"❌ {failure}")
+    if failures:
+        sys.exit(1)
+    print(f"✅ Lazy import within {args.budget_ms:.0f} ms budget")
+
+
+if __name__ == '__main__':
+    main()
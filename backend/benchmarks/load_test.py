@@ -0,0 +1,249 @@
+"""
+Load test: /api/chat and /api/action/<type> at fixed concurrency, offline
+Starts benchmarks/mock_llm_server.py (a local stand-in for the Messages API,
+with scripted tool_use/end_turn turns and configurable latency) and the
+backend pointed at it through ANTHROPIC_BASE_URL, then drives the backend
+from closed-loop workers - each sends its next request as soon as the last
+one answers. Reports throughput, p50/p99 latency and error rate per
+endpoint at every concurrency level.
+
+Chat messages name a random order from the dataset, each in a new session,
+so every chat runs the full agent loop unless the fast path answers it
+(FAST_PATH_ENABLED=false in the backend's environment forces the loop).
+
+Usage (from backend/):
+    python benchmarks/load_test.py
+    python benchmarks/load_test.py --concurrency 1 8 32 --requests 400 --server asgi
+    python benchmarks/load_test.py --latency-ms 800 --chunk-ms 20 --error-rate 0.02 --action-share 0.2
+    python benchmarks/load_test.py --url http://localhost:5000   # an already running backend
+"""
+
+import argparse
+import csv
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+ACTIONS = ['refund', 'repair', 'exchange', 'escalate', 'appointment']
+
+# How each --server choice runs the backend (no reloader, threaded like production)
+SERVERS = {
+    'flask': "import app; app.app.run(host='127.0.0.1', port={port}, threaded=True, use_reloader=False)",
+    'asgi': "import uvicorn; uvicorn.run('asgi:application', host='127.0.0.1', port={port}, log_level='warning')",
+}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_up(port: int, path: str, process: subprocess.Popen, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            sys.exit(f"server on port {port} exited with {process.returncode}")
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            conn.request('GET', path)
+            conn.getresponse().read()
+            conn.close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    sys.exit(f"server on port {port} did not come up within {timeout:g}s")
+
+
+def start_mock(args) -> tuple:
+    """(process, base url) of the mock Messages API"""
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(BENCHMARKS_DIR, 'mock_llm_server.py'), '--port', str(port),
+         '--script', args.script, '--latency-ms', str(args.latency_ms), '--chunk-ms', str(args.chunk_ms),
+         '--jitter', str(args.jitter), '--error-rate', str(args.error_rate)],
+        stderr=subprocess.DEVNULL,
+    )
+    # Any path answers once the server is listening (404 for GET)
+    wait_until_up(port, '/', process)
+    return process, f'http://127.0.0.1:{port}'
+
+
+def start_backend(server: str, llm_url: str) -> tuple:
+    """(process, base url) of the backend, talking to `llm_url`"""
+    port = free_port()
+    env = {
+        **os.environ,
+        'ANTHROPIC_BASE_URL': llm_url,
+        'ANTHROPIC_API_KEY': 'mock',
+        'DATA_RELOAD_SECONDS': '0',
+        'LOG_LEVEL': os.getenv('LOG_LEVEL', 'WARNING'),
+    }
+    process = subprocess.Popen([sys.executable, '-c', SERVERS[server].format(port=port)], cwd=BACKEND_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    wait_until_up(port, '/api/health', process)
+    return process, f'http://127.0.0.1:{port}'
+
+
+def load_customers(path: str) -> list:
+    with open(path, newline='', encoding='utf-8') as f:
+        return [row for row in csv.DictReader(f) if row.get('order_number')]
+
+
+def make_request(rng: random.Random, customers: list, action_share: float) -> tuple:
+    """(kind, path, body) of one request"""
+    customer = rng.choice(customers)
+    order = customer['order_number']
+    if rng.random() < action_share:
+        action = rng.choice(ACTIONS)
+        return 'action', f'/api/action/{action}', {'order_number': order, 'reason': 'Load test',
+                                                   'new_size': '8', 'priority': 'high'}
+    title = customer.get('review_title') or 'my boots are damaged'
+    return 'chat', '/api/chat', {'message': f"Hi, it's about order {order}: {title}. What can you do?"}
+
+
+class Worker(threading.Thread):
+    """Closed-loop client on one keep-alive connection"""
+
+    def __init__(self, url: str, customers: list, action_share: float, seed: int, next_ticket, results: list,
+                 timeout: float):
+        super().__init__(daemon=True)
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.customers = customers
+        self.action_share = action_share
+        self.rng = random.Random(seed)
+        self.next_ticket = next_ticket
+        self.results = results
+        self.timeout = timeout
+        self.conn = None
+
+    def run(self):
+        while self.next_ticket():
+            kind, path, body = make_request(self.rng, self.customers, self.action_share)
+            start = time.perf_counter()
+            try:
+                status, payload = self.post(path, body)
+                # A chat whose Claude calls failed still answers 200, with a fallback response
+                ok = status == 200 and payload.get('success', False) and not payload.get('failed')
+                route = 'llm' if kind == 'chat' and status == 200 and not payload.get('fast_path') else None
+            except (OSError, http.client.HTTPException, ValueError):
+                ok, route = False, None
+                self.conn = None
+            self.results.append((kind, time.perf_counter() - start, ok, route))
+
+    def post(self, path: str, body: dict) -> tuple:
+        if self.conn is None:
+            self.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        data = json.dumps(body)
+        self.conn.request('POST', path, body=data, headers={'Content-Type': 'application/json'})
+        response = self.conn.getresponse()
+        return response.status, json.loads(response.read() or b'{}')
+
+
+def run_level(url: str, customers: list, concurrency: int, requests: int, action_share: float, seed: int,
+              timeout: float) -> tuple:
+    """(results, wall seconds) of `requests` requests over `concurrency` workers"""
+    remaining = [requests]
+    lock = threading.Lock()
+
+    def next_ticket() -> bool:
+        with lock:
+            remaining[0] -= 1
+            return remaining[0] >= 0
+
+    results = []
+    workers = [Worker(url, customers, action_share, seed + i, next_ticket, results, timeout)
+               for i in range(concurrency)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return results, time.perf_counter() - start
+
+
+def percentile(ordered: list, q: float) -> float:
+    return ordered[min(int(len(ordered) * q), len(ordered) - 1)]
+
+
+def report(concurrency: int, results: list, seconds: float):
+    for kind in ('chat', 'action', 'all'):
+        rows = [r for r in results if kind == 'all' or r[0] == kind]
+        if not rows:
+            continue
+        latencies = sorted(r[1] for r in rows)
+        errors = sum(not r[2] for r in rows)
+        via_llm = sum(r[3] == 'llm' for r in rows)
+        llm = f"{via_llm / len(rows):>6.0%}" if kind == 'chat' else f"{'':>6}"
+        print(f"{concurrency:>5} {kind:>7} {len(rows):>6} {len(rows) / seconds:>8.1f} "
+              f"{percentile(latencies, 0.5) * 1000:>9.1f} {percentile(latencies, 0.99) * 1000:>9.1f} "
+              f"{errors / len(rows):>7.1%} {llm}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help='load an already running backend instead of starting one (and the mock)')
+    parser.add_argument('--server', choices=sorted(SERVERS), default='flask',
+                        help='how to run the backend: Flask threaded or uvicorn asgi.py (default: flask)')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--requests', type=int, default=200, help='requests per concurrency level (default: 200)')
+    parser.add_argument('--action-share', type=float, default=0.3,
+                        help='share of requests to /api/action/<type>, the rest to /api/chat (default: 0.3)')
+    parser.add_argument('--warmup', type=int, default=10, help='unreported requests first (default: 10)')
+    parser.add_argument('--timeout', type=float, default=60, help='client timeout per request in seconds')
+    parser.add_argument('--csv', default=os.path.join(BACKEND_DIR, 'dr_martens_training_dataset_50.csv'),
+                        help='where the order numbers come from')
+    parser.add_argument('--seed', type=int, default=7)
+    mock = parser.add_argument_group('mock Messages API (see mock_llm_server.py)')
+    mock.add_argument('--script', default='lookup_order,find_similar_cases;initiate_repair')
+    mock.add_argument('--latency-ms', type=float, default=300)
+    mock.add_argument('--chunk-ms', type=float, default=10)
+    mock.add_argument('--jitter', type=float, default=0.2)
+    mock.add_argument('--error-rate', type=float, default=0.0)
+    args = parser.parse_args()
+
+    customers = load_customers(args.csv)
+    processes = []
+    try:
+        if args.url:
+            url = args.url.rstrip('/')
+        else:
+            mock_process, llm_url = start_mock(args)
+            processes.append(mock_process)
+            backend_process, url = start_backend(args.server, llm_url)
+            processes.append(backend_process)
+            print(f"backend ({args.server}) {url} -> mock Messages API {llm_url}, "
+                  f"{args.latency_ms:g} ms to first token, {args.chunk_ms:g} ms per chunk, script '{args.script}'")
+
+        if args.warmup:
+            run_level(url, customers, 1, args.warmup, args.action_share, args.seed - 1, args.timeout)
+        print(f"{args.requests} requests per level, {args.action_share:.0%} actions")
+        print(f"{'conc':>5} {'kind':>7} {'reqs':>6} {'req/s':>8} {'p50 (ms)':>9} {'p99 (ms)':>9} {'errors':>7} "
+              f"{'llm':>6}")
+        for concurrency in args.concurrency:
+            results, seconds = run_level(url, customers, concurrency, args.requests, args.action_share,
+                                         args.seed + 1000 * concurrency, args.timeout)
+            report(concurrency, results, seconds)
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+if __name__ == '__main__':
+    main()
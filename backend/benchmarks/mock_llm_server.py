@@ -0,0 +1,251 @@
+"""
+Local stand-in for the Anthropic Messages API, for offline load tests
+Answers POST /v1/messages (streamed as SSE or not) with scripted turns:
+while the conversation names an order, each step calls the next group of
+tools in --script, and once the script is used up the reply ends the turn
+(stop_reason end_turn). Latency is configurable - time to first token,
+per-chunk delay and jitter - and --error-rate answers some calls with
+529 overloaded, as the real API does under load.
+
+Point the backend at it with ANTHROPIC_BASE_URL (the key can be anything):
+
+Usage (from backend/):
+    python benchmarks/mock_llm_server.py --port 8765
+    python benchmarks/mock_llm_server.py --latency-ms 600 --chunk-ms 15 --script "lookup_order;initiate_repair"
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8765 ANTHROPIC_API_KEY=mock python app.py
+"""
+
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ORDER_NUMBER = re.compile(r'DM\d{7,10}', re.IGNORECASE)
+
+# Tool calls per step of a turn; ';' separates steps, ',' tools within a step
+DEFAULT_SCRIPT = 'lookup_order,find_similar_cases;initiate_repair'
+
+REPLY = ("I'm sorry about the trouble with your boots. I've looked up your order and started a free "
+         "repair - you'll get an email with a prepaid label shortly. Is there anything else I can help with?")
+NO_ORDER_REPLY = "I'd be glad to help. Could you share your order number (it starts with DM)?"
+
+
+def tool_input(name: str, order: str, text: str) -> dict:
+    """Plausible input for each of the agent's tools"""
+    return {
+        'lookup_order': {'order_number': order},
+        'find_similar_cases': {'query': text[:200] or 'broken', 'order_number': order, 'k': 5},
+        'initiate_repair': {'order_number': order, 'issue_description': text[:200] or 'Product issue'},
+        'process_refund': {'order_number': order, 'reason': 'Quality issue'},
+        'create_exchange': {'order_number': order, 'new_size': '8', 'reason': 'Wrong size'},
+        'escalate_to_human': {'order_number': order, 'reason': 'Customer request', 'priority': 'high'},
+        'book_appointment': {'customer_name': 'Customer', 'store_location': 'London'},
+    }.get(name, {})
+
+
+def message_text(content) -> str:
+    """Text of a message's content (a string or a list of blocks)"""
+    if isinstance(content, str):
+        return content
+    return ' '.join(block.get('text', '') for block in content if block.get('type') == 'text')
+
+
+def is_tool_results(message: dict) -> bool:
+    content = message['content']
+    return not isinstance(content, str) and any(block.get('type') == 'tool_result' for block in content)
+
+
+def turn_step(messages: list) -> int:
+    """Tool rounds so far since the customer's latest message"""
+    step = 0
+    for message in reversed(messages):
+        if message['role'] == 'user' and not is_tool_results(message):
+            break
+        step += message['role'] == 'assistant'
+    return step
+
+
+def plan(body: dict, script: list) -> tuple:
+    """(content blocks, stop_reason) for the next assistant message"""
+    messages = body.get('messages', [])
+    step = turn_step(messages)
+    customer_text = next((message_text(m['content']) for m in reversed(messages)
+                          if m['role'] == 'user' and not is_tool_results(m)), '')
+    match = next((ORDER_NUMBER.search(message_text(m['content'])) for m in reversed(messages)
+                  if ORDER_NUMBER.search(message_text(m['content']))), None)
+
+    if match is None:
+        return [{'type': 'text', 'text': NO_ORDER_REPLY}], 'end_turn'
+    if step >= len(script):
+        return [{'type': 'text', 'text': REPLY}], 'end_turn'
+    order = match.group(0).upper()
+    blocks = [{'type': 'text', 'text': 'Let me check that for you.'}]
+    for name in script[step]:
+        blocks.append({'type': 'tool_use', 'id': f'toolu_{uuid.uuid4().hex[:24]}', 'name': name,
+                       'input': tool_input(name, order, customer_text)})
+    return blocks, 'tool_use'
+
+
+def _chunks(text: str, size: int = 24) -> list:
+    return [text[i:i + size] for i in range(0, len(text), size)] or ['']
+
+
+class MockMessagesHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'mock-messages/1'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_POST(self):
+        if self.path.split('?')[0] != '/v1/messages':
+            return self._json(404, {'type': 'error', 'error': {'type': 'not_found_error', 'message': self.path}})
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        status, message = self.server.reply(body)
+        if status != 200:
+            return self._json(status, message)
+        time.sleep(self.server.delay(self.server.latency))
+        if body.get('stream'):
+            self._stream(message)
+        else:
+            chunks = sum(len(_chunks(_block_text(block))) for block in message['content'])
+            time.sleep(sum(self.server.delay(self.server.chunk) for _ in range(chunks)))
+            self._json(200, message)
+
+    def _json(self, status: int, payload: dict):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        if status == 529:
+            self.send_header('x-should-retry', 'false')
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stream(self, message: dict):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        start = {**message, 'content': [], 'stop_reason': None,
+                 'usage': {**message['usage'], 'output_tokens': 1}}
+        self._event('message_start', {'type': 'message_start', 'message': start})
+        for index, block in enumerate(message['content']):
+            if block['type'] == 'text':
+                self._event('content_block_start', {'type': 'content_block_start', 'index': index,
+                                                    'content_block': {'type': 'text', 'text': ''}})
+                deltas = [{'type': 'text_delta', 'text': chunk} for chunk in _chunks(block['text'])]
+            else:
+                self._event('content_block_start', {'type': 'content_block_start', 'index': index,
+                                                    'content_block': {**block, 'input': {}}})
+                deltas = [{'type': 'input_json_delta', 'partial_json': chunk}
+                          for chunk in _chunks(json.dumps(block['input']))]
+            for delta in deltas:
+                time.sleep(self.server.delay(self.server.chunk))
+                self._event('content_block_delta', {'type': 'content_block_delta', 'index': index, 'delta': delta})
+            self._event('content_block_stop', {'type': 'content_block_stop', 'index': index})
+        self._event('message_delta', {'type': 'message_delta',
+                                      'delta': {'stop_reason': message['stop_reason'], 'stop_sequence': None},
+                                      'usage': {'output_tokens': message['usage']['output_tokens']}})
+        self._event('message_stop', {'type': 'message_stop'})
+        self.wfile.write(b'0\r\n\r\n')
+
+    def _event(self, name: str, payload: dict):
+        data = f'event: {name}\ndata: {json.dumps(payload)}\n\n'.encode()
+        self.wfile.write(f'{len(data):x}\r\n'.encode() + data + b'\r\n')
+        self.wfile.flush()
+
+
+def _block_text(block: dict) -> str:
+    return block['text'] if block['type'] == 'text' else json.dumps(block['input'])
+
+
+class MockMessagesServer(ThreadingHTTPServer):
+    """Scripted Messages API; subclasses change what is answered by overriding reply()"""
+    daemon_threads = True
+
+    def __init__(self, address: tuple, script: str = DEFAULT_SCRIPT, latency_ms: float = 300, chunk_ms: float = 10,
+                 jitter: float = 0.2, error_rate: float = 0.0, verbose: bool = False):
+        super().__init__(address, MockMessagesHandler)
+        self.script = [[name.strip() for name in step.split(',') if name.strip()]
+                       for step in script.split(';') if step.strip()]
+        self.latency = latency_ms / 1000
+        self.chunk = chunk_ms / 1000
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.verbose = verbose
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def reply(self, body: dict) -> tuple:
+        """(HTTP status, message or error body) for one /v1/messages request"""
+        with self.lock:
+            self.calls += 1
+        if random.random() < self.error_rate:
+            # x-should-retry: false keeps the SDK from retrying, so errors show up in the results
+            return 529, {'type': 'error', 'error': {'type': 'overloaded_error', 'message': 'Overloaded'}}
+        blocks, stop_reason = plan(body, self.script)
+        usage = {
+            'input_tokens': len(json.dumps(body)) // 4,
+            'output_tokens': max(1, len(json.dumps(blocks)) // 4),
+            'cache_creation_input_tokens': 0,
+            'cache_read_input_tokens': 0,
+        }
+        return 200, {
+            'id': f'msg_{uuid.uuid4().hex[:24]}', 'type': 'message', 'role': 'assistant',
+            'model': body.get('model', 'mock'), 'content': blocks,
+            'stop_reason': stop_reason, 'stop_sequence': None, 'usage': usage,
+        }
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def delay(self, seconds: float) -> float:
+        """`seconds` +/- jitter (a fraction of it)"""
+        return max(0.0, seconds * random.uniform(1 - self.jitter, 1 + self.jitter))
+
+
+def serve_in_background(server: MockMessagesServer) -> MockMessagesServer:
+    threading.Thread(target=server.serve_forever, name='mock-messages', daemon=True).start()
+    return server
+
+
+def start_server(port: int = 0, **options) -> MockMessagesServer:
+    """Serve on 127.0.0.1:`port` (0 = any free port) from a daemon thread"""
+    return serve_in_background(MockMessagesServer(('127.0.0.1', port), **options))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--script', default=DEFAULT_SCRIPT,
+                        help=f"tool calls per step, e.g. 'lookup_order;process_refund' (default: {DEFAULT_SCRIPT})")
+    parser.add_argument('--latency-ms', type=float, default=300, help='time to first token (default: 300)')
+    parser.add_argument('--chunk-ms', type=float, default=10, help='delay per streamed chunk (default: 10)')
+    parser.add_argument('--jitter', type=float, default=0.2, help='+/- fraction applied to every delay (default: 0.2)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of calls answered 529 (default: 0)')
+    parser.add_argument('--verbose', action='store_true', help='log every request')
+    args = parser.parse_args()
+
+    server = MockMessagesServer(('127.0.0.1', args.port), script=args.script, latency_ms=args.latency_ms,
+                                chunk_ms=args.chunk_ms, jitter=args.jitter, error_rate=args.error_rate,
+                                verbose=args.verbose)
+    print(f"Mock Messages API on {server.url} - set ANTHROPIC_BASE_URL={server.url}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
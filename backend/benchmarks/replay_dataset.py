@@ -0,0 +1,319 @@
+"""
+Record/replay regression test: every review in the training dataset through /api/chat
+Each CSV row becomes one scenario - the customer's review as a chat message
+naming their order - run through the real Flask app in-process. Claude is
+served from a cassette: `record` sends each call to the Messages API once
+and stores the response, keyed by model, system prompt, tool names, the
+customer's messages and the tool round; `replay` answers from the cassette
+with no network, so runs are deterministic and the latency measured is the
+backend's own (tools, compaction, SDK parsing) without Claude's.
+
+Replay reports per-scenario latency (median of --repeat runs), agent
+iterations, tool calls, tokens and the action taken (vs the labelled
+action_required), compares them with the stored baseline and exits 1 when
+a scenario needs more iterations or got slower than the tolerance allows.
+A cassette miss (the prompt or tools changed since recording) exits 2.
+
+Usage (from backend/):
+    python benchmarks/replay_dataset.py record                  # calls the API (ANTHROPIC_API_KEY)
+    python benchmarks/replay_dataset.py record --source mock    # scripted mock_llm_server turns instead
+    python benchmarks/replay_dataset.py replay --update-baseline
+    python benchmarks/replay_dataset.py replay --repeat 9 --latency-tolerance 0.5
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, BENCHMARKS_DIR)
+
+from dotenv import load_dotenv  # noqa: E402
+
+from mock_llm_server import (  # noqa: E402
+    MockMessagesServer, is_tool_results, message_text, serve_in_background, start_server, turn_step,
+)
+
+REPLAY_DIR = os.path.join(BENCHMARKS_DIR, 'replay')
+
+# Agent tool that carries out each action_required label (knowledge_base needs none)
+LABEL_ACTIONS = {
+    'repair': 'initiate_repair',
+    'refund': 'process_refund',
+    'exchange': 'create_exchange',
+    'escalate': 'escalate_to_human',
+    'knowledge_base': None,
+}
+ACTION_TOOLS = {'initiate_repair', 'process_refund', 'create_exchange', 'escalate_to_human', 'book_appointment'}
+
+
+def cassette_key(body: dict) -> str:
+    """What identifies a Messages API call across runs.
+
+    Tool results are left out on purpose: they carry fresh ticket numbers
+    and dates on every run, while the customer's messages and the tool
+    round already pin down where in the conversation the call is.
+    """
+    messages = body.get('messages', [])
+    identity = {
+        'model': body.get('model'),
+        'system': body.get('system'),
+        'tools': [tool['name'] for tool in body.get('tools', [])],
+        'customer_turns': [message_text(m['content']) for m in messages
+                           if m['role'] == 'user' and not is_tool_results(m)],
+        'step': turn_step(messages),
+    }
+    return hashlib.sha256(json.dumps(identity, sort_keys=True).encode()).hexdigest()[:32]
+
+
+class CassetteServer(MockMessagesServer):
+    """Messages API answered from recorded responses; with an upstream client, misses are recorded"""
+
+    def __init__(self, address: tuple, responses: dict, upstream=None):
+        super().__init__(address, latency_ms=0, chunk_ms=0, jitter=0)
+        self.responses = responses
+        self.upstream = upstream
+        self.misses = 0
+
+    def reply(self, body: dict) -> tuple:
+        key = cassette_key(body)
+        with self.lock:
+            self.calls += 1
+            message = self.responses.get(key)
+        if message is not None:
+            return 200, message
+        if self.upstream is None:
+            with self.lock:
+                self.misses += 1
+            return 404, {'type': 'error', 'error': {'type': 'not_found_error',
+                                                    'message': f'no recorded response for {key}'}}
+        request = {name: value for name, value in body.items() if name != 'stream'}
+        message = self.upstream.messages.create(**request).model_dump(mode='json')
+        with self.lock:
+            self.responses[key] = message
+        return 200, message
+
+
+def load_scenarios(path: str, limit: int = None) -> list:
+    with open(path, newline='', encoding='utf-8') as f:
+        rows = [row for row in csv.DictReader(f) if row.get('order_number')]
+    scenarios = []
+    for row in rows[:limit]:
+        review = row.get('review_text_full') or row.get('review_text') or row.get('review_title') or ''
+        scenarios.append({
+            'id': row['order_number'],
+            'label': row.get('action_required') or '',
+            'message': f"Hi, my order number is {row['order_number']}. {review.strip()}",
+        })
+    return scenarios
+
+
+def run_scenario(client, scenario: dict) -> dict:
+    """One /api/chat call in a new session and what the agent did"""
+    start = time.perf_counter()
+    response = client.post('/api/chat', json={'message': scenario['message']})
+    latency_ms = (time.perf_counter() - start) * 1000
+    body = response.get_json() or {}
+    tools = [result['tool'] for result in body.get('tool_results', [])]
+    usage = body.get('usage') or {}
+    return {
+        'latency_ms': round(latency_ms, 2),
+        'iterations': len(body.get('timings', [])),
+        'tool_calls': len(tools),
+        'tokens': usage.get('input_tokens', 0) + usage.get('output_tokens', 0),
+        'action': next((tool for tool in tools if tool in ACTION_TOOLS), None),
+        'fast_path': body.get('fast_path'),
+        'failed': response.status_code != 200 or bool(body.get('failed')),
+    }
+
+
+def read_json(path: str):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_json(path: str, data: dict):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=1, sort_keys=True)
+        f.write('\n')
+
+
+def compare(result: dict, base: dict, tolerance: float, floor_ms: float) -> list:
+    """Regressions of one scenario against its baseline entry"""
+    problems = []
+    if result['failed'] and not base.get('failed'):
+        problems.append('failed')
+    if result['iterations'] > base['iterations']:
+        problems.append(f"iterations {base['iterations']} -> {result['iterations']}")
+    slower_ms = result['latency_ms'] - base['latency_ms']
+    if slower_ms > floor_ms and result['latency_ms'] > base['latency_ms'] * (1 + tolerance):
+        problems.append(f"latency +{slower_ms / base['latency_ms']:.0%}")
+    return problems
+
+
+def _delta(value: float, base) -> str:
+    if base is None:
+        return ''
+    return f"{value - base:+g}" if value != base else '='
+
+
+def replay(args, app, scenarios: list, server: CassetteServer) -> int:
+    client = app.app.test_client()
+    for scenario in scenarios:
+        # Warm-up: first-call imports, connection setup, lazy indexes
+        run_scenario(client, scenario)
+    if server.misses:
+        print(f"cassette miss on {server.misses} call(s) - the prompt or tools changed since it was recorded; "
+              f"run `record` again", file=sys.stderr)
+        return 2
+
+    results = {}
+    for scenario in scenarios:
+        runs = [run_scenario(client, scenario) for _ in range(args.repeat)]
+        results[scenario['id']] = {**runs[-1], 'latency_ms': round(statistics.median(r['latency_ms'] for r in runs), 2)}
+
+    baseline = read_json(args.baseline)
+    base_scenarios = (baseline or {}).get('scenarios', {})
+    regressions = 0
+    print(f"{len(scenarios)} scenarios, median of {args.repeat} runs, latency tolerance "
+          f"{args.latency_tolerance:.0%} (and > {args.latency_floor_ms:g} ms)")
+    print(f"{'scenario':<12} {'label':<15} {'action':<18} {'iters':>7} {'tools':>7} {'tokens':>10} "
+          f"{'latency ms':>11} {'vs base':>8}  status")
+    for scenario in scenarios:
+        result = results[scenario['id']]
+        base = base_scenarios.get(scenario['id'])
+        expected = LABEL_ACTIONS.get(scenario['label'], '?')
+        action = result['action'] or ('(fast path)' if result['fast_path'] else '-')
+        if base is None:
+            status = 'new'
+        else:
+            problems = compare(result, base, args.latency_tolerance, args.latency_floor_ms)
+            regressions += bool(problems)
+            status = 'REGRESSED: ' + ', '.join(problems) if problems else 'ok'
+        if expected != '?' and result['action'] != expected:
+            status += ' (action differs from label)'
+        vs = f"{result['latency_ms'] / base['latency_ms'] - 1:+.0%}" if base and base['latency_ms'] else ''
+        print(f"{scenario['id']:<12} {scenario['label']:<15} {action:<18} "
+              f"{result['iterations']:>3} {_delta(result['iterations'], base and base['iterations']):>3} "
+              f"{result['tool_calls']:>3} {_delta(result['tool_calls'], base and base['tool_calls']):>3} "
+              f"{result['tokens']:>6} {_delta(result['tokens'], base and base['tokens']):>3} "
+              f"{result['latency_ms']:>11.1f} {vs:>8}  {status}")
+
+    total = sum(r['latency_ms'] for r in results.values())
+    matched = sum(results[s['id']]['action'] == LABEL_ACTIONS.get(s['label'], '?') for s in scenarios)
+    summary = (f"total {total:.1f} ms, {sum(r['iterations'] for r in results.values())} iterations, "
+               f"{sum(r['tool_calls'] for r in results.values())} tool calls, "
+               f"{sum(r['tokens'] for r in results.values())} tokens, "
+               f"action matches label in {matched}/{len(scenarios)}")
+    if base_scenarios:
+        base_total = sum(base_scenarios[s]['latency_ms'] for s in results if s in base_scenarios)
+        summary += f"; baseline total {base_total:.1f} ms"
+    print(summary)
+
+    if args.update_baseline:
+        write_json(args.baseline, {
+            'meta': {'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                     'prompt_version': app.PROMPT_VERSION, 'repeat': args.repeat},
+            'scenarios': results,
+        })
+        print(f"baseline written to {args.baseline}")
+        return 0
+    if baseline is None:
+        print(f"no baseline at {args.baseline} - run with --update-baseline to store one")
+        return 0
+    if regressions:
+        print(f"{regressions} scenario(s) regressed")
+        return 1
+    return 0
+
+
+def record(args, app, scenarios: list, server: CassetteServer) -> int:
+    client = app.app.test_client()
+    failed = 0
+    for scenario in scenarios:
+        result = run_scenario(client, scenario)
+        failed += result['failed']
+        print(f"{scenario['id']:<12} {scenario['label']:<15} {result['action'] or '-':<18} "
+              f"{result['iterations']} iterations, {result['tool_calls']} tools"
+              f"{'  FAILED' if result['failed'] else ''}")
+    write_json(args.cassette, {
+        'meta': {'recorded': datetime.now(timezone.utc).isoformat(timespec='seconds'), 'source': args.source,
+                 'model': app.AGENT_MODEL, 'prompt_version': app.PROMPT_VERSION},
+        'responses': server.responses,
+    })
+    print(f"{len(server.responses)} responses written to {args.cassette}")
+    if failed:
+        print(f"{failed} scenario(s) failed while recording", file=sys.stderr)
+        return 1
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('mode', choices=['record', 'replay'])
+    parser.add_argument('--csv', default=os.path.join(BACKEND_DIR, 'dr_martens_training_dataset_50.csv'))
+    parser.add_argument('--cassette', default=os.path.join(REPLAY_DIR, 'cassette.json'))
+    parser.add_argument('--baseline', default=os.path.join(REPLAY_DIR, 'baseline.json'))
+    parser.add_argument('--limit', type=int, help='only the first N scenarios')
+    parser.add_argument('--source', choices=['api', 'mock'], default='api',
+                        help="record: the Messages API, or mock_llm_server's scripted turns (default: api)")
+    parser.add_argument('--repeat', type=int, default=5, help='replay: runs per scenario (default: 5)')
+    parser.add_argument('--latency-tolerance', type=float, default=0.25,
+                        help='replay: allowed slowdown vs the baseline (default: 0.25)')
+    parser.add_argument('--latency-floor-ms', type=float, default=5.0,
+                        help='replay: slowdowns smaller than this never count (default: 5)')
+    parser.add_argument('--update-baseline', action='store_true', help='replay: store this run as the baseline')
+    args = parser.parse_args()
+
+    load_dotenv(os.path.join(BACKEND_DIR, '.env'))
+    upstream = None
+    if args.mode == 'record':
+        from anthropic import Anthropic
+        if args.source == 'mock':
+            mock = start_server(latency_ms=0, chunk_ms=0, jitter=0)
+            upstream = Anthropic(api_key='mock', base_url=mock.url)
+        elif not os.getenv('ANTHROPIC_API_KEY'):
+            sys.exit('record --source api needs ANTHROPIC_API_KEY')
+        else:
+            upstream = Anthropic(api_key=os.getenv('ANTHROPIC_API_KEY'),
+                                 base_url=os.getenv('ANTHROPIC_UPSTREAM_URL', 'https://api.anthropic.com'))
+        responses = {}
+    else:
+        cassette = read_json(args.cassette)
+        if cassette is None:
+            sys.exit(f"no cassette at {args.cassette} - run `record` first")
+        responses = cassette['responses']
+
+    server = serve_in_background(CassetteServer(('127.0.0.1', 0), responses, upstream))
+    # The app (imported below) sends every Claude call to the cassette
+    os.environ.update({
+        'ANTHROPIC_BASE_URL': server.url,
+        'ANTHROPIC_API_KEY': 'cassette',
+        'RESPONSE_CACHE_ENABLED': 'false',
+        'DATA_RELOAD_SECONDS': '0',
+        'LOG_LEVEL': os.getenv('LOG_LEVEL', 'WARNING'),
+    })
+    import app
+    app.ensure_data()
+
+    scenarios = load_scenarios(args.csv, args.limit)
+    if args.mode == 'record':
+        sys.exit(record(args, app, scenarios, server))
+    if cassette['meta'].get('prompt_version') != app.PROMPT_VERSION:
+        print("note: the cassette was recorded against a different prompt version", file=sys.stderr)
+    sys.exit(replay(args, app, scenarios, server))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+Dr. Martens AI Customer Support - Offline review classifier
+Streams a scraped review CSV through IssueClassifier on several processes and
+writes it back with issue_category / action_required / priority_level /
+integration_system / suggested_resolution labels filled in.
+
+Usage:
+    python classify_reviews.py reviews.csv labelled.csv
+    python classify_reviews.py reviews.csv labelled.csv --workers 8 --chunk-size 2000
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+from collections import deque
+from itertools import islice
+from multiprocessing import Pool
+
+from issue_classifier import IssueClassifier
+
+# Classifier result key -> CSV column (same names as dr_martens_training_dataset_50.csv)
+LABEL_COLUMNS = {
+    'issue_type': 'issue_category',
+    'action': 'action_required',
+    'priority': 'priority_level',
+    'system': 'integration_system',
+    'suggested_resolution': 'suggested_resolution',
+}
+
+
+def review_text(row: dict) -> str:
+    """Title plus the full review text (falling back to the short one)"""
+    body = row.get('review_text_full') or row.get('review_text') or ''
+    return f"{row.get('review_title') or ''} {body}"
+
+
+def label_texts(texts: list) -> list:
+    """Label tuples (in LABEL_COLUMNS order) for one chunk of review texts (runs in a worker process)"""
+    labels = []
+    for text in texts:
+        classification = IssueClassifier.classify(text)
+        labels.append(tuple(classification[key] for key in LABEL_COLUMNS))
+    return labels
+
+
+def apply_labels(rows: list, labels: list) -> list:
+    for row, values in zip(rows, labels):
+        row.update(zip(LABEL_COLUMNS.values(), values))
+    return rows
+
+
+def chunked(rows, size: int):
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+
+def classify_csv(input_path: str, output_path: str, workers: int, chunk_size: int) -> int:
+    """Label every row of input_path into output_path; returns the row count"""
+    count = 0
+    with open(input_path, newline='', encoding='utf-8') as src, \
+            open(output_path, 'w', newline='', encoding='utf-8') as dst:
+        reader = csv.DictReader(src)
+        fieldnames = list(reader.fieldnames or [])
+        fieldnames += [column for column in LABEL_COLUMNS.values() if column not in fieldnames]
+        writer = csv.DictWriter(dst, fieldnames=fieldnames)
+        writer.writeheader()
+
+        chunks = chunked(reader, chunk_size)
+        if workers == 1:
+            for rows in chunks:
+                writer.writerows(apply_labels(rows, label_texts([review_text(row) for row in rows])))
+                count += len(rows)
+        else:
+            # At most 2 chunks per worker are read ahead (Pool.imap would queue the
+            # whole file); workers get only the texts and send back label tuples,
+            # and chunks are written in input order
+            with Pool(workers) as pool:
+                pending = deque()
+                for rows in chunks:
+                    pending.append((rows, pool.apply_async(label_texts, ([review_text(row) for row in rows],))))
+                    if len(pending) >= 2 * workers:
+                        rows, result = pending.popleft()
+                        writer.writerows(apply_labels(rows, result.get()))
+                        count += len(rows)
+                while pending:
+                    rows, result = pending.popleft()
+                    writer.writerows(apply_labels(rows, result.get()))
+                    count += len(rows)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('input', help='review CSV (scraper export)')
+    parser.add_argument('output', help='where to write the labelled CSV')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    rows = classify_csv(args.input, args.output, args.workers, args.chunk_size)
+    elapsed = time.perf_counter() - start
+    rate = rows / elapsed if elapsed else 0.0
+    print(f"✅ Labelled {rows} reviews in {elapsed:.2f}s with {args.workers} worker(s): "
+          f"{rate:,.0f} rows/sec ({rate / args.workers:,.0f} rows/sec per core)", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,178 @@
+"""
+Dr. Martens AI Customer Support - Conversation token budget
+Compact projections of tool results for the model, and compaction of older
+turns once the messages sent to Claude pass a token budget
+"""
+
+import json
+
+from session_store import _is_turn_start
+
+# Rough token size of English text and JSON - an estimate that needs no API
+# call; the exact count for what was sent comes back in response.usage
+CHARS_PER_TOKEN = 4
+
+# Customer fields the agent reasons with; product_url, integration_system etc. stay server-side
+CUSTOMER_SUMMARY_FIELDS = [
+    'order_number', 'customer_name', 'product_name', 'review_date', 'star_rating', 'review_title',
+    'review_text', 'issue_category', 'action_required', 'priority_level', 'sentiment',
+    'suggested_resolution', 'escalation_needed',
+]
+REVIEW_EXCERPT_CHARS = 300
+
+# Lengths kept from each dropped turn in the summary of earlier conversation
+SUMMARY_MESSAGE_CHARS = 160
+SUMMARY_HEADER = "Summary of earlier conversation (older turns removed to stay within the context budget):"
+
+
+def estimate_tokens(value) -> int:
+    """Approximate token count of a string or a JSON-serializable value"""
+    text = value if isinstance(value, str) else json.dumps(value, separators=(',', ':'), default=str)
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def excerpt(text, limit: int):
+    """text cut at a word boundary to about `limit` characters, marked with an ellipsis"""
+    if not isinstance(text, str) or len(text) <= limit:
+        return text
+    cut = text[:limit]
+    return (cut.rsplit(' ', 1)[0] if ' ' in cut else cut) + '…'
+
+
+def project_tool_result(tool_name: str, result: dict) -> dict:
+    """The part of a tool result the model needs to see.
+
+    The full result still goes to the client (tool_results, SSE events);
+    this is what is serialized into the tool_result block and kept in the
+    conversation history.
+    """
+    if tool_name == 'lookup_order' and isinstance(result.get('customer'), dict):
+        customer = result['customer']
+        summary = {
+            field: customer[field] for field in CUSTOMER_SUMMARY_FIELDS if customer.get(field) not in (None, '')
+        }
+        if 'review_text' in summary:
+            summary['review_text'] = excerpt(summary['review_text'], REVIEW_EXCERPT_CHARS)
+        return {**result, 'customer': summary}
+    return result
+
+
+def _split_turns(messages: list) -> list:
+    """[start, end) message ranges, one per customer turn (anything before the first is its own range)"""
+    starts = [i for i, message in enumerate(messages) if _is_turn_start(message)]
+    if not starts or starts[0] != 0:
+        starts.insert(0, 0)
+    return list(zip(starts, starts[1:] + [len(messages)]))
+
+
+def _text(content) -> str:
+    if isinstance(content, str):
+        return content
+    return ' '.join(block.get('text', '') for block in content if block.get('type') == 'text')
+
+
+def _result_message(block: dict) -> str:
+    """The one-line 'message' every tool result carries, from a serialized tool_result"""
+    try:
+        result = json.loads(block.get('content') or '{}')
+    except (TypeError, ValueError):
+        return ''
+    return result.get('message', '') if isinstance(result, dict) else ''
+
+
+def _tool_calls(turn: list) -> list:
+    """[(tool name, tool_use block id)] in the order the turn made them"""
+    return [(block['name'], block['id']) for message in turn if message['role'] == 'assistant'
+            and not isinstance(message['content'], str) for block in message['content']
+            if block.get('type') == 'tool_use']
+
+
+def _elide_tool_results(turn: list) -> tuple:
+    """(turn with each tool_result replaced by its one-line message, number replaced)"""
+    names = dict((tool_use_id, name) for name, tool_use_id in _tool_calls(turn))
+    elided = 0
+    compacted = []
+    for message in turn:
+        content = message['content']
+        if message['role'] == 'user' and not isinstance(content, str):
+            blocks = []
+            for block in content:
+                if block.get('type') == 'tool_result':
+                    note = f"[earlier {names.get(block.get('tool_use_id'), 'tool')} result] {_result_message(block)}"
+                    block = {**block, 'content': note.strip()}
+                    elided += 1
+                blocks.append(block)
+            message = {**message, 'content': blocks}
+        compacted.append(message)
+    return compacted, elided
+
+
+def summarize_turn(turn: list) -> str:
+    """One bullet for a dropped turn: what the customer said, what was done, what the agent answered"""
+    lines = [f"- Customer: {excerpt(_text(turn[0]['content']), SUMMARY_MESSAGE_CHARS)}"]
+    names = dict((tool_use_id, name) for name, tool_use_id in _tool_calls(turn))
+    for message in turn[1:]:
+        if message['role'] == 'user' and not isinstance(message['content'], str):
+            for block in message['content']:
+                if block.get('type') == 'tool_result':
+                    lines.append(f"  - {names.get(block.get('tool_use_id'), 'tool')}: {_result_message(block)}")
+    replies = [_text(message['content']) for message in turn[1:] if message['role'] == 'assistant']
+    reply = next((text for text in reversed(replies) if text.strip()), '')
+    if reply:
+        lines.append(f"  Agent: {excerpt(reply, SUMMARY_MESSAGE_CHARS)}")
+    return '\n'.join(lines)
+
+
+def _with_summary(message: dict, summary: str) -> dict:
+    """The first kept customer message, prefixed with the summary of the turns before it"""
+    content = message['content']
+    blocks = [{'type': 'text', 'text': content}] if isinstance(content, str) else list(content)
+    return {**message, 'content': [{'type': 'text', 'text': summary}] + blocks}
+
+
+def compact_messages(messages: list, budget_tokens: int, keep_turns: int = 2) -> tuple:
+    """(messages to send, report) - the messages fitted to about budget_tokens.
+
+    Nothing changes while the estimate is within budget. Past it, turns
+    older than the last `keep_turns` first lose their tool results (each
+    becomes its one-line message, e.g. "Refund processed for order ...");
+    if that is not enough, the oldest turns are dropped and replaced by a
+    short summary of what each asked, did and answered, prefixed to the
+    first kept customer message. The current turn is never changed, and
+    turns are cut whole so tool_use / tool_result pairs stay together.
+
+    The input list is not modified. The report holds the estimated tokens
+    before and after and what was elided or dropped.
+    """
+    before = estimate_tokens(messages)
+    report = {'tokens_before': before, 'tokens_after': before, 'elided_tool_results': 0, 'dropped_turns': 0}
+    if not budget_tokens or before <= budget_tokens:
+        return messages, report
+
+    originals = [messages[start:end] for start, end in _split_turns(messages)]
+    turns = list(originals)
+    elided = [0] * len(turns)
+    for i in range(max(len(turns) - max(keep_turns, 1), 0)):
+        turns[i], elided[i] = _elide_tool_results(turns[i])
+
+    sizes = [estimate_tokens(turn) for turn in turns]
+    total = sum(sizes)
+    summaries = []
+    dropped = 0
+    # Drop from the oldest, but never the current turn
+    while total > budget_tokens and dropped < len(turns) - 1:
+        turn = originals[dropped]
+        summary = summarize_turn(turn) if _is_turn_start(turn[0]) else ''
+        if summary:
+            summaries.append(summary)
+            total += estimate_tokens(summary)
+        total -= sizes[dropped]
+        dropped += 1
+
+    kept = [message for turn in turns[dropped:] for message in turn]
+    if summaries:
+        kept[0] = _with_summary(kept[0], '\n'.join([SUMMARY_HEADER] + summaries))
+    report['elided_tool_results'] = sum(elided[dropped:])
+    report['dropped_turns'] = dropped
+    report['tokens_after'] = estimate_tokens(kept)
+    return kept, report
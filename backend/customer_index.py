@@ -0,0 +1,185 @@
+"""
+Dr. Martens AI Customer Support - Customer listing index
+Inverted posting lists over the filterable customer fields plus a word
+prefix index on customer and product names, for paginated /api/customers
+"""
+
+import re
+from bisect import bisect_left
+
+import numpy as np
+
+# Exact-match filters (a value matches case-insensitively on its string form)
+FILTER_FIELDS = ['issue_category', 'priority_level', 'sentiment', 'star_rating', 'product_name', 'escalation_needed']
+
+# Fields searched by the ?q= word prefix search
+PREFIX_FIELDS = ['customer_name', 'product_name']
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def _factorize(values: list):
+    """(int32 code per value, distinct values in first-seen order)"""
+    ids = {}
+    codes = np.fromiter((ids.setdefault(value, len(ids)) for value in values), dtype=np.int32, count=len(values))
+    return codes, list(ids)
+
+
+def _field_codes(store, field: str):
+    """(int32 codes, distinct values) for one field, reusing a columnar store's dictionary encoding"""
+    encoded = store.field_codes(field) if hasattr(store, 'field_codes') else None
+    if encoded is None:
+        return _factorize(store.field_values(field))
+    codes, categories = encoded
+    return np.array(codes, dtype=np.int32), list(categories)
+
+
+def _group(codes: np.ndarray, groups: int):
+    """CSR posting lists: rows of group g are postings[indptr[g]:indptr[g + 1]], ascending"""
+    postings = np.argsort(codes, kind='stable').astype(np.int32)
+    indptr = np.zeros(groups + 1, dtype=np.int64)
+    np.cumsum(np.bincount(codes, minlength=groups), out=indptr[1:])
+    return indptr, postings
+
+
+def _union(parts: list, size: int) -> np.ndarray:
+    """Sorted union of sorted rank arrays, through a membership mask rather than a sort"""
+    if len(parts) == 1:
+        return parts[0]
+    mask = np.zeros(size, dtype=bool)
+    for part in parts:
+        mask[part] = True
+    return np.flatnonzero(mask).astype(np.int32)
+
+
+class CustomerIndex:
+    """Read-only secondary indexes over one version of the customer store.
+
+    Customers are numbered by rank in order_number order, and every
+    posting list is a sorted array of ranks - filters are intersections of
+    sorted arrays, and a page is a slice of the result after the cursor
+    (the last order number already returned). Because the order is by
+    order number rather than load position, a cursor stays valid across
+    reloads.
+    """
+
+    def __init__(self, orders: np.ndarray, fields: dict, words: list, word_indptr: np.ndarray,
+                 word_postings: np.ndarray):
+        self.orders = orders
+        # field -> (lowercased value -> [group ids], indptr, postings)
+        self.fields = fields
+        self.words = words
+        self.word_indptr = word_indptr
+        self.word_postings = word_postings
+
+    @classmethod
+    def build(cls, store) -> 'CustomerIndex':
+        encoded = [order.encode('utf-8') for order in store]
+        orders = np.array(encoded, dtype=bytes) if encoded else np.zeros(0, dtype='S1')
+        ranking = np.argsort(orders, kind='stable')
+        orders = orders[ranking]
+
+        fields, distinct = {}, {}
+        for field in dict.fromkeys(FILTER_FIELDS + PREFIX_FIELDS):
+            codes, uniques = _field_codes(store, field)
+            indptr, postings = _group(codes[ranking], len(uniques))
+            lookup = {}
+            for group, value in enumerate(uniques):
+                lookup.setdefault(str(value).lower(), []).append(group)
+            fields[field] = (lookup, indptr, postings)
+            distinct[field] = uniques
+
+        # Word -> ranks, built from each distinct name once rather than from every row
+        vocabulary = {}
+        word_ids, groups, field_ids = [], [], []
+        for field_id, field in enumerate(PREFIX_FIELDS):
+            for group, value in enumerate(distinct[field]):
+                for word in set(_WORD.findall(str(value).lower())):
+                    word_ids.append(vocabulary.setdefault(word, len(vocabulary)))
+                    groups.append(group)
+                    field_ids.append(field_id)
+        words = sorted(vocabulary)
+        alphabetical = np.zeros(len(words), dtype=np.int64)
+        alphabetical[[vocabulary[word] for word in words]] = np.arange(len(words))
+        word_ids = alphabetical[np.array(word_ids, dtype=np.int64)]
+        groups = np.array(groups, dtype=np.int64)
+        field_ids = np.array(field_ids, dtype=np.int64)
+
+        rank_parts, word_parts = [], []
+        for field_id, field in enumerate(PREFIX_FIELDS):
+            _, indptr, postings = fields[field]
+            mask = field_ids == field_id
+            starts, lengths = indptr[groups[mask]], np.diff(indptr)[groups[mask]]
+            # Concatenate postings[start:start + length] for every (word, name) pair without a Python loop
+            offsets = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths) + np.arange(lengths.sum())
+            rank_parts.append(postings[offsets].astype(np.uint64))
+            word_parts.append(np.repeat(word_ids[mask], lengths).astype(np.uint64))
+        if rank_parts:
+            keys = np.unique((np.concatenate(word_parts) << np.uint64(32)) | np.concatenate(rank_parts))
+        else:
+            keys = np.zeros(0, dtype=np.uint64)
+        word_indptr = np.zeros(len(words) + 1, dtype=np.int64)
+        np.cumsum(np.bincount((keys >> np.uint64(32)).astype(np.int64), minlength=len(words)), out=word_indptr[1:])
+        word_postings = (keys & np.uint64(0xFFFFFFFF)).astype(np.int32)
+        return cls(orders, fields, words, word_indptr, word_postings)
+
+    def __len__(self) -> int:
+        return len(self.orders)
+
+    def nbytes(self) -> int:
+        return (self.orders.nbytes + self.word_indptr.nbytes + self.word_postings.nbytes
+                + sum(indptr.nbytes + postings.nbytes for _, indptr, postings in self.fields.values()))
+
+    # -------------------------------------------------------------------------
+    # Queries
+    # -------------------------------------------------------------------------
+    def _field_ranks(self, field: str, values: list) -> np.ndarray:
+        """Ranks matching any of `values` (case-insensitive) for one field"""
+        lookup, indptr, postings = self.fields[field]
+        groups = [group for value in values for group in lookup.get(str(value).lower(), [])]
+        parts = [postings[indptr[group]:indptr[group + 1]] for group in groups]
+        return _union(parts, len(self.orders)) if parts else np.zeros(0, dtype=np.int32)
+
+    def _prefix_ranks(self, prefix: str) -> np.ndarray:
+        """Ranks with a name or product word starting with `prefix` - one contiguous run of words"""
+        lo = bisect_left(self.words, prefix)
+        hi = bisect_left(self.words, prefix + '\U0010ffff', lo)
+        parts = [self.word_postings[self.word_indptr[word]:self.word_indptr[word + 1]] for word in range(lo, hi)]
+        return _union(parts, len(self.orders)) if parts else np.zeros(0, dtype=np.int32)
+
+    def match(self, filters: dict = None, query: str = None):
+        """Sorted ranks matching every filter and every word prefix of `query`; None means all"""
+        candidates = [self._field_ranks(field, values) for field, values in (filters or {}).items() if values]
+        candidates += [self._prefix_ranks(word) for word in _WORD.findall((query or '').lower())]
+        if not candidates:
+            return None
+        # Start from the most selective list and keep only ranks present in each of the others
+        candidates.sort(key=len)
+        ranks = candidates[0]
+        for other in candidates[1:]:
+            if not len(ranks):
+                break
+            member = np.zeros(len(self.orders), dtype=bool)
+            member[other] = True
+            ranks = ranks[member[ranks]]
+        return ranks
+
+    def search(self, filters: dict = None, query: str = None, cursor: str = None, limit: int = 100) -> dict:
+        """One page of order numbers after `cursor`, plus the total match count and the next cursor"""
+        ranks = self.match(filters, query)
+        start = 0 if not cursor else int(np.searchsorted(self.orders, cursor.encode('utf-8'), side='right'))
+        if ranks is None:
+            count = len(self.orders)
+            page = np.arange(start, min(start + limit, count))
+            more = start + limit < count
+        else:
+            count = len(ranks)
+            offset = int(np.searchsorted(ranks, start))
+            page = ranks[offset:offset + limit]
+            more = offset + limit < count
+        order_numbers = [order.decode('utf-8') for order in self.orders[page].tolist()]
+        return {
+            'count': count,
+            'order_numbers': order_numbers,
+            'next_cursor': order_numbers[-1] if more and order_numbers else None,
+        }
@@ -0,0 +1,572 @@
+"""
+Dr. Martens AI Customer Support - Compact customer record store
+Column-oriented storage behind the customer_reviews_db[order] lookup API,
+plus a memory-mappable snapshot format for fast cold starts
+"""
+
+import hashlib
+import json
+import mmap
+import os
+from array import array
+from collections import Counter
+from collections.abc import MutableMapping
+from itertools import accumulate
+
+import numpy as np
+
+
+# Field order of the customer dicts returned by the API
+CUSTOMER_FIELDS = [
+    'order_number', 'star_rating', 'customer_name', 'review_title', 'review_text',
+    'review_date', 'product_name', 'product_url', 'issue_category', 'action_required',
+    'priority_level', 'suggested_resolution', 'integration_system',
+    'escalation_needed', 'sentiment',
+]
+
+# Mostly-unique free text, stored as UTF-8 bytes in one buffer per column
+TEXT_FIELDS = ['customer_name', 'review_title', 'review_text']
+
+# Low-cardinality values, stored once per distinct value plus a small code per row
+CATEGORICAL_FIELDS = [
+    field for field in CUSTOMER_FIELDS
+    if field != 'order_number' and field not in TEXT_FIELDS
+]
+
+# Fields whose value counts are kept up to date for the KPI dashboard
+COUNTED_FIELDS = ['issue_category', 'priority_level', 'escalation_needed']
+
+
+def _to_array(typecode: str, values) -> array:
+    """Writable array copy of an array or a (possibly memory-mapped) memoryview"""
+    if isinstance(values, memoryview):
+        copied = array(typecode)
+        copied.frombytes(values.cast('B'))
+        return copied
+    return array(typecode, values)
+
+
+def _code_typecode(size: int) -> str:
+    """Smallest unsigned array typecode that can index `size` categories"""
+    if size <= 0xFF:
+        return 'B'
+    if size <= 0xFFFF:
+        return 'H'
+    return 'I'
+
+
+# =============================================================================
+# COLUMNS
+# =============================================================================
+class CategoricalColumn:
+    """Dictionary-encoded column: distinct values + one small integer code per row"""
+
+    __slots__ = ('categories', 'codes', '_lookup')
+
+    def __init__(self, categories: list = None, codes: array = None):
+        self.categories = list(categories or [])
+        self._lookup = {value: code for code, value in enumerate(self.categories)}
+        self.codes = codes if codes is not None else array(_code_typecode(len(self.categories)))
+
+    @classmethod
+    def from_codes(cls, codes, categories: list) -> 'CategoricalColumn':
+        return cls(categories, array(_code_typecode(len(categories)), codes))
+
+    def _writable(self):
+        # Snapshot-backed codes are read-only views until the first write
+        if isinstance(self.codes, memoryview):
+            self.codes = _to_array(self.codes.format, self.codes)
+
+    def _encode(self, value) -> int:
+        self._writable()
+        code = self._lookup.get(value)
+        if code is None:
+            code = len(self.categories)
+            self.categories.append(value)
+            self._lookup[value] = code
+            if _code_typecode(code + 1) != self.codes.typecode:
+                self.codes = array(_code_typecode(code + 1), self.codes)
+        return code
+
+    def __getitem__(self, row: int):
+        return self.categories[self.codes[row]]
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def append(self, value):
+        # Encode first: it may replace self.codes (widened or made writable)
+        code = self._encode(value)
+        self.codes.append(code)
+
+    def set(self, row: int, value):
+        self.codes[row] = self._encode(value)
+
+    def copy(self) -> 'CategoricalColumn':
+        typecode = self.codes.format if isinstance(self.codes, memoryview) else self.codes.typecode
+        return CategoricalColumn(self.categories, _to_array(typecode, self.codes))
+
+    def nbytes(self) -> int:
+        return self.codes.itemsize * len(self.codes)
+
+
+class TextColumn:
+    """UTF-8 text packed into a single buffer, addressed by (start, length) per row"""
+
+    __slots__ = ('data', 'starts', 'lengths')
+
+    def __init__(self, data=None, starts: array = None, lengths: array = None):
+        self.data = data if data is not None else bytearray()
+        self.starts = starts if starts is not None else array('Q')
+        self.lengths = lengths if lengths is not None else array('I')
+
+    @classmethod
+    def from_strings(cls, strings) -> 'TextColumn':
+        encoded = [s.encode('utf-8') for s in strings]
+        lengths = array('I', map(len, encoded))
+        starts = array('Q', accumulate(lengths, initial=0))
+        starts.pop()
+        return cls(bytearray(b''.join(encoded)), starts, lengths)
+
+    def __getitem__(self, row: int) -> str:
+        start = self.starts[row]
+        return str(self.data[start:start + self.lengths[row]], 'utf-8')
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def _writable(self):
+        # Snapshot-backed buffers are read-only views until the first write
+        if not isinstance(self.data, bytearray):
+            self.data = bytearray(self.data)
+            self.starts = _to_array('Q', self.starts)
+            self.lengths = _to_array('I', self.lengths)
+
+    def append(self, value: str):
+        self._writable()
+        encoded = value.encode('utf-8')
+        self.starts.append(len(self.data))
+        self.lengths.append(len(encoded))
+        self.data += encoded
+
+    def set(self, row: int, value: str):
+        # The old bytes are left in place; updates are rare compared to lookups
+        self._writable()
+        encoded = value.encode('utf-8')
+        self.starts[row] = len(self.data)
+        self.lengths[row] = len(encoded)
+        self.data += encoded
+
+    def copy(self) -> 'TextColumn':
+        return TextColumn(bytearray(self.data), _to_array('Q', self.starts), _to_array('I', self.lengths))
+
+    def nbytes(self) -> int:
+        return len(self.data) + self.starts.itemsize * len(self.starts) + self.lengths.itemsize * len(self.lengths)
+
+
+class OrderColumn:
+    """Order numbers packed as sorted fixed-width bytes, for lookups without a Python object per row.
+
+    keys are sorted; rows[i] is the row holding keys[i] and positions[row]
+    is where a row's key sits in keys, so a lookup is a binary search
+    (np.searchsorted) and iteration follows row order. Rows added after
+    packing are looked up in a small dict until the next pack(). Deleted
+    rows, and earlier rows of a duplicated order, keep their key but are
+    marked dead in `live`; the live row of an order is always its latest.
+    """
+
+    __slots__ = ('keys', 'rows', 'positions', 'live', 'tail', 'tail_keys', 'count')
+
+    # Rows appended before the tail is folded into the packed keys
+    TAIL_MIN = 4096
+
+    def __init__(self, keys: np.ndarray = None, rows: np.ndarray = None, positions: np.ndarray = None,
+                 live=None):
+        if keys is None:
+            keys, rows, positions = _sort_keys(np.array([], dtype='S1'))
+        self.keys, self.rows, self.positions = keys, rows, positions
+        if live is None:
+            live = np.ones(len(keys), dtype=np.uint8)
+            # Equal keys sort in row order (stable), so all but the last of each run are shadowed
+            live[rows[:-1][keys[:-1] == keys[1:]]] = 0
+        self.live = bytearray(live)
+        self.tail = {}
+        self.tail_keys = []
+        self.count = self.live.count(1)
+
+    @classmethod
+    def from_strings(cls, orders) -> 'OrderColumn':
+        return cls(*_sort_keys(np.array([order.encode('utf-8') for order in orders], dtype='S')))
+
+    def find(self, order):
+        """Row of the live order, or None"""
+        row = self.tail.get(order)
+        if row is not None or not isinstance(order, str) or not len(self.keys):
+            return row
+        key = order.encode('utf-8')
+        if len(key) > self.keys.itemsize:
+            return None
+        # The last of equal keys is the latest row, the only one that can be live
+        position = int(np.searchsorted(self.keys, key, side='right')) - 1
+        if position < 0 or self.keys[position] != key:
+            return None
+        row = int(self.rows[position])
+        return row if self.live[row] else None
+
+    def key(self, row: int) -> str:
+        packed = len(self.keys)
+        return str(self.keys[self.positions[row]], 'utf-8') if row < packed else self.tail_keys[row - packed]
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __iter__(self):
+        packed = len(self.keys)
+        for start in range(0, packed, 10_000):
+            live = np.frombuffer(self.live, dtype=np.uint8, count=min(10_000, packed - start), offset=start)
+            rows = np.flatnonzero(live) + start
+            del live
+            yield from (str(key, 'utf-8') for key in self.keys[self.positions[rows]].tolist())
+        for row, order in enumerate(self.tail_keys, packed):
+            if self.live[row]:
+                yield order
+
+    @property
+    def size(self) -> int:
+        """Rows, live or not"""
+        return len(self.live)
+
+    def live_rows(self):
+        """Live rows in row (= iteration) order"""
+        if self.count == len(self.live):
+            return range(len(self.live))
+        return np.flatnonzero(np.frombuffer(self.live, dtype=np.uint8)).tolist()
+
+    def append(self, order: str) -> int:
+        row = len(self.live)
+        self.live.append(1)
+        self.tail[order] = row
+        self.tail_keys.append(order)
+        self.count += 1
+        if len(self.tail_keys) > max(self.TAIL_MIN, len(self.keys) // 4):
+            self.pack()
+        return row
+
+    def delete(self, row: int):
+        self.live[row] = 0
+        self.count -= 1
+        if row >= len(self.keys):
+            del self.tail[self.tail_keys[row - len(self.keys)]]
+
+    def packed(self) -> tuple:
+        """(keys, rows, positions) covering every row, tail included"""
+        if not self.tail_keys:
+            return self.keys, self.rows, self.positions
+        tail = np.array([order.encode('utf-8') for order in self.tail_keys], dtype='S')
+        return _sort_keys(np.concatenate([self.keys[self.positions], tail]))
+
+    def pack(self):
+        self.keys, self.rows, self.positions = self.packed()
+        self.tail = {}
+        self.tail_keys = []
+
+    def copy(self) -> 'OrderColumn':
+        # The packed arrays are only ever replaced, never written, so copies share them
+        column = OrderColumn.__new__(OrderColumn)
+        column.keys, column.rows, column.positions = self.keys, self.rows, self.positions
+        column.live = bytearray(self.live)
+        column.tail = dict(self.tail)
+        column.tail_keys = list(self.tail_keys)
+        column.count = self.count
+        return column
+
+    def nbytes(self) -> int:
+        return self.keys.nbytes + self.rows.nbytes + self.positions.nbytes + len(self.live)
+
+
+def _sort_keys(keys: np.ndarray) -> tuple:
+    """(sorted keys, row of each sorted key, position of each row's key) for keys in row order"""
+    rows = np.argsort(keys, kind='stable').astype(np.uint32)
+    positions = np.empty(len(keys), dtype=np.uint32)
+    positions[rows] = np.arange(len(keys), dtype=np.uint32)
+    return keys[rows], rows, positions
+
+
+# =============================================================================
+# CUSTOMER STORE
+# =============================================================================
+class CustomerStore(MutableMapping):
+    """Order number -> customer dict, backed by compact columns.
+
+    Rows are expanded into a fresh dict (same keys and values as the old
+    per-order dicts) on every lookup, so callers can't mutate the store by
+    editing a returned record - assign it back with store[order] = record.
+
+    Value counts for COUNTED_FIELDS are maintained on every insert, update
+    and delete, so dashboard aggregates never need a scan.
+
+    Order numbers are an OrderColumn too: 19 bytes per row (key, two
+    uint32 index entries and a live flag) instead of ~105 for a str, a list
+    slot and a dict entry. At 100k rows (bench_load_customer_data.py) the
+    store holds 29.8 MB against 53.7 MB for the old dict of dicts; what is
+    left is mostly the review text buffer.
+    """
+
+    def __init__(self, order_numbers: list = None, columns: dict = None):
+        order_numbers = order_numbers or []
+        self._columns = columns or {
+            **{field: TextColumn() for field in TEXT_FIELDS},
+            **{field: CategoricalColumn() for field in CATEGORICAL_FIELDS},
+        }
+        # Later rows win on duplicate order numbers; earlier rows become unreachable
+        self._orders = OrderColumn.from_strings(order_numbers)
+        self._counts = {field: self._count_column(field) for field in COUNTED_FIELDS}
+
+    def copy(self) -> 'CustomerStore':
+        """Independent copy (buffers are duplicated, not shared)"""
+        store = CustomerStore.__new__(CustomerStore)
+        store._columns = {field: column.copy() for field, column in self._columns.items()}
+        store._orders = self._orders.copy()
+        store._counts = {field: Counter(counts) for field, counts in self._counts.items()}
+        return store
+
+    @classmethod
+    def from_records(cls, records) -> 'CustomerStore':
+        store = cls()
+        for record in records:
+            store[record['order_number']] = record
+        return store
+
+    # -------------------------------------------------------------------------
+    # Mapping interface
+    # -------------------------------------------------------------------------
+    def _row_to_dict(self, order: str, row: int) -> dict:
+        columns = self._columns
+        return {
+            field: order if field == 'order_number' else columns[field][row]
+            for field in CUSTOMER_FIELDS
+        }
+
+    def __getitem__(self, order: str) -> dict:
+        row = self._orders.find(order)
+        if row is None:
+            raise KeyError(order)
+        return self._row_to_dict(order, row)
+
+    def __contains__(self, order) -> bool:
+        return self._orders.find(order) is not None
+
+    def __iter__(self):
+        return iter(self._orders)
+
+    def __len__(self) -> int:
+        return len(self._orders)
+
+    def __setitem__(self, order: str, record: dict):
+        columns = self._columns
+        row = self._orders.find(order)
+        if row is None:
+            self._orders.append(order)
+            for field, column in columns.items():
+                column.append(record[field])
+        else:
+            self._uncount(row)
+            for field, column in columns.items():
+                column.set(row, record[field])
+        self._count(record)
+
+    def __delitem__(self, order: str):
+        # The row's storage stays allocated; it is simply marked dead
+        row = self._orders.find(order)
+        if row is None:
+            raise KeyError(order)
+        self._orders.delete(row)
+        self._uncount(row)
+
+    # -------------------------------------------------------------------------
+    # Aggregates
+    # -------------------------------------------------------------------------
+    def _count_column(self, field: str) -> Counter:
+        column = self._columns[field]
+        if len(self._orders) == self._orders.size:
+            codes = Counter(column.codes)
+        else:
+            codes = Counter(column.codes[row] for row in self._orders.live_rows())
+        return Counter({column.categories[code]: n for code, n in codes.items()})
+
+    def _count(self, record: dict):
+        for field in COUNTED_FIELDS:
+            self._counts[field][record[field]] += 1
+
+    def _uncount(self, row: int):
+        for field in COUNTED_FIELDS:
+            counts = self._counts[field]
+            value = self._columns[field][row]
+            counts[value] -= 1
+            if not counts[value]:
+                del counts[value]
+
+    def value_counts(self, field: str) -> dict:
+        """Number of live orders per value of a COUNTED_FIELDS field"""
+        return dict(self._counts[field])
+
+    def check_counts(self) -> dict:
+        """Compare the maintained counts with a full recompute.
+
+        Returns {field: (maintained, recomputed)} for every field that
+        disagrees - an empty dict means the aggregates are consistent.
+        """
+        mismatches = {}
+        for field in COUNTED_FIELDS:
+            recomputed = Counter(record[field] for record in self.values())
+            if recomputed != self._counts[field]:
+                mismatches[field] = (dict(self._counts[field]), dict(recomputed))
+        return mismatches
+
+    def field_values(self, field: str) -> list:
+        """One field for every live order, in iteration order (no per-row dicts)"""
+        column = self._columns[field]
+        return [column[row] for row in self._orders.live_rows()]
+
+    def field_codes(self, field: str):
+        """(codes, categories) of a categorical field for every live order in iteration order.
+
+        codes[i] indexes categories; None for text fields. The codes may be
+        the column's own buffer, so copy them before the store changes.
+        """
+        column = self._columns.get(field)
+        if not isinstance(column, CategoricalColumn):
+            return None
+        if len(self._orders) == self._orders.size:
+            return column.codes, column.categories
+        return array('I', (column.codes[row] for row in self._orders.live_rows())), column.categories
+
+    def nbytes(self) -> int:
+        """Approximate size of the packed column buffers"""
+        return sum(column.nbytes() for column in self._columns.values())
+
+    # -------------------------------------------------------------------------
+    # Snapshots
+    # -------------------------------------------------------------------------
+    def save_snapshot(self, path: str, meta: dict = None, extras: dict = None):
+        """Write the column buffers to `path` in the layout open_snapshot() maps back.
+
+        `meta` is any JSON-serializable dict (e.g. the source file's
+        fingerprint); `extras` are extra named arrays stored alongside.
+        Written to a temporary file and renamed, so readers never see a
+        partial snapshot.
+        """
+        segments = []
+        offset = 0
+
+        def segment(buffer) -> dict:
+            nonlocal offset
+            raw = memoryview(buffer).cast('B')
+            entry = {'offset': offset, 'nbytes': raw.nbytes}
+            segments.append(raw)
+            offset += _aligned(raw.nbytes)
+            return entry
+
+        keys, rows, positions = self._orders.packed()
+        columns = {}
+        for field, column in self._columns.items():
+            if isinstance(column, TextColumn):
+                columns[field] = {'kind': 'text', 'data': segment(column.data),
+                                  'starts': segment(column.starts), 'lengths': segment(column.lengths)}
+            else:
+                codes = column.codes
+                typecode = codes.format if isinstance(codes, memoryview) else codes.typecode
+                columns[field] = {'kind': 'categorical', 'categories': column.categories,
+                                  'typecode': typecode, 'codes': segment(codes)}
+        header = {
+            'meta': meta or {},
+            'rows': self._orders.size,
+            'orders': {'width': keys.itemsize, 'keys': segment(keys), 'rows': segment(rows),
+                       'positions': segment(positions), 'live': segment(self._orders.live)},
+            'columns': columns,
+            'counts': {field: list(counts.items()) for field, counts in self._counts.items()},
+            'extras': {name: {'typecode': values.typecode, **segment(values)}
+                       for name, values in (extras or {}).items()},
+        }
+        header_bytes = json.dumps(header).encode('utf-8')
+        prefix = SNAPSHOT_MAGIC + len(header_bytes).to_bytes(8, 'little') + header_bytes
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(prefix)
+            f.write(bytes(_aligned(len(prefix)) - len(prefix)))
+            for raw in segments:
+                f.write(raw)
+                f.write(bytes(_aligned(raw.nbytes) - raw.nbytes))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def open_snapshot(cls, path: str):
+        """Memory-map a snapshot written by save_snapshot().
+
+        Returns (store, meta, extras), or None if the file is missing or
+        not a snapshot. Nothing is built up front: order keys and their
+        sorted index are searched in place, and column buffers are read
+        from the mapping on demand (and copied into memory the first time
+        a column is written to). Only the live flags are copied.
+        """
+        try:
+            with open(path, 'rb') as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        view = memoryview(mapped)
+        if view[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+            return None
+        header_start = len(SNAPSHOT_MAGIC) + 8
+        header_length = int.from_bytes(view[len(SNAPSHOT_MAGIC):header_start], 'little')
+        try:
+            header = json.loads(str(view[header_start:header_start + header_length], 'utf-8'))
+        except ValueError:
+            return None
+        base = _aligned(header_start + header_length)
+
+        def segment(entry: dict, typecode: str = 'B') -> memoryview:
+            start = base + entry['offset']
+            return view[start:start + entry['nbytes']].cast(typecode)
+
+        store = cls.__new__(cls)
+        orders = header['orders']
+        store._orders = OrderColumn(np.frombuffer(segment(orders['keys']), dtype=f"S{orders['width']}"),
+                                    np.frombuffer(segment(orders['rows']), dtype=np.uint32),
+                                    np.frombuffer(segment(orders['positions']), dtype=np.uint32),
+                                    segment(orders['live']))
+        store._columns = {}
+        for field, spec in header['columns'].items():
+            if spec['kind'] == 'text':
+                store._columns[field] = TextColumn(segment(spec['data']), segment(spec['starts'], 'Q'),
+                                                   segment(spec['lengths'], 'I'))
+            else:
+                store._columns[field] = CategoricalColumn(spec['categories'],
+                                                          segment(spec['codes'], spec['typecode']))
+        store._counts = {field: Counter(dict(pairs)) for field, pairs in header['counts'].items()}
+        extras = {name: segment(spec, spec['typecode']) for name, spec in header['extras'].items()}
+        return store, header['meta'], extras
+
+
+# =============================================================================
+# SNAPSHOT FILES
+# =============================================================================
+SNAPSHOT_MAGIC = b'DMSTORE2'
+
+
+def _aligned(size: int) -> int:
+    # Segments start on 8-byte boundaries so they can be cast to 64-bit arrays
+    return -(-size // 8) * 8
+
+
+def file_fingerprint(path: str, known: dict = None) -> dict:
+    """Size, mtime and sha256 of a file; the hash is reused from `known` while size and mtime match"""
+    stat = os.stat(path)
+    if known and known.get('size') == stat.st_size and known.get('mtime_ns') == stat.st_mtime_ns:
+        return known
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while chunk := f.read(1 << 20):
+            digest.update(chunk)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': digest.hexdigest()}
@@ -0,0 +1,108 @@
+"""
+Dr. Martens AI Customer Support - Customer dataset hot reload
+Polls the loaded CSV (or a drop directory for new scraper exports) and hands
+changed files to a reload callback on a background thread
+"""
+
+import glob
+import os
+import threading
+import time
+from datetime import datetime
+
+
+class DatasetReloader:
+    """Watches a CSV file, or the newest *.csv in a drop directory.
+
+    `reload(path)` does the actual work and returns the row delta it
+    applied ({'added': n, 'changed': n, 'removed': n}); this class only
+    decides when to call it and keeps the numbers for /api/health.
+    """
+
+    def __init__(self, reload, path: str = None, drop_dir: str = None, interval: float = 10.0):
+        self.reload = reload
+        self.path = path
+        self.drop_dir = drop_dir
+        self.interval = interval
+        self._signature = self._stat(path) if path else None
+        self._lock = threading.Lock()
+        self._thread = None
+        self.reloads = 0
+        self.errors = 0
+        self.last_error = None
+        self.last_reload = None
+
+    @staticmethod
+    def _stat(path: str):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def source(self):
+        """The file to load: newest CSV in the drop directory, else the watched path"""
+        if self.drop_dir:
+            candidates = glob.glob(os.path.join(self.drop_dir, '*.csv'))
+            if candidates:
+                return max(candidates, key=os.path.getmtime)
+        return self.path
+
+    def check(self) -> bool:
+        """Reload if the source changed since the last check; True when a reload ran"""
+        with self._lock:
+            path = self.source()
+            signature = self._stat(path) if path else None
+            if signature is None or (path == self.path and signature == self._signature):
+                return False
+            # Wait for the writer to finish: the file must be stable across one short pause
+            time.sleep(0.2)
+            if self._stat(path) != signature:
+                return False
+
+            start = time.perf_counter()
+            try:
+                delta = self.reload(path)
+            except Exception as e:
+                self.errors += 1
+                self.last_error = f"{path}: {e}"
+                # Don't retry a broken file until it changes again
+                self.path, self._signature = path, signature
+                print(f"❌ Failed to reload {path}: {e}")
+                return False
+            self.path, self._signature = path, signature
+            self.reloads += 1
+            self.last_reload = {
+                'source': path,
+                'at': datetime.now().isoformat(timespec='seconds'),
+                'duration_ms': round((time.perf_counter() - start) * 1000, 1),
+                **delta,
+            }
+            print(f"🔄 Reloaded {path}: +{delta.get('added', 0)} ~{delta.get('changed', 0)} "
+                  f"-{delta.get('removed', 0)} rows in {self.last_reload['duration_ms']:.0f} ms")
+            return True
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.check()
+            except Exception as e:
+                print(f"❌ Dataset watcher error: {e}")
+
+    def start(self):
+        """Start polling on a daemon thread (no-op if already running or disabled)"""
+        if self._thread is None and self.interval > 0:
+            self._thread = threading.Thread(target=self._run, name='dataset-reloader', daemon=True)
+            self._thread.start()
+
+    def stats(self) -> dict:
+        return {
+            'enabled': self._thread is not None,
+            'watching': self.drop_dir or self.path,
+            'interval_seconds': self.interval,
+            'reloads': self.reloads,
+            'errors': self.errors,
+            'last_error': self.last_error,
+            'last_reload': self.last_reload,
+        }
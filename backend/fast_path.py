@@ -0,0 +1,217 @@
+"""
+Dr. Martens AI Customer Support - Local fast-path router
+Answers clear-cut turns (greetings, and a bare "yes" to a repair/exchange/refund/
+appointment the agent just offered for a known order) from templates and direct
+tool calls; everything ambiguous, qualified or escalating still goes to the Claude agent.
+"""
+
+import re
+import threading
+import time
+
+from issue_classifier import IssueClassifier
+
+GREETING = re.compile(
+    r'^\s*(hi|hello|hey|hiya|good (morning|afternoon|evening))( there)?[\s!.,]*$', re.IGNORECASE
+)
+THANKS = re.compile(r'^\s*(thanks|thank you|cheers)( so much| very much)?[\s!.,]*$', re.IGNORECASE)
+# A bare confirmation: a yes, then only politeness (or the size for an exchange).
+# Anything else ("yes but...", "sure, or a refund instead") may qualify it, so the agent reads it
+_CONFIRM_WORD = r"(yes|yeah|yep|yup|sure|ok|okay|please do|go ahead|do it)"
+_CONFIRM_TAIL = r"(please|please do|thanks|thank you|cheers|go ahead|do it|sounds good|size\s*\d{1,2}(\.5)?)"
+CONFIRMATION = re.compile(
+    rf'^\s*{_CONFIRM_WORD}([\s,.!]+{_CONFIRM_TAIL})*[\s,.!]*$', re.IGNORECASE
+)
+QUESTION = re.compile(r'[^.!?\n]*\?')
+SIZE = re.compile(r'\bsize\s*(\d{1,2}(?:\.5)?)\b', re.IGNORECASE)
+
+# Classifier action -> tool the fast path may run directly
+ACTION_TOOLS = {
+    'repair': 'initiate_repair',
+    'exchange': 'create_exchange',
+    'refund': 'process_refund',
+    'appointment': 'book_appointment',
+}
+
+# Categories whose playbook is escalation always need the agent's judgement
+ESCALATING_CATEGORIES = {
+    category for category, pattern in IssueClassifier.ISSUE_PATTERNS.items() if pattern['action'] == 'escalate'
+}
+
+
+def _last_assistant_text(history: list) -> str:
+    """Text of the most recent assistant message ('' if there is none)"""
+    for message in reversed(history):
+        if message.get('role') != 'assistant':
+            continue
+        content = message.get('content')
+        if isinstance(content, str):
+            return content
+        return ' '.join(block.get('text', '') for block in content or [] if block.get('type') == 'text')
+    return ''
+
+
+def _offered_action(history: list) -> str:
+    """The question that closed the last assistant message, e.g. "Shall I start a repair?" ('' if none)"""
+    questions = QUESTION.findall(_last_assistant_text(history))
+    return questions[-1].strip() if questions else ''
+
+
+def _tool_input(tool_name: str, message: str, customer: dict, offer: str = '') -> dict:
+    order_number = customer['order_number']
+    if tool_name == 'initiate_repair':
+        return {'order_number': order_number, 'issue_description': customer.get('review_title') or 'Product issue'}
+    if tool_name == 'create_exchange':
+        size = SIZE.search(message) or SIZE.search(offer)
+        return {'order_number': order_number, 'new_size': size.group(1), 'reason': 'Size exchange'}
+    if tool_name == 'process_refund':
+        return {'order_number': order_number, 'reason': 'Customer requested refund'}
+    return {'customer_name': customer.get('customer_name', 'Customer')}
+
+
+def _action_reply(tool_name: str, result: dict, customer: dict) -> str:
+    name = customer.get('customer_name', 'there')
+    product = result.get('product') or customer.get('product_name', 'your order')
+    if tool_name == 'initiate_repair':
+        return (f"Done, {name}! I've started a For Life warranty repair for your {product} "
+                f"(repair ID {result['repair_id']}). A prepaid shipping label is on its way to your email "
+                f"and repairs usually take {result['estimated_time']}. Anything else I can help with?")
+    if tool_name == 'create_exchange':
+        return (f"All set, {name}! Your exchange for the {product} is created (exchange ID {result['exchange_id']}, "
+                f"new size: {result['new_size']}). The return label is in your email and the new pair ships "
+                f"expedited in 2-3 days.")
+    if tool_name == 'process_refund':
+        return (f"I've processed your refund, {name} (refund ID {result['refund_id']}). You'll see "
+                f"{result['amount']} back on your original payment method within {result['estimated_time']}. "
+                f"As an apology, here's {result['discount_value']} with code {result['discount_code']}.")
+    slots = ', '.join(result.get('available_slots', []))
+    return (f"Happy to book that, {name}! Available fitting slots at {result['store']}: {slots}. "
+            f"Which one works best for you?")
+
+
+class FastPathRouter:
+    """Decides per turn whether the deterministic pipeline can answer it.
+
+    A turn runs an action locally only when the message is a bare
+    confirmation ("yes please", nothing that could qualify it) and the
+    previous assistant message was a question offering exactly one action -
+    classified with confidence at least `threshold`. Bare greetings and
+    thanks are answered too. Tracks how many turns skipped the LLM and the
+    latency that saved. `execute_tool` is the agent's async
+    tool runner, so fast-path actions get the same timeouts.
+    """
+
+    def __init__(self, execute_tool, threshold: float = 0.8, enabled: bool = True):
+        self.execute_tool = execute_tool
+        self.threshold = threshold
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.fast_turns = 0
+        self.llm_turns = 0
+        self.fast_ms_total = 0.0
+        self.llm_ms_total = 0.0
+        self.by_intent = {}
+
+    def _decide(self, message: str, customer: dict, history: list):
+        """(intent, tool_name) for a turn the fast path can answer, else None"""
+        if GREETING.match(message) and not customer and not history:
+            return 'greeting', None
+        if THANKS.match(message) and history:
+            return 'thanks', None
+        # Actions run only on a plain yes to the one action the agent just offered
+        if not customer or not CONFIRMATION.match(message):
+            return None
+        if customer.get('priority_level') == 'critical':
+            return None
+        offer = _offered_action(history)
+        if not offer:
+            return None
+        classification = IssueClassifier.classify(offer)
+        categories = {match['issue_type'] for match in classification['matches']}
+        if categories & ESCALATING_CATEGORIES:
+            return None
+        tool_name = ACTION_TOOLS.get(classification['action'])
+        # Below the threshold the offer named more than one action (e.g. "repair or refund?")
+        if tool_name is None or classification['confidence'] < self.threshold:
+            return None
+        # An exchange needs the new size; let the agent ask for it
+        if tool_name == 'create_exchange' and not (SIZE.search(message) or SIZE.search(offer)):
+            return None
+        return classification['action'], tool_name
+
+    async def route(self, message: str, customer: dict = None, history: list = None):
+        """Events for a locally answered turn (same shapes as agent_events), or None"""
+        if not self.enabled:
+            return None
+        start = time.perf_counter()
+        decision = self._decide(message, customer, history or [])
+        if decision is None:
+            return None
+        intent, tool_name = decision
+
+        events = []
+        tool_results = []
+        if intent == 'greeting':
+            response = ("Hello! I'm your Dr. Martens AI assistant. I can help with returns, repairs, "
+                        "exchanges, and store appointments. How can I help you today?")
+        elif intent == 'thanks':
+            response = "You're very welcome! Is there anything else I can help you with?"
+        else:
+            tool_input = _tool_input(tool_name, message, customer, _offered_action(history or []))
+            events.append({"type": "tool_started", "iteration": 0, "tool_use_id": f"fast_{tool_name}",
+                           "tool": tool_name, "input": tool_input})
+            tool_start = time.perf_counter()
+            result = await self.execute_tool(tool_name, tool_input)
+            if not result.get('success'):
+                # e.g. a timeout - the agent can explain or retry
+                return None
+            events.append({"type": "tool_finished", "iteration": 0, "tool_use_id": f"fast_{tool_name}",
+                           "tool": tool_name, "result": result,
+                           "duration_ms": round((time.perf_counter() - tool_start) * 1000, 1)})
+            tool_results.append({"tool": tool_name, "input": tool_input, "result": result})
+            response = _action_reply(tool_name, result, customer)
+
+        events.append({"type": "text_delta", "iteration": 0, "text": response})
+        events.append({
+            "type": "done",
+            "response": response,
+            "tool_results": tool_results,
+            "timings": [],
+            "cached": False,
+            "fast_path": intent,
+            "conversation_history": (history or []) + [
+                {"role": "user", "content": message},
+                {"role": "assistant", "content": [{"type": "text", "text": response}]},
+            ],
+        })
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with self._lock:
+            self.fast_turns += 1
+            self.fast_ms_total += elapsed_ms
+            self.by_intent[intent] = self.by_intent.get(intent, 0) + 1
+        return events
+
+    def record_llm_turn(self, elapsed_ms: float):
+        with self._lock:
+            self.llm_turns += 1
+            self.llm_ms_total += elapsed_ms
+
+    def stats(self) -> dict:
+        with self._lock:
+            turns = self.fast_turns + self.llm_turns
+            avg_fast = self.fast_ms_total / self.fast_turns if self.fast_turns else 0.0
+            avg_llm = self.llm_ms_total / self.llm_turns if self.llm_turns else 0.0
+            return {
+                'enabled': self.enabled,
+                'threshold': self.threshold,
+                'turns': turns,
+                'fast_path_turns': self.fast_turns,
+                'llm_turns': self.llm_turns,
+                'llm_call_rate': round(self.llm_turns / turns, 3) if turns else 0.0,
+                'by_intent': dict(self.by_intent),
+                'avg_fast_path_ms': round(avg_fast, 2),
+                'avg_llm_turn_ms': round(avg_llm, 1),
+                # Each fast turn would otherwise have cost an average LLM turn
+                'estimated_ms_saved': round(self.fast_turns * max(avg_llm - avg_fast, 0.0), 1),
+            }
@@ -0,0 +1,114 @@
+"""
+Dr. Martens AI Customer Support - Issue classifier
+Keyword triage of a customer message into an issue category, the action
+and integration system that handle it, and a suggested resolution
+"""
+
+from keyword_matcher import KeywordMatcher
+
+
+class IssueClassifier:
+    """Hybrid classification system - keyword triage + RAG for complex cases"""
+    
+    ISSUE_PATTERNS = {
+        'refund': {
+            'keywords': ['refund', 'money back', 'return', 'returning', 'reimburse'],
+            'action': 'refund',
+            'system': 'shopify_returns',
+            'priority': 'high'
+        },
+        'repair': {
+            'keywords': ['repair', 'broke', 'broken', 'sole', 'damaged', 'defect', 'separated', 'detached', 'ripped', 'torn'],
+            'action': 'repair',
+            'system': 'repair_flow',
+            'priority': 'high'
+        },
+        'sizing': {
+            'keywords': ['size', 'fit', 'tight', 'loose', 'small', 'large', 'uncomfortable', 'exchange'],
+            'action': 'exchange',
+            'system': 'pos_inventory',
+            'priority': 'medium'
+        },
+        'quality': {
+            'keywords': ['quality', 'cheap', 'poor', 'disappointing', 'color', 'faded'],
+            'action': 'escalate',
+            'system': 'zendesk_escalation',
+            'priority': 'high'
+        },
+        'customer_service': {
+            'keywords': ['customer service', 'support', 'no response', 'unhelpful', 'rude', 'manager', 'ignored'],
+            'action': 'escalate',
+            'system': 'zendesk_escalation',
+            'priority': 'critical'
+        },
+        'shipping': {
+            'keywords': ['shipping', 'delivery', 'late', 'delayed', 'lost', 'tracking', 'arrived damaged'],
+            'action': 'investigate',
+            'system': 'shipping_tracker',
+            'priority': 'medium'
+        },
+        'appointment': {
+            'keywords': ['appointment', 'store', 'try on', 'visit', 'fitting'],
+            'action': 'appointment',
+            'system': 'pos_booking',
+            'priority': 'low'
+        }
+    }
+    
+    RESOLUTION_MAP = {
+        'refund': 'Process full refund + 10% discount code for inconvenience',
+        'repair': 'Initiate For Life repair service with prepaid shipping label',
+        'exchange': 'Free size exchange with expedited shipping',
+        'escalate': 'Escalate to senior support specialist for immediate attention',
+        'investigate': 'Open shipping investigation + provide tracking update',
+        'appointment': 'Book in-store fitting appointment with product specialist',
+        'knowledge_base': 'Provide relevant information from knowledge base'
+    }
+    
+    _matcher = None
+    
+    @classmethod
+    def matcher(cls) -> KeywordMatcher:
+        """Single compiled matcher over every category's keywords (built once)"""
+        if cls._matcher is None:
+            cls._matcher = KeywordMatcher({
+                issue_type: pattern['keywords'] for issue_type, pattern in cls.ISSUE_PATTERNS.items()
+            })
+        return cls._matcher
+    
+    @classmethod
+    def classify(cls, text: str) -> dict:
+        """Classify customer issue from text.
+        
+        All categories are scored by whole-word keyword hits in one pass;
+        the highest score wins (ties go to the category listed first).
+        """
+        ranked = cls.matcher().scores(text)
+        matches = [
+            {'issue_type': issue_type, 'score': score, 'keywords': keywords}
+            for issue_type, score, keywords in ranked
+        ]
+        
+        if ranked:
+            issue_type, top_score, _ = ranked[0]
+            pattern = cls.ISSUE_PATTERNS[issue_type]
+            return {
+                'issue_type': issue_type,
+                'action': pattern['action'],
+                'system': pattern['system'],
+                'priority': pattern['priority'],
+                'suggested_resolution': cls.RESOLUTION_MAP.get(pattern['action'], 'Provide assistance'),
+                'confidence': round(top_score / sum(match['score'] for match in matches), 2),
+                'matches': matches
+            }
+        
+        # Default classification for general inquiries
+        return {
+            'issue_type': 'general',
+            'action': 'knowledge_base',
+            'system': 'rag_knowledge',
+            'priority': 'low',
+            'suggested_resolution': cls.RESOLUTION_MAP['knowledge_base'],
+            'confidence': 0.0,
+            'matches': []
+        }
@@ -0,0 +1,77 @@
+"""
+Dr. Martens AI Customer Support - Compiled multi-keyword matcher
+One regex for every keyword of every category, shaped as a trie so a scan
+costs O(text length) however many keywords there are
+"""
+
+import re
+
+
+def _trie_pattern(node: dict) -> str:
+    """Regex for a trie node: one branch per distinct next character"""
+    end = '' in node
+    branches = []
+    singles = []
+    for char in sorted(key for key in node if key):
+        child = node[char]
+        if list(child) == [''] and char != ' ':
+            singles.append(char)
+        else:
+            branches.append(_escape(char) + _trie_pattern(child))
+    if singles:
+        branches.append(_escape(singles[0]) if len(singles) == 1 else
+                        '[' + ''.join(re.escape(char) for char in singles) + ']')
+    if not branches:
+        return ''
+    pattern = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+    return f'(?:{pattern})?' if end else pattern
+
+
+def _escape(char: str) -> str:
+    # Any run of whitespace in the text matches a space in a keyword
+    return r'\s+' if char == ' ' else re.escape(char)
+
+
+def _normalize(keyword: str) -> str:
+    return ' '.join(keyword.lower().split())
+
+
+class KeywordMatcher:
+    """Finds whole-word keyword hits for many categories in a single pass.
+
+    Keywords match on word boundaries ('fit' does not match 'outfit') and
+    also in their plural form ('size' matches 'sizes'). Multi-word keywords
+    tolerate any whitespace between words. Overlapping keywords resolve to
+    the longest one ('arrived damaged' rather than 'damaged').
+    """
+
+    def __init__(self, keywords_by_category: dict):
+        self.categories = list(keywords_by_category)
+        self._categories_by_keyword = {}
+        trie = {}
+        for category, keywords in keywords_by_category.items():
+            for keyword in keywords:
+                keyword = _normalize(keyword)
+                self._categories_by_keyword.setdefault(keyword, []).append(category)
+                node = trie
+                for char in keyword:
+                    node = node.setdefault(char, {})
+                node[''] = True
+        self._regex = re.compile(rf'(?<!\w)({_trie_pattern(trie)})(?:e?s)?(?!\w)') if trie else None
+
+    def find(self, text: str) -> dict:
+        """{category: [keyword, ...]} for every keyword occurrence in text"""
+        hits = {}
+        if self._regex is None:
+            return hits
+        for match in self._regex.finditer(text.lower()):
+            keyword = _normalize(match.group(1))
+            for category in self._categories_by_keyword[keyword]:
+                hits.setdefault(category, []).append(keyword)
+        return hits
+
+    def scores(self, text: str) -> list:
+        """[(category, score, keywords)] best first; ties keep category order"""
+        hits = self.find(text)
+        ranked = sorted(hits, key=lambda category: (-len(hits[category]), self.categories.index(category)))
+        return [(category, len(hits[category]), sorted(set(hits[category]))) for category in ranked]
@@ -0,0 +1,184 @@
+"""
+Dr. Martens AI Customer Support - Order number resolution
+Precompiled order-number extraction plus a deletion-neighbourhood index that
+suggests the closest real orders for a mistyped one
+"""
+
+import re
+
+import numpy as np
+
+# Order numbers as customers type them in chat (DM + 7-10 digits)
+ORDER_NUMBER = re.compile(r'DM\d{7,10}', re.IGNORECASE)
+
+# Orders the fuzzy index covers: DM + digits, up to 18 so the value fits in an int64
+# (matched a line at a time over all order numbers joined by newlines)
+MAX_DIGITS = 18
+_INDEXED_ORDERS = re.compile(rf'^DM(\d{{1,{MAX_DIGITS}}})$', re.MULTILINE)
+_NON_DIGIT = re.compile(r'\D')
+
+
+def extract_order_number(text: str):
+    """First order number mentioned in text (upper-cased), or None"""
+    match = ORDER_NUMBER.search(text or '')
+    return match.group().upper() if match else None
+
+
+def _deletions(digits: str) -> set:
+    return {digits[:i] + digits[i + 1:] for i in range(len(digits))}
+
+
+def _single_edits(digits: str) -> set:
+    """Every string one substitution, insertion, deletion or adjacent swap away"""
+    variants = {digits[:i] + d + digits[i + 1:] for i in range(len(digits)) for d in '0123456789'}
+    variants |= {digits[:i] + d + digits[i:] for i in range(len(digits) + 1) for d in '0123456789'}
+    variants |= _deletions(digits)
+    variants |= {digits[:i] + digits[i + 1] + digits[i] + digits[i + 2:] for i in range(len(digits) - 1)}
+    variants.discard(digits)
+    return variants
+
+
+def _digits(values: np.ndarray, length: int) -> np.ndarray:
+    """(len(values), length) matrix of decimal digits, most significant first"""
+    return values[:, None] // 10 ** np.arange(length - 1, -1, -1, dtype=np.int64) % 10
+
+
+def _delete_each_digit(values: np.ndarray, length: int):
+    """(deletion values, index of the value each came from) for every single-digit deletion"""
+    low_width = 10 ** np.arange(length - 1, -1, -1, dtype=np.int64)
+    deletions = values[:, None] // (low_width * 10) * low_width + values[:, None] % low_width
+    return deletions.ravel(), np.repeat(np.arange(len(values)), length)
+
+
+def _one_apart(a: np.ndarray, b: np.ndarray, length: int) -> np.ndarray:
+    """Mask of pairs of equal-length values one substitution or one adjacent swap apart"""
+    da, db = _digits(a, length), _digits(b, length)
+    differs = da != db
+    mismatches = differs.sum(axis=1)
+    first = differs.argmax(axis=1)
+    second = np.minimum(first + 1, length - 1)
+    rows = np.arange(len(a))
+    swapped = ((mismatches == 2) & differs[rows, second]
+               & (da[rows, first] == db[rows, second]) & (da[rows, second] == db[rows, first]))
+    return (mismatches == 1) | swapped
+
+
+class _LengthGroup:
+    """Orders whose digit part has one particular length"""
+
+    def __init__(self, length: int, values: np.ndarray):
+        self.length = length
+        # Exact values, sorted; a rank is a position in this array
+        self.values = np.unique(values).astype(np.uint32 if length <= 9 else np.int64)
+        # Every single-digit deletion of every order, sorted, with the rank of the order it came from
+        keys, ranks = _delete_each_digit(self.values.astype(np.int64), length)
+        order = np.argsort(keys, kind='stable')
+        self.deletion_keys = keys[order].astype(np.uint32 if length - 1 <= 9 else np.int64)
+        self.deletion_ranks = ranks[order].astype(np.int32)
+
+    def order(self, rank: int) -> str:
+        return f"DM{int(self.values[rank]):0{self.length}d}"
+
+    def exact(self, keys: np.ndarray) -> np.ndarray:
+        """Ranks of the keys that are orders"""
+        if not len(self.values):
+            return np.zeros(0, np.int64)
+        keys = keys.astype(self.values.dtype)
+        positions = np.minimum(np.searchsorted(self.values, keys), len(self.values) - 1)
+        return positions[self.values[positions] == keys]
+
+    def deleted(self, keys: np.ndarray):
+        """(key index, rank) for every order that becomes keys[index] after deleting one digit"""
+        keys = keys.astype(self.deletion_keys.dtype)
+        lo = np.searchsorted(self.deletion_keys, keys, side='left')
+        lengths = np.searchsorted(self.deletion_keys, keys, side='right') - lo
+        # Concatenate deletion_ranks[lo:hi] for every key without a Python loop
+        offsets = np.repeat(lo - (np.cumsum(lengths) - lengths), lengths) + np.arange(lengths.sum())
+        return np.repeat(np.arange(len(keys)), lengths), self.deletion_ranks[offsets]
+
+    def nbytes(self) -> int:
+        return self.values.nbytes + self.deletion_keys.nbytes + self.deletion_ranks.nbytes
+
+
+class OrderNumberIndex:
+    """Closest real order numbers to a mistyped one, within two edits.
+
+    An edit is a digit substituted, inserted, deleted, or two adjacent
+    digits swapped (Damerau-Levenshtein distance).
+
+    Only the digits are compared (every indexed order starts with DM, so
+    "D M2438 2608" or "dm24382608" resolve too). Each order is stored with
+    all its single-digit deletions, grouped by length and sorted: two
+    strings one edit apart always share a deletion, so the distance-1
+    neighbours of a query are a few dozen binary searches plus a digit
+    comparison. Distance-2 neighbours are the distance-1 neighbours of the
+    query's single-edit variants, looked up in one vectorized batch - only
+    needed when no order is within distance 1.
+    """
+
+    def __init__(self, groups: dict):
+        self.groups = groups
+
+    @classmethod
+    def build(cls, orders) -> 'OrderNumberIndex':
+        digits = _INDEXED_ORDERS.findall('\n'.join(orders))
+        if not digits:
+            return cls({})
+        lengths = np.fromiter(map(len, digits), dtype=np.int64, count=len(digits))
+        values = np.array(digits).astype(np.int64)
+        return cls({int(length): _LengthGroup(int(length), values[lengths == length])
+                    for length in np.unique(lengths)})
+
+    def __len__(self) -> int:
+        return sum(len(group.values) for group in self.groups.values())
+
+    def nbytes(self) -> int:
+        return sum(group.nbytes() for group in self.groups.values())
+
+    def _neighbours(self, variants) -> dict:
+        """{order: 0 or 1} for every order within one edit of any of the digit strings"""
+        found = {}
+        by_length = {}
+        for variant in variants:
+            # Longer than any indexed order (and than int64 holds)
+            if len(variant) <= MAX_DIGITS:
+                by_length.setdefault(len(variant), []).append(int(variant))
+        for length, values in by_length.items():
+            values = np.array(values, dtype=np.int64)
+            deletions, owners = _delete_each_digit(values, length)
+            group = self.groups.get(length)
+            if group is not None:
+                for rank in group.exact(values).tolist():
+                    found[group.order(rank)] = 0
+                # Same length: one substitution or adjacent swap leaves a common deletion
+                key_index, ranks = group.deleted(deletions)
+                close = _one_apart(values[owners[key_index]], group.values[ranks].astype(np.int64), length)
+                for rank in np.unique(ranks[close]).tolist():
+                    found.setdefault(group.order(rank), 1)
+            # One digit shorter: a deletion of the variant is an order
+            shorter = self.groups.get(length - 1)
+            if shorter is not None and length > 1:
+                for rank in np.unique(shorter.exact(deletions)).tolist():
+                    found.setdefault(shorter.order(rank), 1)
+            # One digit longer: the variant is a deletion of an order
+            longer = self.groups.get(length + 1)
+            if longer is not None:
+                for rank in np.unique(longer.deleted(values)[1]).tolist():
+                    found.setdefault(longer.order(rank), 1)
+        return found
+
+    def suggest(self, order_number: str, k: int = 3, max_distance: int = 2) -> list:
+        """[(order_number, distance)] for up to k of the nearest orders within max_distance.
+
+        Only the nearest distance found is returned: distance-2 orders are
+        looked for when nothing is within one edit.
+        """
+        digits = _NON_DIGIT.sub('', order_number or '')
+        if not digits or len(digits) > MAX_DIGITS:
+            return []
+        found = self._neighbours([digits])
+        if max_distance >= 2 and not found:
+            # Anything new here is two edits away: everything within one was found above
+            for order in self._neighbours(v for v in _single_edits(digits) if v):
+                found.setdefault(order, 2)
+        return sorted(found.items(), key=lambda item: (item[1], item[0]))[:k]
@@ -0,0 +1,80 @@
+"""
+Dr. Martens AI Customer Support - Response cache for opening questions
+Reuses the agent's answer to a repeated first message about the same order
+"""
+
+import hashlib
+import json
+import re
+import threading
+
+from order_index import ORDER_NUMBER
+from ttl_cache import TTLCache
+
+# Tools that change something outside the conversation - turns using them are never cached
+SIDE_EFFECT_TOOLS = {'process_refund', 'initiate_repair', 'create_exchange', 'escalate_to_human', 'book_appointment'}
+
+_NON_WORD = re.compile(r'[^\w\s]+')
+_SPACES = re.compile(r'\s+')
+
+
+def normalize_message(message: str) -> str:
+    """Lowercase, drop order numbers (they are keyed separately) and punctuation, collapse whitespace"""
+    text = ORDER_NUMBER.sub(' ', message.lower())
+    text = _NON_WORD.sub(' ', text)
+    return _SPACES.sub(' ', text).strip()
+
+
+def fingerprint(*parts) -> str:
+    """Short stable hash of JSON-serializable parts"""
+    payload = json.dumps(parts, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(payload).hexdigest()[:16]
+
+
+class ResponseCache:
+    """(orders, customer record, normalized message, prompt version) -> finished agent turn"""
+
+    def __init__(self, enabled: bool = False, max_entries: int = 5000, ttl_seconds: float = 3600):
+        self.enabled = enabled
+        self._cache = TTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self._lock = threading.Lock()
+        self.llm_calls_saved = 0
+        self.skipped_side_effects = 0
+
+    def key(self, customer: dict, message: str, prompt_version: str) -> tuple:
+        # Every order the message names is part of the key: when none is on file
+        # (customer is None) the answer is still about that particular order
+        orders = {order.upper() for order in ORDER_NUMBER.findall(message)}
+        if customer:
+            orders.add(customer.get('order_number', ''))
+        return (tuple(sorted(orders)), fingerprint(customer), normalize_message(message), prompt_version)
+
+    def get(self, key):
+        entry = self._cache.get(key)
+        if entry is not None:
+            with self._lock:
+                self.llm_calls_saved += entry['llm_calls']
+        return entry
+
+    def store(self, key, response: str, tool_results: list, messages: list, llm_calls: int) -> bool:
+        """Cache a finished turn unless it ran a side-effecting tool"""
+        if any(result['tool'] in SIDE_EFFECT_TOOLS for result in tool_results):
+            with self._lock:
+                self.skipped_side_effects += 1
+            return False
+        self._cache.set(key, {
+            'response': response,
+            'tool_results': tool_results,
+            'messages': messages,
+            'llm_calls': llm_calls,
+        })
+        return True
+
+    def stats(self) -> dict:
+        stats = self._cache.stats()
+        stats.update({
+            'enabled': self.enabled,
+            'llm_calls_saved': self.llm_calls_saved,
+            'skipped_side_effects': self.skipped_side_effects,
+        })
+        return stats
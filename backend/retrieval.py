@@ -0,0 +1,182 @@
+"""
+Dr. Martens AI Customer Support - Similar-case retrieval
+Sparse BM25 index over past reviews, stored as NumPy arrays so a query only
+touches the postings of its own terms
+"""
+
+import hashlib
+import json
+import os
+import re
+from itertools import islice
+
+import numpy as np
+
+INDEX_FORMAT_VERSION = 1
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_DOC_END = '\x00'
+_CORPUS_TOKEN = re.compile(r"[a-z0-9]+|\x00")
+STOPWORDS = frozenset(
+    'a an and are as at be but by for from had has have he her his i if in into is it its me my no not of '
+    'on or our she so that the their them then there they this to too very was we were what when which '
+    'who will with you your'.split()
+)
+
+
+def tokenize(text: str) -> list:
+    """Lowercase word tokens without stopwords or single characters"""
+    return [token for token in _TOKEN.findall(text.lower()) if len(token) > 1 and token not in STOPWORDS]
+
+
+def source_key(path: str, digest: str = None, **params) -> str:
+    """sha256 of the source file plus index parameters - a saved index is reused only on a match.
+
+    Pass `digest` (the file's sha256 hex) when the caller already has it.
+    """
+    if digest is None:
+        file_hash = hashlib.sha256()
+        with open(path, 'rb') as f:
+            while chunk := f.read(1 << 20):
+                file_hash.update(chunk)
+        digest = file_hash.hexdigest()
+    return hashlib.sha256(json.dumps([INDEX_FORMAT_VERSION, digest, params], sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def _pack_strings(strings) -> np.ndarray:
+    return np.frombuffer('\n'.join(strings).encode('utf-8'), dtype=np.uint8)
+
+
+def _unpack_strings(packed: np.ndarray) -> list:
+    text = packed.tobytes().decode('utf-8')
+    return text.split('\n') if text else []
+
+
+class _Vocabulary(dict):
+    """Term -> id, assigning the next id to unseen terms"""
+
+    def __missing__(self, term: str) -> int:
+        term_id = self[term] = len(self)
+        return term_id
+
+
+class BM25Index:
+    """Okapi BM25 over short documents, with precomputed impact-ordered postings.
+
+    Each term's postings hold (doc, score contribution) sorted by
+    contribution, best first, and are cut at `max_postings` - a query only
+    ever reads the strongest matches of its terms, so its cost does not
+    grow with the number of documents.
+    """
+
+    def __init__(self, doc_ids: list, vocabulary: list, indptr: np.ndarray, docs: np.ndarray, impacts: np.ndarray):
+        self.doc_ids = doc_ids
+        self.vocabulary = vocabulary
+        self._term_ids = {term: i for i, term in enumerate(vocabulary)}
+        self.indptr = indptr
+        self.docs = docs
+        self.impacts = impacts
+
+    @classmethod
+    def build(cls, doc_ids: list, texts, k1: float = 1.2, b: float = 0.75, max_postings: int = 1000,
+              chunk_size: int = 50_000) -> 'BM25Index':
+        vocabulary = _Vocabulary()
+        term_parts, doc_parts, tf_parts = [], [], []
+        n_docs = 0
+        texts = iter(texts)
+        while chunk := list(islice(texts, chunk_size)):
+            # One regex pass over the whole chunk; the separator token marks where each document ends
+            joined = f' {_DOC_END} '.join(text.replace(_DOC_END, ' ') for text in chunk)
+            tokens = _CORPUS_TOKEN.findall(joined.lower())
+            ids = np.fromiter(map(vocabulary.__getitem__, tokens), dtype=np.int64, count=len(tokens))
+            docs = n_docs + np.cumsum(ids == vocabulary[_DOC_END]) - (ids == vocabulary[_DOC_END])
+            # (doc, term) pairs -> term frequencies
+            pairs, tf = np.unique(docs * (1 << 32) + ids, return_counts=True)
+            doc_parts.append((pairs >> 32).astype(np.uint32))
+            term_parts.append((pairs & 0xFFFFFFFF).astype(np.uint32))
+            tf_parts.append(tf.astype(np.float32))
+            n_docs += len(chunk)
+
+        terms = np.concatenate(term_parts) if term_parts else np.zeros(0, np.uint32)
+        docs = np.concatenate(doc_parts) if doc_parts else np.zeros(0, np.uint32)
+        tf = np.concatenate(tf_parts) if tf_parts else np.zeros(0, np.float32)
+
+        # Drop stopwords, single characters and the separator, renumbering the rest
+        words = list(vocabulary)
+        kept_terms = np.array([len(w) > 1 and w not in STOPWORDS and w != _DOC_END for w in words], dtype=bool)
+        remap = np.cumsum(kept_terms) - 1
+        keep = kept_terms[terms] if len(words) else np.zeros(0, bool)
+        terms, docs, tf = remap[terms[keep]].astype(np.uint32), docs[keep], tf[keep]
+        words = [w for w, kept in zip(words, kept_terms) if kept]
+
+        lengths = np.bincount(docs, weights=tf, minlength=n_docs).astype(np.float32)
+        doc_freq = np.bincount(terms, minlength=len(words)).astype(np.float32)
+        idf = np.log1p((n_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+        avg_length = lengths.mean() if n_docs else 1.0
+        norm = k1 * (1 - b + b * lengths / max(avg_length, 1.0))
+        impacts = (idf[terms] * tf * (k1 + 1) / (tf + norm[docs])).astype(np.float32)
+
+        # Group by term, strongest contribution first, then keep each term's head.
+        # Positive float32s order like their bit patterns, so one uint64 key sorts both
+        key = terms.astype(np.uint64)
+        key <<= np.uint64(32)
+        key |= ~impacts.view(np.uint32)
+        order = np.argsort(key)
+        del key
+        terms, docs, impacts = terms[order], docs[order], impacts[order]
+        counts = doc_freq.astype(np.int64)
+        starts = np.cumsum(counts) - counts
+        keep = np.arange(len(terms)) - starts[terms] < max_postings
+        indptr = np.concatenate(([0], np.cumsum(np.minimum(counts, max_postings)))).astype(np.int64)
+        return cls(list(doc_ids), words, indptr, docs[keep].copy(), impacts[keep].copy())
+
+    def search(self, query: str, k: int = 5) -> list:
+        """[(doc_id, score)] for the k best-scoring documents"""
+        term_ids = {self._term_ids[token] for token in tokenize(query) if token in self._term_ids}
+        if not term_ids or k <= 0:
+            return []
+        slices = [slice(self.indptr[t], self.indptr[t + 1]) for t in term_ids]
+        if len(slices) == 1:
+            # One term: its postings are already ranked
+            docs, scores = self.docs[slices[0]][:k], self.impacts[slices[0]][:k]
+        else:
+            candidates = np.concatenate([self.docs[s] for s in slices])
+            unique_docs, inverse = np.unique(candidates, return_inverse=True)
+            totals = np.bincount(inverse, weights=np.concatenate([self.impacts[s] for s in slices]))
+            if len(totals) > k:
+                top = np.argpartition(-totals, k)[:k]
+            else:
+                top = np.arange(len(totals))
+            top = top[np.argsort(-totals[top], kind='stable')]
+            docs, scores = unique_docs[top], totals[top]
+        return [(self.doc_ids[doc], float(score)) for doc, score in zip(docs.tolist(), scores.tolist())]
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    def nbytes(self) -> int:
+        return self.indptr.nbytes + self.docs.nbytes + self.impacts.nbytes
+
+    # -------------------------------------------------------------------------
+    # Persistence
+    # -------------------------------------------------------------------------
+    def save(self, path: str, key: str):
+        # Write then rename, so a crash never leaves a half-written index behind
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, key=np.array(key), doc_ids=_pack_strings(self.doc_ids),
+                     vocabulary=_pack_strings(self.vocabulary), indptr=self.indptr,
+                     docs=self.docs, impacts=self.impacts)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, key: str):
+        """The saved index at path if it was built from the same source, else None"""
+        try:
+            with np.load(path) as saved:
+                if str(saved['key']) != key:
+                    return None
+                return cls(_unpack_strings(saved['doc_ids']), _unpack_strings(saved['vocabulary']),
+                           saved['indptr'], saved['docs'], saved['impacts'])
+        except (OSError, KeyError, ValueError):
+            return None
@@ -0,0 +1,89 @@
+"""
+Dr. Martens AI Customer Support - Server-side conversation sessions
+Keeps each chat's agent message list so clients only send the new message
+"""
+
+import json
+import threading
+import uuid
+
+from ttl_cache import TTLCache
+from usage import add_usage
+
+
+def content_to_dicts(content) -> list:
+    """Convert SDK content blocks (TextBlock, ToolUseBlock) to plain API dicts"""
+    blocks = []
+    for block in content:
+        if isinstance(block, dict):
+            blocks.append(block)
+        elif block.type == 'text':
+            blocks.append({'type': 'text', 'text': block.text})
+        elif block.type == 'tool_use':
+            blocks.append({'type': 'tool_use', 'id': block.id, 'name': block.name, 'input': block.input})
+    return blocks
+
+
+def _is_turn_start(message: dict) -> bool:
+    """A user message typed by the customer (not a tool_result carrier)"""
+    return message['role'] == 'user' and isinstance(message['content'], str)
+
+
+def trim_history(messages: list, max_messages: int) -> list:
+    """Keep the newest whole turns that fit in max_messages.
+
+    Cuts only at customer messages so tool_use / tool_result pairs are
+    never split. The latest turn is always kept, even if it is longer.
+    """
+    if len(messages) <= max_messages:
+        return messages
+    for start in range(len(messages) - max_messages, len(messages)):
+        if _is_turn_start(messages[start]):
+            return messages[start:]
+    for start in range(len(messages) - 1, -1, -1):
+        if _is_turn_start(messages[start]):
+            return messages[start:]
+    return messages
+
+
+class SessionStore:
+    """Session id -> agent `messages` list, bounded by count, idle TTL and bytes"""
+
+    def __init__(self, max_sessions: int = 10000, ttl_seconds: float = 1800,
+                 max_bytes: int = 64 * 1024 * 1024, max_messages: int = 40):
+        self.max_messages = max_messages
+        self._cache = TTLCache(
+            max_entries=max_sessions,
+            ttl_seconds=ttl_seconds,
+            max_bytes=max_bytes,
+            sizeof=lambda messages: len(json.dumps(messages)),
+        )
+        # Token usage so far per conversation; small, so bounded by count and TTL only
+        self._usage = TTLCache(max_entries=max_sessions, ttl_seconds=ttl_seconds)
+        self._usage_lock = threading.Lock()
+
+    @staticmethod
+    def new_session_id() -> str:
+        return uuid.uuid4().hex
+
+    def get_history(self, session_id: str) -> list:
+        """Stored messages for the session (a copy), or [] if unknown or expired"""
+        messages = self._cache.get(session_id)
+        return list(messages) if messages else []
+
+    def save_history(self, session_id: str, messages: list):
+        self._cache.set(session_id, trim_history(list(messages), self.max_messages))
+
+    def add_usage(self, session_id: str, usage: dict) -> dict:
+        """Add one turn's usage to the conversation's running total and return the total"""
+        with self._usage_lock:
+            total = add_usage(self._usage.get(session_id, {}), usage)
+            self._usage.set(session_id, total)
+        return total
+
+    def end(self, session_id: str) -> bool:
+        self._usage.pop(session_id)
+        return self._cache.pop(session_id) is not None
+
+    def stats(self) -> dict:
+        return self._cache.stats()
@@ -0,0 +1,286 @@
+"""
+Dr. Martens AI Customer Support - SQLite customer record store
+The customer_reviews_db[order] lookup API over a SQLite file in WAL mode, so
+datasets larger than memory work and every worker process shares one copy
+"""
+
+import json
+import sqlite3
+import threading
+from array import array
+from collections import Counter
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+
+from customer_store import COUNTED_FIELDS, CUSTOMER_FIELDS
+
+SCHEMA_VERSION = 1
+
+# Columns with an index, besides the order_number primary key
+INDEXED_FIELDS = ['issue_category', 'priority_level', 'escalation_needed', 'sentiment']
+
+# Stored as 0/1 by sqlite3, handed back as bool like the in-memory store does
+BOOLEAN_FIELDS = {'escalation_needed'}
+
+# Columns without a declared type have no affinity, so each value keeps its
+# Python type (e.g. a non-boolean escalation_needed stays a string)
+_COLUMN_TYPES = {'order_number': 'TEXT PRIMARY KEY', 'star_rating': 'INTEGER'}
+_ROW_COLUMNS = CUSTOMER_FIELDS + ['row_hash']
+
+_SCHEMA = [
+    f"""CREATE TABLE IF NOT EXISTS customers (
+        {', '.join(f"{field} {_COLUMN_TYPES.get(field, '')}".strip() for field in CUSTOMER_FIELDS)},
+        row_hash INTEGER
+    )""",
+    """CREATE TABLE IF NOT EXISTS value_counts (
+        field TEXT NOT NULL,
+        value,
+        n INTEGER NOT NULL,
+        PRIMARY KEY (field, value)
+    )""",
+    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)",
+]
+
+_INDEXES = [f"CREATE INDEX IF NOT EXISTS idx_customers_{field} ON customers ({field})" for field in INDEXED_FIELDS]
+
+
+def _count_statements(sign: str, row: str) -> str:
+    if sign == '+':
+        return ''.join(f"INSERT INTO value_counts VALUES ('{field}', {row}.{field}, 1) "
+                       f"ON CONFLICT (field, value) DO UPDATE SET n = n + 1; " for field in COUNTED_FIELDS)
+    return ''.join(f"UPDATE value_counts SET n = n - 1 WHERE field = '{field}' AND value IS {row}.{field}; "
+                   for field in COUNTED_FIELDS) + 'DELETE FROM value_counts WHERE n = 0; '
+
+
+# value_counts is kept in step with customers by triggers, like CustomerStore's counters
+_TRIGGERS = [
+    f"CREATE TRIGGER IF NOT EXISTS customers_count_insert AFTER INSERT ON customers "
+    f"BEGIN {_count_statements('+', 'NEW')}END",
+    f"CREATE TRIGGER IF NOT EXISTS customers_count_delete AFTER DELETE ON customers "
+    f"BEGIN {_count_statements('-', 'OLD')}END",
+    f"CREATE TRIGGER IF NOT EXISTS customers_count_update AFTER UPDATE ON customers "
+    f"BEGIN {_count_statements('-', 'OLD')}{_count_statements('+', 'NEW')}END",
+]
+
+_DROP_INDEXES_AND_TRIGGERS = (
+    [f"DROP INDEX IF EXISTS idx_customers_{field}" for field in INDEXED_FIELDS]
+    + [f"DROP TRIGGER IF EXISTS customers_count_{event}" for event in ('insert', 'delete', 'update')]
+)
+
+_SELECT_ROW = f"SELECT {', '.join(CUSTOMER_FIELDS)} FROM customers WHERE order_number = ?"
+_UPSERT = (
+    f"INSERT INTO customers ({', '.join(_ROW_COLUMNS)}) VALUES ({', '.join('?' * len(_ROW_COLUMNS))}) "
+    f"ON CONFLICT (order_number) DO UPDATE SET "
+    + ', '.join(f"{column} = excluded.{column}" for column in _ROW_COLUMNS[1:])
+)
+_INSERT = f"INSERT INTO customers ({', '.join(_ROW_COLUMNS)}) VALUES ({', '.join('?' * len(_ROW_COLUMNS))})"
+
+
+def _decode(field: str, value):
+    if field in BOOLEAN_FIELDS and type(value) is int:
+        return bool(value)
+    return value
+
+
+def _signed(row_hash):
+    # SQLite integers are signed 64-bit; hashes are stored with the same bits
+    return None if row_hash is None else row_hash - (1 << 64) if row_hash >= 1 << 63 else row_hash
+
+
+class SQLiteCustomerStore(MutableMapping):
+    """Order number -> customer dict, stored in a SQLite database file.
+
+    Same mapping interface and aggregates as CustomerStore. Each thread gets
+    its own connection; WAL mode lets any number of threads and worker
+    processes read while one writer applies a reload, and every write
+    (including a full replace) is one transaction, so readers see either
+    the old or the new version of the data.
+
+    Iteration order is insertion order (rowid), and updates keep a row in
+    place, matching CustomerStore.
+    """
+
+    def __init__(self, path: str, cache_mb: int = 16, mmap_mb: int = 256):
+        self.path = path
+        self.cache_mb = cache_mb
+        self.mmap_mb = mmap_mb
+        self._local = threading.local()
+        self._conn().execute('PRAGMA journal_mode = WAL')
+        with self._transaction() as conn:
+            for statement in _SCHEMA + _INDEXES + _TRIGGERS:
+                conn.execute(statement)
+            conn.execute("INSERT OR IGNORE INTO meta VALUES ('schema_version', ?)", (json.dumps(SCHEMA_VERSION),))
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # Autocommit mode: reads don't hold a transaction open; writes use explicit BEGIN
+            conn = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+            conn.execute('PRAGMA synchronous = NORMAL')
+            # Small private page cache; the shared OS page cache (via mmap) does the heavy lifting
+            conn.execute(f'PRAGMA cache_size = {-self.cache_mb * 1024}')
+            conn.execute(f'PRAGMA mmap_size = {self.mmap_mb * 1024 * 1024}')
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        # IMMEDIATE takes the write lock up front, so concurrent writers queue instead of failing mid-way
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    # -------------------------------------------------------------------------
+    # Metadata
+    # -------------------------------------------------------------------------
+    @property
+    def meta(self) -> dict:
+        """Everything stored with set_meta(), e.g. the source CSV's fingerprint"""
+        return {key: json.loads(value) for key, value in self._conn().execute('SELECT key, value FROM meta')}
+
+    def set_meta(self, **values):
+        with self._transaction() as conn:
+            conn.executemany('INSERT OR REPLACE INTO meta VALUES (?, ?)',
+                             [(key, json.dumps(value)) for key, value in values.items()])
+
+    # -------------------------------------------------------------------------
+    # Mapping interface
+    # -------------------------------------------------------------------------
+    def __getitem__(self, order: str) -> dict:
+        row = self._conn().execute(_SELECT_ROW, (order,)).fetchone()
+        if row is None:
+            raise KeyError(order)
+        return {field: _decode(field, value) for field, value in zip(CUSTOMER_FIELDS, row)}
+
+    def __contains__(self, order) -> bool:
+        return self._conn().execute('SELECT 1 FROM customers WHERE order_number = ?', (order,)).fetchone() is not None
+
+    def __iter__(self, batch_size: int = 10_000):
+        # Batched by rowid, so a slow consumer never holds a read transaction open
+        conn = self._conn()
+        last = -1
+        while True:
+            rows = conn.execute('SELECT rowid, order_number FROM customers WHERE rowid > ? ORDER BY rowid LIMIT ?',
+                                (last, batch_size)).fetchall()
+            if not rows:
+                return
+            for _, order in rows:
+                yield order
+            last = rows[-1][0]
+
+    def __len__(self) -> int:
+        # Every live row is counted once per counted field, so this needs no table scan
+        row = self._conn().execute('SELECT COALESCE(SUM(n), 0) FROM value_counts WHERE field = ?',
+                                   (COUNTED_FIELDS[0],)).fetchone()
+        return row[0]
+
+    def __setitem__(self, order: str, record: dict):
+        self.apply([{**record, 'order_number': order}])
+
+    def __delitem__(self, order: str):
+        with self._transaction() as conn:
+            if conn.execute('DELETE FROM customers WHERE order_number = ?', (order,)).rowcount == 0:
+                raise KeyError(order)
+
+    # -------------------------------------------------------------------------
+    # Bulk writes
+    # -------------------------------------------------------------------------
+    def apply(self, records=(), removed=(), row_hashes: dict = None, **meta):
+        """Upsert `records` and delete the `removed` orders (and store `meta`) in one transaction"""
+        row_hashes = row_hashes or {}
+        rows = [
+            [record[field] for field in CUSTOMER_FIELDS] + [_signed(row_hashes.get(record['order_number']))]
+            for record in records
+        ]
+        with self._transaction() as conn:
+            conn.executemany('DELETE FROM customers WHERE order_number = ?', [(order,) for order in removed])
+            conn.executemany(_UPSERT, rows)
+            conn.executemany('INSERT OR REPLACE INTO meta VALUES (?, ?)',
+                             [(key, json.dumps(value)) for key, value in meta.items()])
+
+    def replace_all(self, store, row_hashes=None, **meta):
+        """Replace every row with the contents of `store` (a CustomerStore) in one transaction.
+
+        Indexes and count triggers are dropped for the bulk insert and
+        rebuilt afterwards, which is several times faster than maintaining
+        them row by row. `row_hashes` lines up with iter(store); `meta` is
+        stored with set_meta() in the same transaction.
+        """
+        with self._transaction() as conn:
+            self._replace_rows(conn, store, row_hashes, meta)
+
+    def rebuild_if_stale(self, sha256: str, build) -> bool:
+        """Replace every row with build()'s result unless the stored source already has this sha256.
+
+        The check and the rebuild share one write transaction, so when several
+        workers open a stale database together only the first rebuilds - the
+        others wait for its lock and then find the new version. build() runs
+        only when needed and returns (store, row_hashes, meta) for replace_all.
+        Returns whether this call rebuilt.
+        """
+        with self._transaction() as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'source'").fetchone()
+            if row and (json.loads(row[0]) or {}).get('sha256') == sha256:
+                return False
+            store, row_hashes, meta = build()
+            self._replace_rows(conn, store, row_hashes, meta)
+        return True
+
+    def _replace_rows(self, conn, store, row_hashes, meta: dict):
+        orders = list(store)
+        columns = [orders] + [store.field_values(field) for field in CUSTOMER_FIELDS[1:]]
+        hashes = map(_signed, row_hashes) if row_hashes is not None else [None] * len(orders)
+        for statement in _DROP_INDEXES_AND_TRIGGERS:
+            conn.execute(statement)
+        conn.execute('DELETE FROM customers')
+        conn.execute('DELETE FROM value_counts')
+        conn.executemany(_INSERT, zip(*columns, hashes))
+        for field in COUNTED_FIELDS:
+            conn.execute(f"INSERT INTO value_counts SELECT '{field}', {field}, COUNT(*) "
+                         f"FROM customers GROUP BY {field}")
+        for statement in _INDEXES + _TRIGGERS:
+            conn.execute(statement)
+        conn.executemany('INSERT OR REPLACE INTO meta VALUES (?, ?)',
+                         [(key, json.dumps(value)) for key, value in meta.items()])
+
+    # -------------------------------------------------------------------------
+    # Aggregates
+    # -------------------------------------------------------------------------
+    def value_counts(self, field: str) -> dict:
+        """Number of live orders per value of a COUNTED_FIELDS field"""
+        rows = self._conn().execute('SELECT value, n FROM value_counts WHERE field = ?', (field,))
+        return {_decode(field, value): n for value, n in rows}
+
+    def check_counts(self) -> dict:
+        """Compare the trigger-maintained counts with a GROUP BY over the table"""
+        mismatches = {}
+        conn = self._conn()
+        for field in COUNTED_FIELDS:
+            maintained = Counter(self.value_counts(field))
+            recomputed = Counter({_decode(field, value): n for value, n in
+                                  conn.execute(f'SELECT {field}, COUNT(*) FROM customers GROUP BY {field}')})
+            if maintained != recomputed:
+                mismatches[field] = (dict(maintained), dict(recomputed))
+        return mismatches
+
+    def field_values(self, field: str) -> list:
+        """One field for every live order, in iteration order"""
+        if field not in CUSTOMER_FIELDS:
+            raise KeyError(field)
+        rows = self._conn().execute(f'SELECT {field} FROM customers ORDER BY rowid')
+        return [_decode(field, value) for value, in rows]
+
+    def row_hashes(self) -> array:
+        """Stored row hashes in iteration order, as unsigned 64-bit values (0 where missing)"""
+        rows = self._conn().execute('SELECT COALESCE(row_hash, 0) FROM customers ORDER BY rowid')
+        return array('Q', array('q', (value for value, in rows)).tobytes())
+
+    def nbytes(self) -> int:
+        """Size of the database file's pages"""
+        conn = self._conn()
+        return conn.execute('PRAGMA page_count').fetchone()[0] * conn.execute('PRAGMA page_size').fetchone()[0]
@@ -0,0 +1,124 @@
+"""
+Dr. Martens AI Customer Support - Structured, non-blocking logging
+One JSON (or key=value) line per event, formatted and written by a
+background listener thread so request handlers only pay for an enqueue
+"""
+
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+
+class RawJSON(str):
+    """Already-serialized JSON, embedded in a log line as-is instead of being encoded again"""
+
+
+def _encode(value) -> str:
+    return value if isinstance(value, RawJSON) else json.dumps(value, default=str)
+
+
+class JsonFormatter(logging.Formatter):
+    """{"ts", "level", "logger", "event", ...fields} on one line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        ts = datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds')
+        parts = [f'"ts":"{ts}"', f'"level":"{record.levelname}"', f'"logger":"{record.name}"',
+                 f'"event":{json.dumps(record.getMessage())}']
+        parts += [f'{json.dumps(key)}:{_encode(value)}' for key, value in getattr(record, 'fields', {}).items()]
+        if record.exc_info:
+            parts.append(f'"exc":{json.dumps(self.formatException(record.exc_info))}')
+        return '{' + ','.join(parts) + '}'
+
+
+class TextFormatter(logging.Formatter):
+    """time LEVEL event key=value ... for reading in a terminal"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields = ' '.join(f'{key}={_encode(value)}' for key, value in getattr(record, 'fields', {}).items())
+        line = f"{self.formatTime(record, '%H:%M:%S')} {record.levelname:<7} {record.getMessage()} {fields}".rstrip()
+        if record.exc_info:
+            line += '\n' + self.formatException(record.exc_info)
+        return line
+
+
+FORMATTERS = {'json': JsonFormatter, 'text': TextFormatter}
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler that never blocks or formats on the caller's thread.
+
+    The stock handler formats every record before enqueueing it (so it can
+    be pickled); here the queue stays in-process, so the record is passed
+    as-is and the listener thread does all formatting and I/O. When the
+    queue is full the record is dropped and counted rather than stalling
+    a request behind a slow console.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class DrainingQueueListener(QueueListener):
+    """QueueListener whose stop() waits for room in a full queue (instead of raising queue.Full)"""
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+    def stop(self):
+        # Safe to call twice (explicitly, then again at exit)
+        if self._thread is not None:
+            super().stop()
+
+
+def setup_logging(name: str, level='INFO', fmt: str = 'json', queue_size: int = 10000, stream=None):
+    """(logger, listener) - `name` logs through a bounded queue to `stream` (default stdout).
+
+    The logger does not propagate, so records are written once even when a
+    server (gunicorn, uvicorn) configures the root logger. The listener
+    is stopped, flushing the queue, at exit.
+    """
+    handler = logging.StreamHandler(stream or sys.stdout)
+    handler.setFormatter(FORMATTERS.get(fmt, JsonFormatter)())
+    log_queue = queue.Queue(maxsize=queue_size)
+    listener = DrainingQueueListener(log_queue, handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+    logger = logging.getLogger(name)
+    for old in [h for h in logger.handlers if isinstance(h, NonBlockingQueueHandler)]:
+        logger.removeHandler(old)
+    logger.addHandler(NonBlockingQueueHandler(log_queue))
+    logger.setLevel(level.upper() if isinstance(level, str) else level)
+    logger.propagate = False
+    return logger, listener
+
+
+def sampled(rate: float) -> bool:
+    """Whether to keep the routine (below WARNING) records of one request"""
+    return rate >= 1 or random.random() < rate
+
+
+def log_event(logger: logging.Logger, level: int, event: str, sample: bool = True, exc_info=None, **fields):
+    """Log `event` with structured fields; records below WARNING are skipped for unsampled requests.
+
+    Nothing is built unless the level is enabled - fields are only
+    serialized on the listener thread (RawJSON values are not at all).
+    """
+    if (level < logging.WARNING and not sample) or not logger.isEnabledFor(level):
+        return
+    logger.log(level, event, exc_info=exc_info, extra={'fields': fields})
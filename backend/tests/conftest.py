@@ -0,0 +1,6 @@
+"""Run the tests from anywhere: the backend modules import each other by bare name"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
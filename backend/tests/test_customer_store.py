@@ -0,0 +1,63 @@
+"""CustomerStore mapping behaviour over packed order numbers, in memory and from a snapshot"""
+
+import pytest
+
+from customer_store import CustomerStore, OrderColumn
+from test_customer_store_counts import make_record
+
+
+def test_duplicate_orders_keep_the_latest_row():
+    column = OrderColumn.from_strings(['DM1', 'DM22', 'DM1', 'DM333'])
+    assert len(column) == 3
+    assert column.find('DM1') == 2
+    assert list(column) == ['DM22', 'DM1', 'DM333']
+    assert column.find('DM2') is None
+    assert column.find('DM3333') is None
+    assert column.find(None) is None
+
+
+def test_mapping_through_inserts_deletes_and_packing(monkeypatch):
+    monkeypatch.setattr(OrderColumn, 'TAIL_MIN', 3)
+    store = CustomerStore.from_records([make_record(i) for i in range(10)])
+    expected = {f'DM{24000000 + i}': make_record(i) for i in range(10)}
+
+    del store['DM24000003']
+    del expected['DM24000003']
+    # Re-inserted after a delete: a new row at the end, found again
+    store['DM24000003'] = make_record(3)
+    expected['DM24000003'] = make_record(3)
+    store['DM9'] = {**make_record(11), 'order_number': 'DM9'}
+    expected['DM9'] = {**make_record(11), 'order_number': 'DM9'}
+    store['DM24000000'] = {**make_record(12), 'order_number': 'DM24000000'}
+    expected['DM24000000'] = {**make_record(12), 'order_number': 'DM24000000'}
+    # Enough new rows to fold the tail into the packed keys
+    for i in range(30, 35):
+        store[f'DM{24000000 + i}'] = expected[f'DM{24000000 + i}'] = make_record(i)
+    assert len(store._orders.keys) > 10
+    with pytest.raises(KeyError):
+        del store['DM24000099']
+
+    assert list(store) == list(expected)
+    assert dict(store.items()) == expected
+    assert 'DM24000003' in store and 'DM24000099' not in store
+
+    copy = store.copy()
+    del copy['DM9']
+    assert 'DM9' in store and 'DM9' not in copy
+
+
+def test_snapshot_round_trip(tmp_path):
+    store = CustomerStore.from_records([make_record(i) for i in range(10)])
+    del store['DM24000004']
+    store['DM7'] = {**make_record(20), 'order_number': 'DM7'}
+    path = str(tmp_path / 'customers.snapshot')
+    store.save_snapshot(path)
+
+    opened, _, _ = CustomerStore.open_snapshot(path)
+    assert list(opened) == list(store)
+    assert dict(opened.items()) == dict(store.items())
+    assert 'DM24000004' not in opened
+    # Still writable after mapping
+    opened['DM24000004'] = make_record(4)
+    del opened['DM7']
+    assert len(opened) == 10 and opened.check_counts() == {}
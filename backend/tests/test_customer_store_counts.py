@@ -0,0 +1,79 @@
+"""Maintained value counts of both customer stores stay in step with the rows"""
+
+from collections import Counter
+
+import pytest
+
+from customer_store import COUNTED_FIELDS, CUSTOMER_FIELDS, CustomerStore
+from sqlite_store import SQLiteCustomerStore
+
+CATEGORIES = ['product_defect', 'sizing_issue', 'delivery_issue']
+PRIORITIES = ['low', 'medium', 'high', 'critical']
+
+
+def make_record(i: int) -> dict:
+    record = {field: f'{field} {i}' for field in CUSTOMER_FIELDS}
+    record.update(
+        order_number=f'DM{24000000 + i}',
+        star_rating=1 + i % 5,
+        issue_category=CATEGORIES[i % len(CATEGORIES)],
+        priority_level=PRIORITIES[i % len(PRIORITIES)],
+        escalation_needed=i % 3 == 0,
+    )
+    return record
+
+
+@pytest.fixture(params=['columnar', 'sqlite'])
+def store(request, tmp_path):
+    records = [make_record(i) for i in range(20)]
+    if request.param == 'columnar':
+        return CustomerStore.from_records(records)
+    store = SQLiteCustomerStore(str(tmp_path / 'customers.sqlite3'))
+    store.apply(records)
+    return store
+
+
+def recount(store) -> dict:
+    return {field: dict(Counter(record[field] for record in store.values())) for field in COUNTED_FIELDS}
+
+
+def test_counts_follow_insert_update_and_delete(store):
+    assert store.check_counts() == {}
+
+    for i in range(20, 25):
+        store[f'DM{24000000 + i}'] = make_record(i)
+    assert store.check_counts() == {}
+
+    for i in range(0, 10, 2):
+        order = f'DM{24000000 + i}'
+        store[order] = {**store[order], 'issue_category': 'other', 'priority_level': 'critical',
+                        'escalation_needed': True}
+    assert store.check_counts() == {}
+
+    for i in range(1, 12, 3):
+        del store[f'DM{24000000 + i}']
+    # Re-inserting a deleted order counts it again, once
+    store['DM24000001'] = make_record(1)
+    assert store.check_counts() == {}
+
+    assert len(store) == 22
+    assert {field: store.value_counts(field) for field in COUNTED_FIELDS} == recount(store)
+    assert store.value_counts('issue_category')['other'] == 4
+
+
+def test_sqlite_counts_match_group_by_after_bulk_apply(tmp_path):
+    store = SQLiteCustomerStore(str(tmp_path / 'customers.sqlite3'))
+    store.apply([make_record(i) for i in range(30)])
+    changed = [{**make_record(i), 'priority_level': 'low'} for i in range(0, 30, 5)]
+    store.apply(changed + [make_record(30)], removed=['DM24000003', 'DM24000004'])
+
+    # check_counts() compares the trigger-maintained value_counts table with a GROUP BY recount
+    assert store.check_counts() == {}
+    assert len(store) == 29
+    assert {field: store.value_counts(field) for field in COUNTED_FIELDS} == recount(store)
+
+
+def test_check_counts_reports_drift():
+    store = CustomerStore.from_records([make_record(i) for i in range(4)])
+    store._counts['priority_level']['low'] += 1
+    assert set(store.check_counts()) == {'priority_level'}
@@ -0,0 +1,106 @@
+"""Fast-path routing: only a plain yes to a single offered action may skip the agent"""
+
+import asyncio
+
+import pytest
+
+from fast_path import FastPathRouter
+
+CUSTOMER = {
+    'order_number': 'DM24136267',
+    'customer_name': 'Bridgette C.',
+    'product_name': '2976 Smooth Leather Chelsea Boots',
+    'review_title': 'The strap on the right',
+    'priority_level': 'high',
+}
+
+
+def offer(text: str) -> list:
+    return [
+        {'role': 'user', 'content': 'My boots are falling apart, order DM24136267'},
+        {'role': 'assistant', 'content': [{'type': 'text', 'text': text}]},
+    ]
+
+
+REFUND_OFFER = offer("I'm sorry to hear that. Would you like me to process a refund for you?")
+REPAIR_OFFER = offer("That shouldn't happen. Shall I start a For Life repair for the broken strap?")
+
+
+@pytest.fixture
+def router():
+    return FastPathRouter(execute_tool=None)
+
+
+@pytest.mark.parametrize('message, history', [
+    ("Please don't process a refund, I changed my mind", REFUND_OFFER),
+    ('No, do not start the repair yet', REPAIR_OFFER),
+    ('please cancel my refund', REFUND_OFFER),
+    ('I do not want a refund please', REFUND_OFFER),
+    ('Is it ok if I return them later?', REFUND_OFFER),
+    ('yes, but wait until Monday', REPAIR_OFFER),
+    ("ok but don't refund yet", REFUND_OFFER),
+    ('yes please, can you also check the sole?', REPAIR_OFFER),
+    # A yes followed by anything but politeness may ask for something else
+    ('yes but I would rather get a refund', REPAIR_OFFER),
+    ('yes, actually make it a refund', REPAIR_OFFER),
+    ('sure, or a refund instead', REPAIR_OFFER),
+    ('yes and escalate to a manager', REPAIR_OFFER),
+    ('yes I am so angry, get me a manager', REPAIR_OFFER),
+    ('ok so what happens now', REPAIR_OFFER),
+    ('yes please, but keep the laces', REPAIR_OFFER),
+])
+def test_negated_or_questioning_replies_go_to_the_agent(router, message, history):
+    assert router._decide(message, CUSTOMER, history) is None
+
+
+@pytest.mark.parametrize('message, history, expected', [
+    ('yes please', REFUND_OFFER, ('refund', 'process_refund')),
+    ('Yes!', REPAIR_OFFER, ('repair', 'initiate_repair')),
+    ('go ahead', REPAIR_OFFER, ('repair', 'initiate_repair')),
+    ('Sure, go ahead, thanks!', REPAIR_OFFER, ('repair', 'initiate_repair')),
+    ('ok sounds good', REPAIR_OFFER, ('repair', 'initiate_repair')),
+    ('yes, size 9 please', offer('Would you like to exchange them for a different size?'),
+     ('exchange', 'create_exchange')),
+])
+def test_confirming_the_offered_action(router, message, history, expected):
+    assert router._decide(message, CUSTOMER, history) == expected
+
+
+def test_confirmation_needs_an_offer(router):
+    assert router._decide('yes please', CUSTOMER, []) is None
+    # A statement, not an offer
+    assert router._decide('yes please', CUSTOMER, offer('I have processed a refund for you.')) is None
+    # Two actions offered - the customer has to say which
+    assert router._decide('yes', CUSTOMER, offer('Would you prefer a repair or a refund?')) is None
+
+
+def test_request_without_confirmation_goes_to_the_agent(router):
+    assert router._decide('Please process a refund for my order', CUSTOMER, REFUND_OFFER) is None
+
+
+def test_critical_and_unknown_customers_go_to_the_agent(router):
+    assert router._decide('yes please', {**CUSTOMER, 'priority_level': 'critical'}, REFUND_OFFER) is None
+    assert router._decide('yes please', None, REFUND_OFFER) is None
+
+
+def test_exchange_without_size_goes_to_the_agent(router):
+    assert router._decide('yes', CUSTOMER, offer('Would you like to exchange them?')) is None
+
+
+def test_greeting_and_thanks(router):
+    assert router._decide('Hello!', None, []) == ('greeting', None)
+    assert router._decide('thanks so much', CUSTOMER, REFUND_OFFER) == ('thanks', None)
+
+
+def test_route_runs_the_offered_tool():
+    calls = []
+
+    async def execute_tool(name, tool_input):
+        calls.append((name, tool_input))
+        return {'success': True, 'repair_id': 'RPR-1', 'estimated_time': '2-3 weeks'}
+
+    events = asyncio.run(FastPathRouter(execute_tool).route('yes please', CUSTOMER, REPAIR_OFFER))
+    assert [name for name, _ in calls] == ['initiate_repair']
+    assert events[-1]['fast_path'] == 'repair'
+    assert asyncio.run(FastPathRouter(execute_tool).route('no thanks', CUSTOMER, REPAIR_OFFER)) is None
+    assert len(calls) == 1
@@ -0,0 +1,25 @@
+"""Order-number typo suggestions"""
+
+from order_index import OrderNumberIndex
+
+ORDERS = ['DM24136267', 'DM24382608', 'DM24169685']
+
+
+def test_suggests_orders_one_edit_away():
+    index = OrderNumberIndex.build(ORDERS)
+    assert index.suggest('DM24136276') == [('DM24136267', 1)]
+    assert index.suggest('DM2413626') == [('DM24136267', 1)]
+
+
+def test_eighteen_digit_query_does_not_overflow():
+    index = OrderNumberIndex.build(ORDERS)
+    # Nothing within one edit, so two-edit variants are tried: insertions have
+    # 19 digits and 9999999999999999999 is past what int64 holds
+    assert index.suggest('DM999999999999999999') == []
+    near = OrderNumberIndex.build(ORDERS + ['DM999999999999999998'])
+    assert near.suggest('DM999999999999999999') == [('DM999999999999999998', 1)]
+
+
+def test_overlong_query_has_no_suggestions():
+    index = OrderNumberIndex.build(ORDERS)
+    assert index.suggest('DM1234567890123456789') == []
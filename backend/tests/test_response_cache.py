@@ -0,0 +1,34 @@
+"""Response cache keys and what gets stored"""
+
+from response_cache import ResponseCache
+
+CUSTOMER = {'order_number': 'DM24136267', 'customer_name': 'Bridgette C.', 'issue_category': 'repair'}
+
+
+def test_unknown_orders_get_different_keys():
+    cache = ResponseCache(enabled=True)
+    assert cache.key(None, 'where is DM1234567', 'v1') != cache.key(None, 'where is DM7654321', 'v1')
+
+
+def test_same_question_about_same_order_shares_a_key():
+    cache = ResponseCache(enabled=True)
+    assert cache.key(CUSTOMER, 'Where is DM24136267?', 'v1') == cache.key(CUSTOMER, 'where is  dm24136267', 'v1')
+    assert cache.key(None, 'Where is DM1234567?', 'v1') == cache.key(None, 'where is dm1234567', 'v1')
+
+
+def test_key_changes_with_customer_and_prompt_version():
+    cache = ResponseCache(enabled=True)
+    key = cache.key(CUSTOMER, 'where is my order', 'v1')
+    assert key != cache.key({**CUSTOMER, 'issue_category': 'refund'}, 'where is my order', 'v1')
+    assert key != cache.key(CUSTOMER, 'where is my order', 'v2')
+
+
+def test_turns_with_side_effects_are_not_stored():
+    cache = ResponseCache(enabled=True)
+    key = cache.key(CUSTOMER, 'please refund me', 'v1')
+    refund = [{'tool': 'process_refund', 'input': {}, 'result': {'success': True}}]
+    assert not cache.store(key, 'Refunded', refund, [], llm_calls=2)
+    assert cache.get(key) is None
+    lookup = [{'tool': 'lookup_order', 'input': {}, 'result': {'success': True}}]
+    assert cache.store(key, 'Here it is', lookup, [], llm_calls=2)
+    assert cache.get(key)['response'] == 'Here it is'
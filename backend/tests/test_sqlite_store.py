@@ -0,0 +1,48 @@
+"""SQLite store rebuilds: only one of several workers opening a stale database rebuilds it"""
+
+import threading
+import time
+
+from customer_store import CustomerStore
+from sqlite_store import SQLiteCustomerStore
+from test_customer_store_counts import make_record
+
+
+def test_rebuild_if_stale_skips_a_current_database(tmp_path):
+    store = SQLiteCustomerStore(str(tmp_path / 'customers.sqlite3'))
+    rows = CustomerStore.from_records([make_record(i) for i in range(5)])
+
+    def build():
+        return rows, None, {'source': {'sha256': 'v1'}}
+
+    assert store.rebuild_if_stale('v1', build)
+    assert len(store) == 5
+    assert not store.rebuild_if_stale('v1', build)
+    assert store.rebuild_if_stale('v2', lambda: (CustomerStore(), None, {'source': {'sha256': 'v2'}}))
+    assert len(store) == 0
+
+
+def test_concurrent_workers_rebuild_once(tmp_path):
+    path = str(tmp_path / 'customers.sqlite3')
+    SQLiteCustomerStore(path)
+    rows = CustomerStore.from_records([make_record(i) for i in range(50)])
+    builds = []
+
+    def build():
+        builds.append(threading.get_ident())
+        # Long enough for the other workers to find the database stale and queue for the lock
+        time.sleep(0.2)
+        return rows, None, {'source': {'sha256': 'v1'}}
+
+    # One store object per worker, like separate processes opening the same file
+    workers = [threading.Thread(target=SQLiteCustomerStore(path).rebuild_if_stale, args=('v1', build))
+               for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert len(builds) == 1
+    store = SQLiteCustomerStore(path)
+    assert len(store) == 50
+    assert store.check_counts() == {}
@@ -0,0 +1,195 @@
+"""
+Dr. Martens AI Customer Support - Request tracing and Prometheus metrics
+Per-request traces made of timed spans, feeding latency summaries
+(p50/p95/p99) and counters that /api/metrics renders in Prometheus text format
+"""
+
+import math
+import re
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+
+# Quantiles reported for every latency summary
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Client-supplied trace ids are used only if they look like ids (no log or header injection)
+_TRACE_ID = re.compile(r'^[A-Za-z0-9_.:-]{1,64}$')
+
+
+def _label_text(names: tuple, values: tuple, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _quantile(ordered: list, q: float) -> float:
+    """Nearest-rank quantile of a sorted, non-empty list"""
+    return ordered[max(math.ceil(q * len(ordered)) - 1, 0)]
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value == value else 'NaN'
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def render(self) -> list:
+        return [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}'] + self._samples()
+
+    def _samples(self) -> list:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonic count per label set"""
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> list:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f'{self.name}{_label_text(self.labelnames, key)} {_number(value)}' for key, value in values]
+
+
+class Summary(_Metric):
+    """Latency summary per label set: running sum and count, plus quantiles
+    over a sliding window of the most recent observations (so p99 reflects
+    current behaviour, not the whole process lifetime)."""
+    kind = 'summary'
+
+    def __init__(self, name: str, documentation: str, labelnames=(), window: int = 1024):
+        super().__init__(name, documentation, labelnames)
+        self.window = window
+        self._series = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [deque(maxlen=self.window), 0.0, 0]
+            series[0].append(value)
+            series[1] += value
+            series[2] += 1
+
+    def quantiles(self, **labels) -> dict:
+        """{quantile: value} over the current window (empty if nothing was observed)"""
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            window = sorted(series[0]) if series else []
+        return {q: _quantile(window, q) for q in QUANTILES} if window else {}
+
+    def _samples(self) -> list:
+        with self._lock:
+            series = [(key, sorted(window), total, count) for key, (window, total, count) in self._series.items()]
+        lines = []
+        for key, window, total, count in sorted(series):
+            for q in QUANTILES:
+                labels = _label_text(self.labelnames, key, f'quantile="{q}"')
+                lines.append(f'{self.name}{labels} {_number(_quantile(window, q))}')
+            lines.append(f'{self.name}_sum{_label_text(self.labelnames, key)} {_number(total)}')
+            lines.append(f'{self.name}_count{_label_text(self.labelnames, key)} {count}')
+        return lines
+
+
+class MetricsRegistry:
+    """Named metrics, rendered together in the Prometheus text exposition format"""
+
+    CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+    def __init__(self, namespace: str = ''):
+        self.namespace = namespace
+        self._metrics = []
+
+    def _name(self, name: str) -> str:
+        return f'{self.namespace}_{name}' if self.namespace else name
+
+    def counter(self, name: str, documentation: str, labelnames=()) -> Counter:
+        metric = Counter(self._name(name), documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def summary(self, name: str, documentation: str, labelnames=(), window: int = 1024) -> Summary:
+        metric = Summary(self._name(name), documentation, labelnames, window)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return '\n'.join(line for metric in self._metrics for line in metric.render()) + '\n'
+
+
+class Trace:
+    """Spans of one chat request, each also observed in a latency summary.
+
+    Spans are (name, start offset, duration, attributes) in the order they
+    finished; durations go to `span_seconds` labelled by span name, while
+    attributes (iteration, tool, stop_reason, ...) stay on the trace only,
+    so metric cardinality stays fixed.
+    """
+
+    def __init__(self, span_seconds: Summary = None, trace_id: str = None):
+        self.trace_id = trace_id if trace_id and _TRACE_ID.match(trace_id) else uuid.uuid4().hex
+        self.span_seconds = span_seconds
+        self.start = time.perf_counter()
+        self.spans = []
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """Time the block as span `name`; the yielded dict can take attributes known only at the end"""
+        start = time.perf_counter()
+        try:
+            yield attributes
+        except BaseException as e:
+            attributes['error'] = type(e).__name__
+            raise
+        finally:
+            self.record(name, time.perf_counter() - start, start=start, **attributes)
+
+    def record(self, name: str, seconds: float, start: float = None, **attributes):
+        """Add a span that was timed elsewhere"""
+        if start is None:
+            start = time.perf_counter() - seconds
+        self.spans.append({
+            'name': name,
+            'start_ms': round((start - self.start) * 1000, 1),
+            'ms': round(seconds * 1000, 1),
+            **attributes,
+        })
+        if self.span_seconds is not None:
+            self.span_seconds.observe(seconds, span=name)
+
+    def totals(self) -> dict:
+        """Milliseconds per span name, summed over repeats (e.g. every llm iteration)"""
+        totals = {}
+        for span in self.spans:
+            totals[span['name']] = round(totals.get(span['name'], 0) + span['ms'], 1)
+        return totals
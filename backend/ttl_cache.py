@@ -0,0 +1,98 @@
+"""
+Dr. Martens AI Customer Support - Bounded in-process cache
+LRU + idle-TTL eviction with entry-count and memory budgets
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after `ttl_seconds` idle.
+
+    Eviction happens on write: expired entries first, then least recently
+    used ones until both max_entries and max_bytes (sizes come from the
+    `sizeof` callable) are respected.
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl_seconds: float = 1800,
+                 max_bytes: int = None, sizeof=None, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof or (lambda value: 0)
+        self._clock = clock
+        self._entries = OrderedDict()  # key -> (value, size, last_access)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = {'expired': 0, 'lru': 0, 'memory': 0}
+
+    def _expire(self, now: float):
+        # Entries are in access order, so expired ones are all at the front
+        while self._entries:
+            key, (_, size, last_access) = next(iter(self._entries.items()))
+            if now - last_access <= self.ttl_seconds:
+                break
+            del self._entries[key]
+            self._bytes -= size
+            self.evictions['expired'] += 1
+
+    def get(self, key, default=None):
+        with self._lock:
+            now = self._clock()
+            self._expire(now)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            value, size, _ = entry
+            self._entries[key] = (value, size, now)
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        size = self._sizeof(value)
+        with self._lock:
+            now = self._clock()
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (value, size, now)
+            self._bytes += size
+            self._expire(now)
+            while len(self._entries) > self.max_entries:
+                self._evict_oldest('lru')
+            while self.max_bytes is not None and self._bytes > self.max_bytes and len(self._entries) > 1:
+                self._evict_oldest('memory')
+
+    def _evict_oldest(self, reason: str):
+        _, (_, size, _) = self._entries.popitem(last=False)
+        self._bytes -= size
+        self.evictions[reason] += 1
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return default
+            self._bytes -= entry[1]
+            return entry[0]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'evictions': dict(self.evictions),
+            }
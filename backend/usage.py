@@ -0,0 +1,104 @@
+"""
+Dr. Martens AI Customer Support - Token usage and cost accounting
+Sums response.usage over the agent loop, prices it, and rolls turns up by
+issue category, priority and tool so the most expensive flows stand out
+"""
+
+import threading
+
+# response.usage fields, in the order they are reported
+TOKEN_TYPES = ['input_tokens', 'output_tokens', 'cache_creation_input_tokens', 'cache_read_input_tokens']
+
+# USD per million tokens (list prices); models not listed are reported without a cost
+MODEL_PRICING = {
+    'claude-sonnet-4-20250514': {
+        'input_tokens': 3.00,
+        'output_tokens': 15.00,
+        'cache_creation_input_tokens': 3.75,
+        'cache_read_input_tokens': 0.30,
+    },
+}
+
+# Rollup dimensions of a turn; a turn counts once for every tool it used
+DIMENSIONS = ['issue_category', 'priority_level', 'tool']
+NO_TOOL = 'none'
+UNKNOWN = 'unknown'
+
+
+def cost_usd(usage: dict, model: str):
+    """Price of the tokens in `usage` for `model`, or None when the model has no pricing"""
+    pricing = MODEL_PRICING.get(model)
+    if pricing is None:
+        return None
+    return round(sum(usage.get(kind, 0) * price for kind, price in pricing.items()) / 1_000_000, 6)
+
+
+def turn_usage(usages: list, model: str, static_prefix_tokens: int = 0) -> dict:
+    """Token totals of one agent turn from the per-call usage dicts.
+
+    static_prefix_tokens is the (estimated) size of the system prompt and
+    tool schemas, which every call sends again - whether it was billed as
+    input, cache write or cache read - so its share of the input shows.
+    """
+    totals = {kind: sum(usage.get(kind, 0) for usage in usages) for kind in TOKEN_TYPES}
+    totals['llm_calls'] = len(usages)
+    totals['static_prefix_tokens'] = static_prefix_tokens * len(usages)
+    totals['cost_usd'] = cost_usd(totals, model)
+    return totals
+
+
+def add_usage(total: dict, usage: dict) -> dict:
+    """total + usage, field by field (a missing cost stays missing)"""
+    combined = dict(total)
+    for key, value in usage.items():
+        if key == 'cost_usd':
+            known = [cost for cost in (total.get(key), value) if cost is not None]
+            combined[key] = round(sum(known), 6) if known else None
+        elif isinstance(value, (int, float)):
+            combined[key] = combined.get(key, 0) + value
+    combined['turns'] = total.get('turns', 0) + 1
+    return combined
+
+
+class UsageLedger:
+    """Running usage totals, overall and per value of each rollup dimension"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._total = {}
+        self._by = {dimension: {} for dimension in DIMENSIONS}
+
+    def record(self, usage: dict, issue_category: str = None, priority_level: str = None, tools=()):
+        keys = {
+            'issue_category': [issue_category or UNKNOWN],
+            'priority_level': [priority_level or UNKNOWN],
+            'tool': sorted(set(tools)) or [NO_TOOL],
+        }
+        with self._lock:
+            self._total = add_usage(self._total, usage)
+            for dimension, values in keys.items():
+                rollup = self._by[dimension]
+                for value in values:
+                    rollup[value] = add_usage(rollup.get(value, {}), usage)
+
+    def rollup(self) -> dict:
+        """{'total': ..., 'by_<dimension>': {value: totals}}, each value's entries costliest first"""
+        with self._lock:
+            report = {'total': _with_averages(self._total)}
+            for dimension, rollup in self._by.items():
+                ranked = sorted(rollup.items(), key=lambda item: -(item[1].get('cost_usd') or 0))
+                report[f'by_{dimension}'] = {value: _with_averages(totals) for value, totals in ranked}
+        return report
+
+
+def _with_averages(totals: dict) -> dict:
+    turns = totals.get('turns', 0)
+    if not turns:
+        return dict(totals)
+    averages = {'tokens_per_turn': round(sum(totals.get(kind, 0) for kind in TOKEN_TYPES) / turns, 1)}
+    if totals.get('cost_usd') is not None:
+        averages['cost_per_turn_usd'] = round(totals['cost_usd'] / turns, 6)
+    billed_input = sum(totals.get(kind, 0) for kind in TOKEN_TYPES if kind != 'output_tokens')
+    if billed_input:
+        averages['static_prefix_share'] = round(totals.get('static_prefix_tokens', 0) / billed_input, 3)
+    return {**totals, **averages}
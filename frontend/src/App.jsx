@@ -24,6 +24,7 @@ export default function DrMartensChatbot() {
   const [input, setInput] = useState('');
   const [isLoading, setIsLoading] = useState(false);
   const [currentCustomer, setCurrentCustomer] = useState(null);
+  const [sessionId, setSessionId] = useState(null);
   const [showKPIs, setShowKPIs] = useState(false);
   const [kpis, setKpis] = useState(null);
   const [actionInProgress, setActionInProgress] = useState(null);
@@ -69,12 +70,17 @@ export default function DrMartensChatbot() {
         body: JSON.stringify({
           message: currentInput,
           order_number: currentCustomer?.order_number,
+          session_id: sessionId,
           context: { customer: currentCustomer }
         }),
       });
 
       const data = await response.json();
 
+      if (data.session_id) {
+        setSessionId(data.session_id);
+      }
+
       if (data.customer && !currentCustomer) {
         setCurrentCustomer(data.customer);
       }